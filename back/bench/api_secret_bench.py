@@ -0,0 +1,85 @@
+"""
+Ingestion throughput with and without the verified API-secret cache.
+
+Requests go through the whole FastAPI app (in-process ASGI transport)
+against an in-memory SQLite database, so the numbers include routing,
+validation and the write itself but not disk latency.
+
+    PYTHONPATH=./src uv run python bench/api_secret_bench.py
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+
+import httpx
+from sqlalchemy import StaticPool
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.usecase.api_secret import ApiSecretUseCase
+from domain.entity import all  # noqa: F401
+from domain.entity.base import BaseEntity
+from infra.db.conn import Database, DatabaseManager
+from infra.utils.cache import LRUCache
+from infra.utils.config import AuthConfig
+from presentation.rest.app import app
+from presentation.rest.deps import get_api_secret_usecase
+
+API_SECRET = "apisecret"
+
+
+async def run_mode(client: httpx.AsyncClient, requests: int, mode: str) -> float:
+    started = time.perf_counter()
+
+    for i in range(requests):
+        response = await client.post(
+            "/api/v1/balance_change/",
+            params={"api_key": API_SECRET},
+            json={
+                "account_name": f"{mode}_{i % 20}",
+                "state": "update",
+                "balance": i,
+            },
+        )
+        response.raise_for_status()
+
+    return requests / (time.perf_counter() - started)
+
+
+async def main(requests: int) -> None:
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(BaseEntity.metadata.create_all)
+    DatabaseManager.init_test_db(Database(engine))
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        print(f"{requests} sequential ingestion requests, sqlite")
+        print(f"{'mode':<12}{'req/s':>10}")
+
+        cache: LRUCache[bytes, bool] = LRUCache(64, ttl=300)
+
+        pbkdf2 = ApiSecretUseCase(AuthConfig())
+        app.dependency_overrides[get_api_secret_usecase] = lambda: pbkdf2
+        rps = await run_mode(client, requests, "pbkdf2")
+        print(f"{'pbkdf2':<12}{rps:>10.1f}")
+
+        cached = ApiSecretUseCase(AuthConfig(), cache)
+        app.dependency_overrides[get_api_secret_usecase] = lambda: cached
+        rps = await run_mode(client, requests, "cached")
+        print(f"{'cached':<12}{rps:>10.1f}")
+
+    app.dependency_overrides.clear()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=300)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    asyncio.run(main(args.requests))
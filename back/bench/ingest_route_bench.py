@@ -0,0 +1,116 @@
+"""
+Per-request overhead of POST /balance_change/ vs the lean POST /balance_change/ingest.
+
+Requests go through the whole FastAPI app (in-process ASGI transport).
+The use case is replaced with a stub that returns a ready response, so
+the numbers are routing, auth, body decoding, DI and serialization only.
+
+    PYTHONPATH=./src uv run python bench/ingest_route_bench.py
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from uuid import uuid4
+
+import httpx
+from sqlalchemy import StaticPool
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.dto.balance_change import (
+    BalanceChangeResponse,
+    BalanceChangeState,
+    NewBalanceChangeRequest,
+)
+from app.usecase.balance_change import BalanceChangeUseCase
+from infra.db.conn import Database, DatabaseManager
+from presentation.rest import deps
+from presentation.rest.app import app
+from presentation.rest.router import balance_change as router
+
+API_SECRET = "apisecret"
+BODY = {"account_name": "bench", "state": "update", "balance": 100.5}
+
+
+class StubUseCase(BalanceChangeUseCase):
+    def __init__(self):
+        pass
+
+    async def new_balance_update(
+        self, request_dto: NewBalanceChangeRequest
+    ) -> BalanceChangeResponse:
+        return BalanceChangeResponse(
+            id=uuid4(),
+            created_at=datetime.now(timezone.utc),
+            account_id=uuid4(),
+            state=BalanceChangeState.UPDATE,
+            state_raw=BalanceChangeState.UPDATE,
+            balance=request_dto.balance,
+            balance_diff=0,
+        )
+
+
+async def run_mode(
+    client: httpx.AsyncClient, requests: int, url: str, status: int, **kwargs
+) -> float:
+    started = time.perf_counter()
+
+    for _ in range(requests):
+        response = await client.post(url, json=BODY, **kwargs)
+        assert response.status_code == status, response.text
+
+    return (time.perf_counter() - started) / requests
+
+
+async def main(requests: int) -> None:
+    # сессии открываются, но запросов к БД нет
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    DatabaseManager.init_test_db(Database(engine))
+
+    app.dependency_overrides[deps.get_balance_change_usecase] = StubUseCase
+    router.balance_change_usecase_factory = lambda session: StubUseCase()
+
+    modes = [
+        # нижняя граница: middleware и транспорт без маршрута
+        ("404", "/api/v1/not_found", 404, {}),
+        (
+            "current",
+            "/api/v1/balance_change/",
+            200,
+            {"params": {"api_key": API_SECRET}},
+        ),
+        (
+            "lean",
+            "/api/v1/balance_change/ingest",
+            200,
+            {"headers": {"X-Api-Key": API_SECRET}},
+        ),
+    ]
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        # прогрев и проверка секрета через PBKDF2 до замера
+        for _, url, status, kwargs in modes:
+            await run_mode(client, 10, url, status, **kwargs)
+
+        print(f"{requests} sequential requests, use case stubbed")
+        print(f"{'route':<10}{'us/request':>12}")
+        for name, url, status, kwargs in modes:
+            latency = await run_mode(client, requests, url, status, **kwargs)
+            print(f"{name:<10}{latency * 1_000_000:>12.1f}")
+
+    app.dependency_overrides.clear()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    asyncio.run(main(args.requests))
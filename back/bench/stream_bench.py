@@ -0,0 +1,101 @@
+"""
+Sustained ingestion throughput: one POST per update vs the NDJSON stream.
+
+Both go through the whole FastAPI app (in-process ASGI transport) against
+an in-memory SQLite database, the API secret cache is on in both modes.
+The stream sends frames in chunks of --chunk lines, like a bot that
+flushes its socket every few updates.
+
+    PYTHONPATH=./src uv run python bench/stream_bench.py
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import time
+
+import httpx
+from sqlalchemy import StaticPool
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from domain.entity import all  # noqa: F401
+from domain.entity.base import BaseEntity
+from infra.db.conn import Database, DatabaseManager
+from presentation.rest.app import app
+
+API_SECRET = "apisecret"
+
+
+def update(mode: str, i: int) -> dict:
+    return {"account_name": f"{mode}_{i % 20}", "state": "update", "balance": i}
+
+
+async def run_posts(client: httpx.AsyncClient, updates: int) -> float:
+    started = time.perf_counter()
+
+    for i in range(updates):
+        response = await client.post(
+            "/api/v1/balance_change/",
+            params={"api_key": API_SECRET},
+            json=update("post", i),
+        )
+        response.raise_for_status()
+
+    return updates / (time.perf_counter() - started)
+
+
+async def run_stream(client: httpx.AsyncClient, updates: int, chunk: int) -> float:
+    async def body():
+        for start in range(0, updates, chunk):
+            lines = [
+                json.dumps(update("stream", i))
+                for i in range(start, min(start + chunk, updates))
+            ]
+            yield ("\n".join(lines) + "\n").encode()
+
+    started = time.perf_counter()
+
+    response = await client.post(
+        "/api/v1/balance_change/stream",
+        headers={"X-Api-Key": API_SECRET},
+        content=body(),
+    )
+    response.raise_for_status()
+    acks = [json.loads(line) for line in response.text.splitlines()]
+    errors = [ack for ack in acks if ack["error"] is not None]
+    assert len(acks) == updates and not errors, errors[:3]
+
+    return updates / (time.perf_counter() - started)
+
+
+async def main(updates: int, chunk: int) -> None:
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(BaseEntity.metadata.create_all)
+    DatabaseManager.init_test_db(Database(engine))
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        print(f"{updates} updates, stream chunks of {chunk} frames, sqlite")
+        print(f"{'mode':<12}{'updates/s':>12}")
+
+        # первый запрос проверяет секрет через PBKDF2, дальше - из кэша
+        await run_posts(client, 1)
+
+        print(f"{'post':<12}{await run_posts(client, updates):>12.1f}")
+        print(f"{'stream':<12}{await run_stream(client, updates, chunk):>12.1f}")
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--updates", type=int, default=2000)
+    parser.add_argument("--chunk", type=int, default=20)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    asyncio.run(main(args.updates, args.chunk))
@@ -11,3 +11,12 @@ class AccountResponse(BaseDTO):
     last_balance_update: datetime
     is_balance_fixed: bool
     is_active: bool
+    last_seen_at: datetime | None = None
+
+
+class AccountSummaryResponse(AccountResponse):
+    # Итоги периода, как в BalanceChangePnLResponse
+    pnl: float
+    deposits: float
+    withdrawals: float
+    updates: int
@@ -1,7 +1,10 @@
 from datetime import datetime
 from enum import Enum
+from typing import Any, Literal
 from uuid import UUID
 
+from pydantic import Field
+
 from app.dto.base import BaseDTO
 
 
@@ -24,7 +27,107 @@ class BalanceChangeResponse(BaseDTO):
     balance_diff: float
 
 
+class HeartbeatResponse(BaseDTO):
+    # UPDATE без изменений: изменение не пишется, у ответа нет id
+    heartbeat: Literal[True] = True
+    account_id: UUID
+    state: BalanceChangeState
+    balance: float
+    balance_diff: float = 0
+    last_seen_at: datetime
+
+
+class AcceptedResponse(BaseDTO):
+    # 202: обновление в очереди или журнале, в БД запишется позже
+    status: Literal["accepted"] = "accepted"
+
+
+class BalanceChangePageResponse(BaseDTO):
+    items: list[BalanceChangeResponse]
+    # Курсор следующей страницы, None - это последняя
+    next_cursor: str | None = None
+
+
+class BalanceChangePnLResponse(BaseDTO):
+    account_id: UUID
+    # Сумма изменений без пополнений и выводов
+    pnl: float
+    deposits: float
+    withdrawals: float  # отрицательная сумма
+    updates: int
+
+
+class HistoryFormat(str, Enum):
+    JSON = "json"  # массив, как у обычной истории
+    NDJSON = "ndjson"
+
+
+class HistoryBucket(str, Enum):
+    MINUTE = "minute"
+    HOUR = "hour"
+    DAY = "day"
+
+    @property
+    def seconds(self) -> int:
+        return {"minute": 60, "hour": 3600, "day": 86400}[self.value]
+
+
+class BalanceChangeBucketResponse(BaseDTO):
+    # Начало корзины, UTC
+    start: datetime
+    open: float
+    close: float
+    min: float
+    max: float
+    balance_diff: float
+    # Без пополнений и выводов, как в BalanceChangePnLResponse
+    pnl: float
+    updates: int
+
+
 class NewBalanceChangeRequest(BaseDTO):
     account_name: str
     state: BalanceChangeState
     balance: float
+    idempotency_key: str | None = Field(default=None, max_length=128)
+
+    @property
+    def stored_key(self) -> str | None:
+        """Key the change is stored under, unique per account."""
+        return self.idempotency_key
+
+
+class BackfillRecord(NewBalanceChangeRequest):
+    # Время из лога бота, без него - время импорта
+    created_at: datetime | None = None
+
+
+class JournalRecord(NewBalanceChangeRequest):
+    # Ключ журнала для обновлений без ключа бота: повторное воспроизведение
+    # не пишет изменение второй раз. Ключом идемпотентности бота не считается
+    replay_key: str | None = None
+
+    @property
+    def stored_key(self) -> str | None:
+        return self.idempotency_key or self.replay_key
+
+
+class NewBalanceChangeBatchRequest(BaseDTO):
+    # Элементы проверяются по одному в use case: ошибка одного не отклоняет пачку
+    items: list[dict[str, Any]] = Field(
+        min_length=1,
+        max_length=5000,
+        json_schema_extra={
+            "items": {"$ref": "#/components/schemas/NewBalanceChangeRequest"}
+        },
+    )
+
+
+class BalanceChangeBatchItemResult(BaseDTO):
+    index: int
+    result: BalanceChangeResponse | HeartbeatResponse | None = None
+    error: str | None = None
+
+
+class BalanceChangeBatchResponse(BaseDTO):
+    items: list[BalanceChangeBatchItemResult]
@@ -1,9 +1,15 @@
+from datetime import datetime
 from uuid import UUID
 
-from app.dto.account import AccountResponse
+from pydantic_core import to_json
+
+from app.dto.account import AccountResponse, AccountSummaryResponse
 from app.usecase.errors import NotFoundError
 from infra.db.account import AccountRepository
 
+# Колонки в порядке полей ответа - JSON строк совпадает с моделью
+ACCOUNT_COLUMNS = tuple(AccountResponse.model_fields)
+
 
 class AccountUseCase:
     def __init__(
@@ -23,3 +29,32 @@ class AccountUseCase:
         accounts = await self.account_repository.get_all()
 
         return [AccountResponse.model_validate(account) for account in accounts]
+
+    async def get_accounts_version(self) -> str:
+        """Changes whenever GET /accounts would return something else."""
+        count, versions, last_seen_at = await self.account_repository.get_list_version()
+        seen = last_seen_at.isoformat() if last_seen_at is not None else ""
+
+        return f"{count}-{versions}-{seen}"
+
+    async def get_accounts_json(self) -> bytes:
+        """JSON bytes of list[AccountResponse] straight from plain rows."""
+        rows = await self.account_repository.get_all_rows(ACCOUNT_COLUMNS)
+
+        return to_json([row._asdict() for row in rows])
+
+    async def get_summaries(
+        self, date_from: datetime | None, date_to: datetime | None
+    ) -> list[AccountSummaryResponse]:
+        rows = await self.account_repository.get_summaries(date_from, date_to)
+
+        return [
+            AccountSummaryResponse(
+                **AccountResponse.model_validate(account).model_dump(),
+                pnl=round(pnl, 2),
+                deposits=round(deposits, 2),
+                withdrawals=round(withdrawals, 2),
+                updates=updates,
+            )
+            for account, pnl, deposits, withdrawals, updates in rows
+        ]
@@ -0,0 +1,74 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Iterable
+from uuid import UUID
+
+from domain.entity.account import Account
+from infra.utils.cache import LRUCache
+
+
+@dataclass(frozen=True, slots=True)
+class AccountSnapshot:
+    """Last known state of the account row, as written by this process."""
+
+    id: UUID
+    name: str
+    balance: float
+    is_balance_fixed: bool
+    is_active: bool
+    last_balance_update: datetime
+
+    @classmethod
+    def from_account(cls, account: Account) -> "AccountSnapshot":
+        return cls(
+            id=account.id,
+            name=account.name,
+            balance=account.balance,
+            is_balance_fixed=account.is_balance_fixed,
+            is_active=account.is_active,
+            last_balance_update=account.last_balance_update,
+        )
+
+    def to_account(self) -> Account:
+        """Transient account, not attached to any session."""
+        return Account(
+            id=self.id,
+            name=self.name,
+            balance=self.balance,
+            is_balance_fixed=self.is_balance_fixed,
+            is_active=self.is_active,
+            last_balance_update=self.last_balance_update,
+        )
+
+
+class AccountCache:
+    """
+    Account name -> last known account state for the ingestion hot path.
+
+    Entries are written by the ingestion path itself. The database stays the
+    source of truth: writes from a snapshot are conditional on the row still
+    matching it, so a stale entry costs one extra query and is then replaced.
+    """
+
+    def __init__(self, capacity: int):
+        self._cache: LRUCache[str, AccountSnapshot] = LRUCache(capacity)
+
+    def get(self, account_name: str) -> AccountSnapshot | None:
+        return self._cache.get(account_name)
+
+    def put(self, account: Account) -> None:
+        self._cache.put(account.name, AccountSnapshot.from_account(account))
+
+    def warm(self, accounts: Iterable[Account]) -> None:
+        for account in accounts:
+            self.put(account)
+
+    def invalidate(self, account_name: str | None = None) -> None:
+        """Drops one account or, without a name, the whole cache."""
+        if account_name is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(account_name)
+
+    def stats(self) -> dict:
+        return self._cache.stats()
@@ -0,0 +1,61 @@
+import hmac
+import os
+
+from app.usecase.auth import verify_password
+from app.usecase.errors import UnauthorizedError
+from infra.utils.cache import LRUCache
+from infra.utils.config import AuthConfig
+from infra.utils.executor import BoundedExecutor
+
+# Ключ для дайджестов проверенных секретов, живет только в памяти процесса
+_VERIFIED_SECRET_KEY = os.urandom(32)
+
+
+class ApiSecretUseCase:
+    """
+    Checks the bot API secret. Needs only the config, no database,
+    so one instance serves the whole process.
+    """
+
+    def __init__(
+        self,
+        cfg: AuthConfig,
+        verified_secrets: LRUCache[bytes, bool] | None = None,
+        hasher: BoundedExecutor | None = None,
+    ) -> None:
+        self._cfg = cfg
+        self.verified_secrets = verified_secrets
+        self.hasher = hasher
+
+    async def validate_api_secret(self, secret: str) -> bool:
+        """
+        Successfully verified secrets are remembered as a keyed digest,
+        so repeated calls skip PBKDF2. Failed attempts are never cached.
+        """
+        digest = None
+        if self.verified_secrets is not None:
+            digest = self._secret_digest(secret)
+            if self.verified_secrets.get(digest):
+                return True
+
+        if not await self._verify_password(secret, self._cfg.api_secret):
+            raise UnauthorizedError("Invalid token")
+
+        if digest is not None:
+            self.verified_secrets.put(digest, True)
+
+        return True
+
+    def _secret_digest(self, secret: str) -> bytes:
+        # в дайджест входит и хеш из конфига: смена секрета не пропустит старый
+        return hmac.digest(
+            _VERIFIED_SECRET_KEY,
+            self._cfg.api_secret.encode() + b"\0" + secret.encode(),
+            "sha256",
+        )
+
+    async def _verify_password(self, password: str, stored_hash: str) -> bool:
+        if self.hasher is None:
+            return verify_password(password, stored_hash)
+
+        return await self.hasher.run(verify_password, password, stored_hash)
@@ -7,40 +7,74 @@ from typing import Optional
 from uuid import UUID
 from jose import jwt
 
-from app.dto.auth import TokenUser
 from app.usecase.errors import InvalidInputError, UnauthorizedError
 from domain.entity.user import User
 from infra.db.user import UserRepository
 from infra.utils.config import AuthConfig
+from infra.utils.executor import BoundedExecutor
+
+
+def hash_password(password: str) -> str:
+    """
+    Returns base64(salt + pbkdf2_hash).
+    """
+    salt = os.urandom(16)
+    hash_bytes = hashlib.pbkdf2_hmac(
+        "sha256",
+        password.encode(),
+        salt,
+        200_000,  # OWASP recommended
+    )
+    return base64.b64encode(salt + hash_bytes).decode()
+
+
+def verify_password(password: str, stored_hash: str) -> bool:
+    decoded = base64.b64decode(stored_hash.encode())
+
+    salt = decoded[:16]
+    stored_bytes = decoded[16:]
+
+    new_hash = hashlib.pbkdf2_hmac(
+        "sha256",
+        password.encode(),
+        salt,
+        200_000,
+    )
+
+    return hmac.compare_digest(stored_bytes, new_hash)
 
 
 class AuthUseCase:
 
-    def __init__(self, cfg: AuthConfig, user_repo: UserRepository) -> None:
+    def __init__(
+        self,
+        cfg: AuthConfig,
+        user_repo: UserRepository,
+        hasher: BoundedExecutor | None = None,
+    ) -> None:
         self._cfg = cfg
         self.user_repo = user_repo
+        # PBKDF2 в пуле, чтобы не блокировать цикл событий
+        self.hasher = hasher
 
     async def authenticate_user(
         self,
         username: str,
         password: str,
     ) -> User:
+        """
+        Checks the password only, `last_login` is written separately
+        by `update_last_login` so it stays out of the response path.
+        """
         user = await self.user_repo.get_by_name(username)
 
-        if not user or not self._verify_password(password, user.password_hash):
+        if not user or not await self._verify_password(password, user.password_hash):
             raise UnauthorizedError("Invalid password")
 
-        # update last login
-        user.last_login = datetime.now(timezone.utc)
-        user = await self.user_repo.update(user)
-
         return user
 
-    def validate_api_secret(self, secret: str) -> bool:
-        if not self._verify_password(secret, self._cfg.api_secret):
-            raise UnauthorizedError("Invalid token")
-
-        return True
+    async def update_last_login(self, user_id: UUID) -> None:
+        await self.user_repo.update_last_login(user_id, datetime.now(timezone.utc))
 
     async def register(self, username: str, password: str) -> User:
         if await self.user_repo.get_by_name(username):
@@ -52,7 +86,7 @@ class AuthUseCase:
         user = User(
             username=username,
             last_login=datetime.now(timezone.utc),
-            password_hash=self._hash_password(password),
+            password_hash=await self._hash_password(password),
         )
 
         return await self.user_repo.create(user)
@@ -60,44 +94,17 @@ class AuthUseCase:
     async def create_token_for_user(self, user: User) -> str:
         return self._create_access_token({"sub": str(user.id)})
 
-    def get_user_from_token(self, token: str) -> TokenUser:
-        try:
-            payload = jwt.decode(
-                token, self._cfg.secret, algorithms=[self._cfg.algorithm]
-            )
-            user_id = UUID(payload.get("sub"))
-        except Exception:
-            raise UnauthorizedError("Invalid token")
+    async def _hash_password(self, password: str) -> str:
+        if self.hasher is None:
+            return hash_password(password)
 
-        return TokenUser(id=user_id)
+        return await self.hasher.run(hash_password, password)
 
-    def _hash_password(self, password: str) -> str:
-        """
-        Returns base64(salt + pbkdf2_hash).
-        """
-        salt = os.urandom(16)
-        hash_bytes = hashlib.pbkdf2_hmac(
-            "sha256",
-            password.encode(),
-            salt,
-            200_000,  # OWASP recommended
-        )
-        return base64.b64encode(salt + hash_bytes).decode()
-
-    def _verify_password(self, password: str, stored_hash: str) -> bool:
-        decoded = base64.b64decode(stored_hash.encode())
-
-        salt = decoded[:16]
-        stored_bytes = decoded[16:]
-
-        new_hash = hashlib.pbkdf2_hmac(
-            "sha256",
-            password.encode(),
-            salt,
-            200_000,
-        )
+    async def _verify_password(self, password: str, stored_hash: str) -> bool:
+        if self.hasher is None:
+            return verify_password(password, stored_hash)
 
-        return hmac.compare_digest(stored_bytes, new_hash)
+        return await self.hasher.run(verify_password, password, stored_hash)
 
     def _create_access_token(
         self, data: dict, expires_delta: Optional[timedelta] = None
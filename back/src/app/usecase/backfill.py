@@ -0,0 +1,177 @@
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import AsyncIterable, Callable
+from uuid import uuid4
+
+from app.dto.balance_change import BackfillRecord
+from app.usecase.balance_change import BalanceChangeUseCase, apply_balance_update
+from app.usecase.errors import InvalidInputError
+from domain.entity.account import Account
+from infra.db.account import AccountRepository
+from infra.db.balance_change import BalanceChangeRepository
+from infra.utils.log import logger
+
+
+@dataclass(slots=True)
+class BackfillProgress:
+    records: int = 0
+    written: int = 0
+    skipped: int = 0
+    accounts: int = 0
+    created_accounts: int = 0
+    started_at: float = field(default_factory=time.perf_counter)
+
+    @property
+    def rate(self) -> float:
+        elapsed = time.perf_counter() - self.started_at
+        return self.records / elapsed if elapsed > 0 else 0.0
+
+
+class BackfillUseCase:
+    """
+    Loads historical balance updates in bulk, replaying the same rules as
+    `BalanceChangeUseCase.new_balance_update` in memory.
+
+    Records must be in time order per account. A new account starts from its
+    first imported record (diff 0), an existing one from its stored state.
+    The replayed state is saved only for new accounts and for imports that
+    end after the account's latest stored change: old logs never roll back
+    a live account. Memory depends on the number of accounts and
+    `chunk_size`, not on the number of records.
+    """
+
+    def __init__(
+        self,
+        account_repository: AccountRepository,
+        balance_change_repository: BalanceChangeRepository,
+        chunk_size: int = 10_000,
+        on_progress: Callable[[BackfillProgress], None] | None = None,
+    ):
+        self.account_repository = account_repository
+        self.balance_change_repository = balance_change_repository
+        self.chunk_size = chunk_size
+        self.on_progress = on_progress
+
+    async def run(self, records: AsyncIterable[BackfillRecord]) -> BackfillProgress:
+        progress = BackfillProgress()
+        # состояние аккаунтов по ходу воспроизведения, в сессию не добавляются
+        states: dict[str, Account] = {}
+        # время последнего изменения в БД до импорта и последней записи импорта
+        stored_until: dict[str, datetime | None] = {}
+        imported_until: dict[str, datetime] = {}
+        rows: list[tuple] = []
+
+        async for record in records:
+            progress.records += 1
+            try:
+                BalanceChangeUseCase.validate_request(record)
+            except InvalidInputError as e:
+                logger.warning("Skipping record %d: %s", progress.records, e.message)
+                progress.skipped += 1
+                continue
+
+            account = states.get(record.account_name)
+            if account is None:
+                account, stored_until[record.account_name] = await self._start_account(
+                    record, progress
+                )
+                states[record.account_name] = account
+
+            created_at = record.created_at or datetime.now(timezone.utc)
+            imported_until[record.account_name] = created_at
+            state, diff = apply_balance_update(account, record.state, record.balance)
+            rows.append(
+                (
+                    uuid4(),
+                    created_at,
+                    account.id,
+                    record.state.value,
+                    state.value,
+                    record.balance,
+                    diff,
+                    record.idempotency_key,
+                )
+            )
+
+            if len(rows) >= self.chunk_size:
+                await self._write(rows, progress)
+                rows = []
+
+        await self._write(rows, progress)
+        await self._save_states(
+            {
+                name: account
+                for name, account in states.items()
+                if (until := stored_until[name]) is None
+                or as_utc(imported_until[name]) > as_utc(until)
+            }
+        )
+        progress.accounts = len(states)
+        self._report(progress)
+
+        return progress
+
+    async def _start_account(
+        self, record: BackfillRecord, progress: BackfillProgress
+    ) -> tuple[Account, datetime | None]:
+        """
+        Replay state of the account and the time of its latest stored change.
+        """
+        stored_until = None
+        account = await self.account_repository.get_by_name(record.account_name)
+        if account is None:
+            account = await self.account_repository.create_if_not_exists(
+                Account(
+                    name=record.account_name,
+                    balance=record.balance,
+                    is_balance_fixed=False,
+                    is_active=True,
+                    last_balance_update=record.created_at or datetime.now(),
+                )
+            )
+            progress.created_accounts += 1
+        else:
+            _, stored_until = await self.balance_change_repository.get_period_bounds(
+                account.id
+            )
+
+        state = Account(
+            id=account.id,
+            name=account.name,
+            balance=account.balance,
+            is_balance_fixed=account.is_balance_fixed,
+            is_active=account.is_active,
+            last_balance_update=account.last_balance_update,
+        )
+
+        return state, stored_until
+
+    async def _write(self, rows: list[tuple], progress: BackfillProgress) -> None:
+        await self.balance_change_repository.copy_rows(rows)
+        progress.written += len(rows)
+        self._report(progress)
+
+    async def _save_states(self, states: dict[str, Account]) -> None:
+        # Одно обновление на аккаунт в конце импорта
+        names = list(states)
+        for start in range(0, len(names), self.chunk_size):
+            accounts = await self.account_repository.get_by_names(
+                names[start : start + self.chunk_size], for_update=True
+            )
+            for account in accounts:
+                state = states[account.name]
+                account.balance = state.balance
+                account.is_balance_fixed = state.is_balance_fixed
+                account.is_active = state.is_active
+
+            await self.account_repository.update_many(accounts)
+
+    def _report(self, progress: BackfillProgress) -> None:
+        if self.on_progress is not None:
+            self.on_progress(progress)
+
+
+def as_utc(value: datetime) -> datetime:
+    # время без зоны (SQLite, логи ботов) считаем UTC
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
@@ -1,26 +1,93 @@
 # from asyncio import sleep
-from datetime import datetime
+import base64
+import binascii
+import math
+from decimal import ROUND_HALF_UP, Decimal
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Sequence
 from uuid import UUID
 
-from app.dto.balance_change import BalanceChangeResponse, NewBalanceChangeRequest
-from app.usecase.errors import InvalidInputError
+from pydantic import ValidationError
+from pydantic_core import to_json
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.dto.balance_change import (
+    BalanceChangeBatchItemResult,
+    BalanceChangeBucketResponse,
+    BalanceChangePageResponse,
+    BalanceChangePnLResponse,
+    BalanceChangeResponse,
+    HeartbeatResponse,
+    HistoryBucket,
+    HistoryFormat,
+    NewBalanceChangeRequest,
+)
+from app.usecase.account_cache import AccountCache, AccountSnapshot
+from app.usecase.errors import InternalServerError, InvalidInputError
+from app.usecase.heartbeat import LastSeenTracker
+from app.usecase.history_cache import HistoryCache
 from domain.entity.account import Account
 from domain.entity.balance_change import BalanceChange, BalanceChangeState
 from infra.db.account import AccountRepository
 from infra.db.balance_change import BalanceChangeRepository
+from infra.db.ingestion import IngestionRepository
+from infra.utils.cache import LRUCache
+from infra.utils.lock import ShardedLock
 
 
 from infra.utils.log import logger
 
+# Общие на процесс блокировки по имени аккаунта
+account_locks = ShardedLock()
+
+# Ключ session.info для ответов, которые попадут в кеш идемпотентности при коммите
+_UNCOMMITTED_RESPONSES = "uncommitted_idempotent_responses"
+
+# Колонки истории в порядке полей ответа - JSON строк совпадает с моделью
+HISTORY_COLUMNS = tuple(BalanceChangeResponse.model_fields)
+
+
+def encode_cursor(change: BalanceChange) -> str:
+    """Opaque page cursor: the (created_at, seq) of the last change of a page."""
+    raw = f"{change.created_at.isoformat()} {change.seq}".encode()
+
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, seq = raw.decode().split(" ")
+        return datetime.fromisoformat(created_at), int(seq)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidInputError("Invalid cursor")
+
 
 class BalanceChangeUseCase:
     def __init__(
         self,
         account_repository: AccountRepository,
         balance_change_repository: BalanceChangeRepository,
+        locks: ShardedLock = account_locks,
+        account_cache: AccountCache | None = None,
+        ingestion_repository: IngestionRepository | None = None,
+        idempotency_cache: (
+            LRUCache[tuple[str, str], BalanceChangeResponse] | None
+        ) = None,
+        last_seen: LastSeenTracker | None = None,
+        history_cache: HistoryCache | None = None,
     ):
         self.account_repository = account_repository
         self.balance_change_repository = balance_change_repository
+        self.locks = locks
+        self.account_cache = account_cache
+        self.ingestion_repository = ingestion_repository
+        self.idempotency_cache = idempotency_cache
+        # Режим heartbeat: повтор того же баланса не пишет изменение
+        self.last_seen = last_seen
+        self.history_cache = history_cache
 
     async def get_change_for_account(
         self, account_id: UUID, date_from: datetime | None, date_to: datetime | None
@@ -32,11 +99,515 @@ class BalanceChangeUseCase:
 
         return [BalanceChangeResponse.model_validate(change) for change in changes]
 
+    async def stream_change_for_account(
+        self,
+        account_id: UUID,
+        date_from: datetime | None,
+        date_to: datetime | None,
+        fmt: HistoryFormat = HistoryFormat.JSON,
+    ) -> AsyncIterator[bytes]:
+        """
+        History serialized batch by batch as it is read from the cursor:
+        memory doesn't grow with the period and the first bytes go out
+        after the first batch.
+        """
+        ndjson = fmt == HistoryFormat.NDJSON
+        separator = b""
+        if not ndjson:
+            yield b"["
+
+        async for batch in self.balance_change_repository.stream_rows_by_account_id(
+            account_id, date_from, date_to, HISTORY_COLUMNS
+        ):
+            if ndjson:
+                yield b"".join(to_json(row._asdict()) + b"\n" for row in batch)
+            else:
+                yield separator + to_json([row._asdict() for row in batch])[1:-1]
+                separator = b","
+
+        if not ndjson:
+            yield b"]"
+
+    async def get_history_version(self, account_id: UUID) -> str | None:
+        """
+        Version of the account history: the account version grows with every
+        recorded change. None if there is no such account.
+        """
+        version = await self.account_repository.get_version(account_id)
+
+        return None if version is None else str(version)
+
+    async def get_change_json_for_account(
+        self,
+        account_id: UUID,
+        date_from: datetime | None,
+        date_to: datetime | None,
+        version: str | None = None,
+    ) -> bytes:
+        """
+        The history as JSON bytes of list[BalanceChangeResponse], serialized
+        straight from plain rows without ORM objects and models.
+        With the history `version` read beforehand the body is served from
+        and kept in the history cache.
+        """
+        key = (account_id, date_from, date_to)
+        if self.history_cache is not None and version is not None:
+            body = self.history_cache.get(key, version)
+            if body is not None:
+                return body
+
+        rows = await self.balance_change_repository.get_rows_by_account_id(
+            account_id, date_from, date_to, HISTORY_COLUMNS
+        )
+        body = to_json([row._asdict() for row in rows])
+        if self.history_cache is not None and version is not None:
+            self.history_cache.put(key, version, body)
+
+        return body
+
+    async def get_change_page_for_account(
+        self,
+        account_id: UUID,
+        date_from: datetime | None,
+        date_to: datetime | None,
+        limit: int,
+        cursor: str | None = None,
+    ) -> BalanceChangePageResponse:
+        after = decode_cursor(cursor) if cursor is not None else None
+        # лишняя запись - признак следующей страницы без COUNT
+        changes = await self.balance_change_repository.get_by_account_id(
+            account_id, date_from, date_to, limit + 1, after
+        )
+        items = [
+            BalanceChangeResponse.model_validate(change) for change in changes[:limit]
+        ]
+        next_cursor = (
+            encode_cursor(changes[limit - 1]) if len(changes) > limit else None
+        )
+
+        return BalanceChangePageResponse(items=items, next_cursor=next_cursor)
+
+    async def get_history_buckets(
+        self,
+        account_id: UUID,
+        date_from: datetime | None,
+        date_to: datetime | None,
+        bucket: HistoryBucket | None = None,
+        max_points: int | None = None,
+    ) -> list[BalanceChangeBucketResponse]:
+        """
+        History aggregated by the database into buckets of `bucket` size,
+        widened so that the period fits into `max_points` buckets.
+        The payload depends on the number of buckets, not on the history.
+        """
+        width = bucket.seconds if bucket is not None else 1
+        if max_points is not None:
+            if date_from is None or date_to is None:
+                first, last = await self.balance_change_repository.get_period_bounds(
+                    account_id
+                )
+                if first is None or last is None:
+                    return []
+                date_from = date_from or first
+                date_to = date_to or last + timedelta(seconds=1)
+
+            span = (date_to - date_from).total_seconds()
+            # корзины выровнены по эпохе: на период приходится на одну больше
+            width = max(width, math.ceil(span / (max_points - 1)))
+
+        buckets = await self.balance_change_repository.get_buckets(
+            account_id, date_from, date_to, width
+        )
+
+        return [
+            BalanceChangeBucketResponse(
+                start=datetime.fromtimestamp(row.bucket * width, tz=timezone.utc),
+                open=row.open,
+                close=row.close,
+                min=row.min,
+                max=row.max,
+                balance_diff=round(row.balance_diff, 2),
+                pnl=round(row.pnl, 2),
+                updates=row.updates,
+            )
+            for row in buckets
+        ]
+
+    async def get_pnl_for_account(
+        self, account_id: UUID, date_from: datetime | None, date_to: datetime | None
+    ) -> BalanceChangePnLResponse:
+        """Period totals computed by the database, not from the history rows."""
+        totals = await self.balance_change_repository.get_pnl(
+            account_id, date_from, date_to
+        )
+
+        return BalanceChangePnLResponse(
+            account_id=account_id,
+            pnl=round(totals.pnl, 2),
+            deposits=round(totals.deposits, 2),
+            withdrawals=round(totals.withdrawals, 2),
+            updates=totals.updates,
+        )
+
     async def new_balance_update(
         self, request_dto: NewBalanceChangeRequest
-    ) -> BalanceChangeResponse:
+    ) -> BalanceChangeResponse | HeartbeatResponse:
         logger.info("New balance change for account %s", request_dto.account_name)
 
+        self.validate_request(request_dto)
+
+        key = self._idempotency_key(request_dto)
+        response = self._get_cached_response(key)
+        if response is not None:
+            logger.info("Repeated balance change %s, skipping", key)
+            return response
+
+        stored_key = self._stored_key(request_dto)
+        # Обновления одного аккаунта идут строго по очереди: блокировка в процессе
+        # и FOR UPDATE на строку аккаунта до коммита (между воркерами)
+        async with self.locks(request_dto.account_name):
+            if stored_key is not None:
+                balance_change = (
+                    await self.balance_change_repository.get_by_idempotency_key(
+                        *stored_key
+                    )
+                )
+                if balance_change is not None:
+                    logger.info("Repeated balance change %s, skipping", stored_key)
+                    return self._remember(
+                        key, BalanceChangeResponse.model_validate(balance_change)
+                    )
+
+            if self.last_seen is not None:
+                response = await self._heartbeat(request_dto)
+                if response is not None:
+                    return response
+
+            if stored_key is not None:
+                balance_change = await self._write_once(stored_key, request_dto)
+            else:
+                balance_change = await self._write(request_dto)
+
+        if self.last_seen is not None:
+            self.last_seen.touch(balance_change.account_id)
+        if self.history_cache is not None:
+            self.history_cache.invalidate(balance_change.account_id)
+
+        return self._remember(key, BalanceChangeResponse.model_validate(balance_change))
+
+    async def _write(self, request_dto: NewBalanceChangeRequest) -> BalanceChange:
+        if self.ingestion_repository is not None:
+            return await self._update_in_one_statement(
+                self.ingestion_repository, request_dto
+            )
+
+        balance_change = await self._update_from_cache(request_dto)
+        if balance_change is None:
+            balance_change = await self._update_from_db(request_dto)
+
+        return balance_change
+
+    async def _write_once(
+        self, key: tuple[str, str], request_dto: NewBalanceChangeRequest
+    ) -> BalanceChange:
+        """
+        Writes a keyed update in a savepoint. The stored key lookup misses
+        a change that is not committed yet, e.g. the slow original of a retry
+        on another worker: then the insert waits for it and fails on the
+        unique key. The write is undone and the stored change is returned.
+        """
+        try:
+            async with self.balance_change_repository.savepoint():
+                return await self._write(request_dto)
+        except IntegrityError:
+            balance_change = (
+                await self.balance_change_repository.get_by_idempotency_key(*key)
+            )
+            if balance_change is None:
+                raise
+
+            logger.info("Repeated balance change %s, skipping", key)
+            return balance_change
+
+    async def _heartbeat(
+        self, request_dto: NewBalanceChangeRequest
+    ) -> HeartbeatResponse | None:
+        """
+        Returns a response without writing a change if the update is a heartbeat.
+        """
+        if request_dto.state != BalanceChangeState.UPDATE:
+            return None
+
+        if self.account_cache is not None:
+            snapshot = self.account_cache.get(request_dto.account_name)
+            # Снимок может отстать от другого воркера. Тогда теряется только
+            # точка истории: следующее изменение считает разницу от баланса в БД
+            if snapshot is not None:
+                if not self._is_heartbeat(snapshot, request_dto):
+                    return None
+
+                return self._heartbeat_response(snapshot.id, request_dto)
+
+        account = await self.account_repository.get_by_name(request_dto.account_name)
+        if account is None or not self._is_heartbeat(account, request_dto):
+            return None
+
+        return self._heartbeat_response(account.id, request_dto)
+
+    async def _update_in_one_statement(
+        self,
+        ingestion_repository: IngestionRepository,
+        request_dto: NewBalanceChangeRequest,
+    ) -> BalanceChange:
+        """
+        Rules are evaluated by the database, see `IngestionRepository`.
+        """
+        result = await ingestion_repository.apply_update(
+            request_dto.account_name,
+            request_dto.state,
+            request_dto.balance,
+            request_dto.stored_key,
+        )
+        if result is None:
+            logger.info("No account found. Creating...")
+            await self.account_repository.create_many_if_not_exists(
+                [self._new_account(request_dto)]
+            )
+            result = await ingestion_repository.apply_update(
+                request_dto.account_name,
+                request_dto.state,
+                request_dto.balance,
+                request_dto.stored_key,
+            )
+            if result is None:
+                raise InternalServerError(
+                    f"Account {request_dto.account_name} was not created"
+                )
+
+        balance_change, account = result
+        if self.account_cache is not None:
+            self.account_cache.put(account)
+
+        return balance_change
+
+    async def _update_from_cache(
+        self, request_dto: NewBalanceChangeRequest
+    ) -> BalanceChange | None:
+        """
+        Hot path: applies the update to the cached account state without reading
+        the account row. Returns None if there is no entry or it turned out stale.
+        """
+        if self.account_cache is None:
+            return None
+
+        snapshot = self.account_cache.get(request_dto.account_name)
+        if snapshot is None:
+            return None
+
+        account = snapshot.to_account()
+        balance_change = self._apply_update(account, request_dto)
+
+        if not await self.account_repository.update_if_unchanged(
+            account, snapshot.to_account()
+        ):
+            logger.info("Cached state of account %s is stale", request_dto.account_name)
+            self.account_cache.invalidate(request_dto.account_name)
+            return None
+
+        balance_change = await self.balance_change_repository.create(balance_change)
+        self.account_cache.put(account)
+
+        return balance_change
+
+    async def _update_from_db(
+        self, request_dto: NewBalanceChangeRequest
+    ) -> BalanceChange:
+        account = await self.account_repository.get_by_name(
+            request_dto.account_name, for_update=True
+        )
+        if not account:
+            logger.info("No account found. Creating...")
+            account = await self.account_repository.create_if_not_exists(
+                self._new_account(request_dto)
+            )
+
+        balance_change = self._apply_update(account, request_dto)
+
+        balance_change = await self.balance_change_repository.create(balance_change)
+        await self.account_repository.update(account)
+
+        if self.account_cache is not None:
+            self.account_cache.put(account)
+
+        return balance_change
+
+    async def new_balance_updates(
+        self, items: Sequence[NewBalanceChangeRequest | dict[str, Any]]
+    ) -> list[BalanceChangeBatchItemResult]:
+        """
+        Batch variant of `new_balance_update`.
+
+        Items are applied in order, so several updates for one account chain
+        their diffs. Raw items are validated here, one by one: invalid items
+        get an error result and do not stop the batch.
+        """
+        logger.info("New balance change batch of %d items", len(items))
+
+        results: list[BalanceChangeBatchItemResult | None] = [None] * len(items)
+        valid: list[tuple[int, NewBalanceChangeRequest]] = []
+        # повтор ключа внутри пачки -> индекс первого элемента с этим ключом
+        repeats: dict[int, int] = {}
+        first_by_key: dict[tuple[str, str], int] = {}
+        for index, item in enumerate(items):
+            try:
+                request_dto = self.parse_request(item)
+                self.validate_request(request_dto)
+            except InvalidInputError as e:
+                results[index] = BalanceChangeBatchItemResult(
+                    index=index, error=e.message
+                )
+                continue
+
+            key = self._stored_key(request_dto)
+            if key is not None:
+                response = self._get_cached_response(self._idempotency_key(request_dto))
+                if response is not None:
+                    results[index] = BalanceChangeBatchItemResult(
+                        index=index, result=response
+                    )
+                    continue
+
+                if key in first_by_key:
+                    repeats[index] = first_by_key[key]
+                    continue
+
+                first_by_key[key] = index
+
+            valid.append((index, request_dto))
+
+        names = list(
+            dict.fromkeys(request_dto.account_name for _, request_dto in valid)
+        )
+        async with self.locks.many(names):
+            accounts = {
+                account.name: account
+                for account in await self.account_repository.get_by_names(
+                    names, for_update=True
+                )
+            }
+
+            new_accounts: dict[str, Account] = {}
+            for _, request_dto in valid:
+                name = request_dto.account_name
+                if name not in accounts and name not in new_accounts:
+                    new_accounts[name] = self._new_account(request_dto)
+
+            if new_accounts:
+                logger.info("Creating %d new accounts", len(new_accounts))
+                await self.account_repository.create_many_if_not_exists(
+                    list(new_accounts.values())
+                )
+                for account in await self.account_repository.get_by_names(
+                    list(new_accounts), for_update=True
+                ):
+                    accounts[account.name] = account
+
+            # Ключи ищем только под блокировкой строк: незакоммиченный оригинал
+            # повтора держит строку аккаунта, и после него ключ уже виден
+            stored = await self.balance_change_repository.get_by_idempotency_keys(
+                list(first_by_key)
+            )
+            request_dtos = dict(valid)
+            for account_name, balance_change in stored:
+                index = first_by_key[(account_name, balance_change.idempotency_key)]
+                results[index] = BalanceChangeBatchItemResult(
+                    index=index,
+                    result=self._remember(
+                        self._idempotency_key(request_dtos[index]),
+                        BalanceChangeResponse.model_validate(balance_change),
+                    ),
+                )
+            valid = [item for item in valid if results[item[0]] is None]
+
+            written: list[tuple[int, NewBalanceChangeRequest]] = []
+            balance_changes: list[BalanceChange] = []
+            # первое обновление нового аккаунта пишется всегда
+            first_updates = set(new_accounts)
+            for index, request_dto in valid:
+                account = accounts[request_dto.account_name]
+                is_first = request_dto.account_name in first_updates
+                first_updates.discard(request_dto.account_name)
+                if (
+                    self.last_seen is not None
+                    and not is_first
+                    and self._is_heartbeat(account, request_dto)
+                ):
+                    results[index] = BalanceChangeBatchItemResult(
+                        index=index,
+                        result=self._heartbeat_response(account.id, request_dto),
+                    )
+                    continue
+
+                written.append((index, request_dto))
+                balance_changes.append(self._apply_update(account, request_dto))
+
+            balance_changes = await self.balance_change_repository.create_many(
+                balance_changes
+            )
+            # только аккаунты с записанными изменениями - им растет версия
+            written_names = dict.fromkeys(
+                request_dto.account_name for _, request_dto in written
+            )
+            await self.account_repository.update_many(
+                [accounts[name] for name in written_names]
+            )
+            if self.history_cache is not None:
+                for name in written_names:
+                    self.history_cache.invalidate(accounts[name].id)
+
+            if self.account_cache is not None:
+                self.account_cache.warm(accounts.values())
+
+        if self.last_seen is not None:
+            for account in accounts.values():
+                self.last_seen.touch(account.id)
+
+        for (index, request_dto), balance_change in zip(written, balance_changes):
+            results[index] = BalanceChangeBatchItemResult(
+                index=index,
+                result=self._remember(
+                    self._idempotency_key(request_dto),
+                    BalanceChangeResponse.model_validate(balance_change),
+                ),
+            )
+
+        for index, first_index in repeats.items():
+            results[index] = BalanceChangeBatchItemResult(
+                index=index,
+                result=results[first_index].result,  # type: ignore
+            )
+
+        return results  # type: ignore
+
+    @staticmethod
+    def parse_request(
+        item: NewBalanceChangeRequest | dict[str, Any],
+    ) -> NewBalanceChangeRequest:
+        if isinstance(item, NewBalanceChangeRequest):
+            return item
+
+        try:
+            return NewBalanceChangeRequest.model_validate(item)
+        except ValidationError as e:
+            raise InvalidInputError(
+                "; ".join(
+                    f"{'.'.join(map(str, error['loc']))}: {error['msg']}"
+                    for error in e.errors(include_url=False)
+                )
+            )
+
+    @staticmethod
+    def validate_request(request_dto: NewBalanceChangeRequest) -> None:
         if request_dto.state in [
             BalanceChangeState.DEPOSIT,
             BalanceChangeState.WITHDRAW,
@@ -45,63 +616,172 @@ class BalanceChangeUseCase:
                 "You can't send balance change with DEPOSIT and WITHDRAW states"
             )
 
-        account = await self.account_repository.get_by_name(request_dto.account_name)
-        if not account:
-            logger.info("No account found. Creating...")
-            account = Account(
-                name=request_dto.account_name,
-                balance=request_dto.balance,
-                last_balance_update=datetime.now(),
-            )
+    def _is_heartbeat(
+        self, account: Account | AccountSnapshot, request_dto: NewBalanceChangeRequest
+    ) -> bool:
+        """
+        UPDATE with exactly the stored balance on an active account changes
+        nothing in the account, whether the balance is fixed or not.
+        Requests stored under a key (idempotency or journal replay key)
+        are always written, so their retries and replays stay exact.
+        """
+        return (
+            request_dto.state == BalanceChangeState.UPDATE
+            and request_dto.stored_key is None
+            and account.is_active
+            and account.balance == request_dto.balance
+        )
 
-            account = await self.account_repository.create(account)
+    def _heartbeat_response(
+        self, account_id: UUID, request_dto: NewBalanceChangeRequest
+    ) -> HeartbeatResponse:
+        self.last_seen.touch(account_id, heartbeat=True)  # type: ignore
 
-        diff = round(request_dto.balance - account.balance, 2)
-        state = request_dto.state
-        if account.is_balance_fixed:
-            state = self.__get_state_if_balance_is_fixed(
-                account, diff, request_dto.state
-            )
+        return HeartbeatResponse(
+            account_id=account_id,
+            state=request_dto.state,
+            balance=request_dto.balance,
+            last_seen_at=datetime.now(timezone.utc),
+        )
+
+    def _idempotency_key(
+        self, request_dto: NewBalanceChangeRequest
+    ) -> tuple[str, str] | None:
+        if request_dto.idempotency_key is None:
+            return None
+
+        return request_dto.account_name, request_dto.idempotency_key
+
+    def _stored_key(
+        self, request_dto: NewBalanceChangeRequest
+    ) -> tuple[str, str] | None:
+        if request_dto.stored_key is None:
+            return None
+
+        return request_dto.account_name, request_dto.stored_key
+
+    def _get_cached_response(
+        self, key: tuple[str, str] | None
+    ) -> BalanceChangeResponse | None:
+        if key is None or self.idempotency_cache is None:
+            return None
+
+        return self.idempotency_cache.get(key)
+
+    def _remember(
+        self, key: tuple[str, str] | None, response: BalanceChangeResponse
+    ) -> BalanceChangeResponse:
+        if key is not None and self.idempotency_cache is not None:
+            self._uncommitted_responses()[key] = response
+
+        return response
 
-        balance_change = BalanceChange(
+    def _uncommitted_responses(
+        self,
+    ) -> dict[tuple[str, str], BalanceChangeResponse]:
+        # В кеш ответ попадает только после коммита: после отката или отмены
+        # повтор должен записать изменение, а не вернуть несуществующее
+        session = self.balance_change_repository.session.sync_session
+        pending = session.info.get(_UNCOMMITTED_RESPONSES)
+        if pending is not None:
+            return pending
+
+        pending = session.info[_UNCOMMITTED_RESPONSES] = {}
+        cache = self.idempotency_cache
+
+        def after_commit(session: Session) -> None:
+            for key, response in pending.items():
+                cache.put(key, response)  # type: ignore
+
+        def after_transaction_end(session: Session, transaction) -> None:
+            # и коммит, и откат, и закрытие сессии; точки сохранения не в счет
+            if transaction.parent is None:
+                pending.clear()
+
+        event.listen(session, "after_commit", after_commit)
+        event.listen(session, "after_transaction_end", after_transaction_end)
+
+        return pending
+
+    def _new_account(self, request_dto: NewBalanceChangeRequest) -> Account:
+        return Account(
+            name=request_dto.account_name,
+            balance=request_dto.balance,
+            last_balance_update=datetime.now(),
+        )
+
+    def _apply_update(
+        self, account: Account, request_dto: NewBalanceChangeRequest
+    ) -> BalanceChange:
+        """
+        Applies the update to the account in place and returns the change to store.
+        """
+        state, diff = apply_balance_update(
+            account, request_dto.state, request_dto.balance
+        )
+
+        return BalanceChange(
             account_id=account.id,
             state_raw=request_dto.state.value,
             state=state,
             balance=request_dto.balance,
             balance_diff=diff,
+            idempotency_key=request_dto.stored_key,
         )
 
-        account.balance = request_dto.balance
-        account.is_active = request_dto.state != BalanceChangeState.SHUTDOWN
-        # Если статус в списке - фиксируем баланс до следующего обновления
-        if request_dto.state in [BalanceChangeState.LOCK, BalanceChangeState.SHUTDOWN]:
-            account.is_balance_fixed = True
 
-        balance_change = await self.balance_change_repository.create(balance_change)
-        await self.account_repository.update(account)
+def round_diff(value: float) -> float:
+    """
+    Rounds to cents the way the single statement path does in Postgres:
+    float8 -> numeric keeps 15 significant digits, numeric round() goes
+    half away from zero. Plain round() is half to even on the binary value.
+    """
+    cents = Decimal(f"{value:.15g}").quantize(Decimal("0.01"), ROUND_HALF_UP)
+
+    return float(cents)
 
-        return BalanceChangeResponse.model_validate(balance_change)
 
-    def __get_state_if_balance_is_fixed(
-        self, account: Account, diff: float, state_raw: str
-    ) -> BalanceChangeState:
-        if diff == 0:
-            if not account.is_active:
-                # Лок баланса произошел по причине остановки бота - снимаем фикс
-                account.is_balance_fixed = False
+def apply_balance_update(
+    account: Account, state_raw: BalanceChangeState, balance: float
+) -> tuple[BalanceChangeState, float]:
+    """
+    Balance update rules. Changes the account in place,
+    returns the state and diff of the change to store.
+    """
+    diff = round_diff(balance - account.balance)
+    state = state_raw
+    if account.is_balance_fixed:
+        state = _get_state_if_balance_is_fixed(account, diff, state_raw)
 
-            # Фикс должен остаться, если аккаунт был активный
+    account.balance = balance
+    account.is_active = state_raw != BalanceChangeState.SHUTDOWN
+    # Если статус в списке - фиксируем баланс до следующего обновления
+    if state_raw in [BalanceChangeState.LOCK, BalanceChangeState.SHUTDOWN]:
+        account.is_balance_fixed = True
 
-            # Если баланс не изменился - не произошло ни пополнения, ни снятия
-            return state_raw  # type: ignore
+    return state, diff
 
-        if state_raw == BalanceChangeState.UPDATE:
-            # снимаем фикс с баланса если это регулярное обновление
+
+def _get_state_if_balance_is_fixed(
+    account: Account, diff: float, state_raw: BalanceChangeState
+) -> BalanceChangeState:
+    if diff == 0:
+        if not account.is_active:
+            # Лок баланса произошел по причине остановки бота - снимаем фикс
             account.is_balance_fixed = False
 
-        if diff < 0:
-            # Если баланс уменьшился - снятие
-            return BalanceChangeState.WITHDRAW
+        # Фикс должен остаться, если аккаунт был активный
+
+        # Если баланс не изменился - не произошло ни пополнения, ни снятия
+        return state_raw
+
+    if state_raw == BalanceChangeState.UPDATE:
+        # снимаем фикс с баланса если это регулярное обновление
+        account.is_balance_fixed = False
+
+    if diff < 0:
+        # Если баланс уменьшился - снятие
+        return BalanceChangeState.WITHDRAW
 
-        # Если баланс увеличился - поплнение
-        return BalanceChangeState.DEPOSIT
+    # Если баланс увеличился - поплнение
+    return BalanceChangeState.DEPOSIT
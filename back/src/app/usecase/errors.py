@@ -30,6 +30,15 @@ class ForbiddenError(Exception):
         self.message = message
 
 
+class TooManyRequestsError(Exception):
+    """Exception raised when the request can't be accepted right now. 429 error."""
+
+    def __init__(self, message: str, retry_after: float | None = None):
+        super().__init__(message)
+        self.message = message
+        self.retry_after = retry_after
+
+
 class InternalServerError(Exception):
     """Exception raised when an internal server error occurs. 500 error."""
 
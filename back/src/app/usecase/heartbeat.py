@@ -0,0 +1,83 @@
+import asyncio
+from datetime import datetime, timezone
+from uuid import UUID
+
+from infra.db.account import AccountRepository
+from infra.db.conn import Database
+from infra.utils.log import logger
+
+
+# Отметки last_seen_at копятся в памяти, одна строка UPDATE на аккаунт за сброс.
+# Не сброшенные теряются при падении процесса
+class LastSeenTracker:
+
+    def __init__(self, db: Database, flush_interval_ms: int = 5000):
+        self.db = db
+        self.flush_interval = flush_interval_ms / 1000
+        self._pending: dict[UUID, datetime] = {}
+        self._flusher: asyncio.Task | None = None
+        self._stopping = asyncio.Event()
+
+        self.heartbeats = 0
+        self.flushes = 0
+        self.flushed_rows = 0
+        self.failed_flushes = 0
+
+    def touch(self, account_id: UUID, heartbeat: bool = False) -> None:
+        self._pending[account_id] = datetime.now(timezone.utc)
+        if heartbeat:
+            self.heartbeats += 1
+
+    def start(self) -> None:
+        if self._flusher is None:
+            self._stopping.clear()
+            self._flusher = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        # не отменяем: отмена посреди записи потеряла бы взятые отметки
+        if self._flusher is not None:
+            self._stopping.set()
+            await self._flusher
+            self._flusher = None
+
+        await self.flush()
+
+    async def flush(self) -> None:
+        if not self._pending:
+            return
+
+        pending, self._pending = self._pending, {}
+        try:
+            async with self.db.session() as session:
+                await AccountRepository(session).update_last_seen(pending)
+        except BaseException as e:
+            # вернем в очередь, не затирая более свежие отметки (и при отмене)
+            self._pending = pending | self._pending
+            if not isinstance(e, Exception):
+                raise
+
+            logger.exception(
+                "Failed to write last_seen_at for %d accounts", len(pending)
+            )
+            self.failed_flushes += 1
+            return
+
+        self.flushes += 1
+        self.flushed_rows += len(pending)
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self._pending),
+            "heartbeats": self.heartbeats,
+            "flushes": self.flushes,
+            "flushed_rows": self.flushed_rows,
+            "failed_flushes": self.failed_flushes,
+        }
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._stopping.wait(), self.flush_interval)
+                return
+            except asyncio.TimeoutError:
+                await self.flush()
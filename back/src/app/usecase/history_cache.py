@@ -0,0 +1,76 @@
+from datetime import datetime
+from typing import NamedTuple
+from uuid import UUID
+
+from infra.utils.cache import SizedLRUCache
+
+HistoryKey = tuple[UUID, datetime | None, datetime | None]
+
+
+class HistoryEntry(NamedTuple):
+    version: str
+    body: bytes
+
+
+class HistoryCache:
+    """
+    Serialized history responses by (account_id, date_from, date_to),
+    bounded by count and by the total size of the bodies.
+
+    An entry is served only for the account version it was built at, so
+    writes from other processes can't make it stale. Writes of this process
+    drop the account entries right away, freeing their memory.
+    """
+
+    def __init__(self, capacity: int, max_bytes: int, max_entry_bytes: int):
+        self._cache: SizedLRUCache[HistoryKey, HistoryEntry] = SizedLRUCache(
+            capacity,
+            max_bytes,
+            sizeof=lambda entry: len(entry.body),
+            max_entry_bytes=max_entry_bytes,
+        )
+        # ключи записей аккаунта - для сброса без перебора всего кэша
+        self._keys: dict[UUID, set[HistoryKey]] = {}
+
+        # промах и при записи другой версии
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, key: HistoryKey, version: str) -> bytes | None:
+        entry = self._cache.get(key)
+        if entry is None or entry.version != version:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+
+        return entry.body
+
+    def put(self, key: HistoryKey, version: str, body: bytes) -> None:
+        self._cache.put(key, HistoryEntry(version, body))
+
+        # вытесненные ключи убираются при следующей записи аккаунта
+        keys = self._keys.setdefault(key[0], set())
+        keys.intersection_update([live for live in keys if live in self._cache])
+        if key in self._cache:
+            keys.add(key)
+
+    def invalidate(self, account_id: UUID) -> None:
+        for key in self._keys.pop(account_id, ()):
+            if self._cache.pop(key) is not None:
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        self._cache.clear()
+        self._keys.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+
+        return self._cache.stats() | {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "invalidations": self.invalidations,
+        }
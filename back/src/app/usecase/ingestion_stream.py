@@ -0,0 +1,138 @@
+from typing import AsyncIterable, AsyncIterator, Callable
+
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.dto.balance_change import (
+    BalanceChangeBatchItemResult,
+    NewBalanceChangeRequest,
+)
+from app.usecase.balance_change import BalanceChangeUseCase
+from app.usecase.errors import TooManyRequestsError
+from infra.db.conn import Database
+from infra.utils.log import logger
+
+
+class IngestionStream:
+    """
+    Long-lived ingestion channel: NDJSON frames in, one NDJSON ack per frame
+    out, in the same order. Ack `index` is the frame number from 0.
+
+    Frames that arrived together are written as one batch in their own
+    transaction, so an ack with a result means the change is committed.
+    The next chunk is read only after acks for the previous one are sent,
+    a client that doesn't read acks is slowed down by TCP.
+
+    `admit` is called with the account name of every valid frame, a frame
+    it raises TooManyRequestsError for is acked with the error, not written.
+    """
+
+    def __init__(
+        self,
+        db: Database,
+        usecase_factory: Callable[[AsyncSession], BalanceChangeUseCase],
+        max_batch: int = 500,
+        max_frame_bytes: int = 64 * 1024,
+    ):
+        self.db = db
+        self.usecase_factory = usecase_factory
+        self.max_batch = max_batch
+        self.max_frame_bytes = max_frame_bytes
+
+        self.frames = 0
+        self.batches = 0
+        self.failed_frames = 0
+
+    async def run(
+        self,
+        chunks: AsyncIterable[bytes],
+        admit: Callable[[str], None] | None = None,
+    ) -> AsyncIterator[bytes]:
+        seq = 0
+        buffer = b""
+
+        async for chunk in chunks:
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            frames = [line for line in lines if line.strip()]
+            for start in range(0, len(frames), self.max_batch):
+                batch = frames[start : start + self.max_batch]
+                async for ack in self._process(seq, batch, admit):
+                    yield ack
+                seq += len(batch)
+
+            if len(buffer) > self.max_frame_bytes:
+                # кадр без конца строки не влезает в буфер - дальше читать нельзя
+                yield self._ack(
+                    BalanceChangeBatchItemResult(index=seq, error="Frame is too large")
+                )
+                return
+
+        if buffer.strip():
+            async for ack in self._process(seq, [buffer], admit):
+                yield ack
+
+    def stats(self) -> dict:
+        return {
+            "frames": self.frames,
+            "batches": self.batches,
+            "failed_frames": self.failed_frames,
+        }
+
+    async def _process(
+        self,
+        seq: int,
+        frames: list[bytes],
+        admit: Callable[[str], None] | None,
+    ) -> AsyncIterator[bytes]:
+        results: list[BalanceChangeBatchItemResult | None] = [None] * len(frames)
+        requests: list[NewBalanceChangeRequest] = []
+        positions: list[int] = []
+        for i, frame in enumerate(frames):
+            try:
+                request = NewBalanceChangeRequest.model_validate_json(frame)
+                if admit is not None:
+                    admit(request.account_name)
+            except ValidationError:
+                results[i] = BalanceChangeBatchItemResult(
+                    index=seq + i, error="Invalid frame"
+                )
+                continue
+            except TooManyRequestsError as e:
+                results[i] = BalanceChangeBatchItemResult(
+                    index=seq + i, error=e.message
+                )
+                continue
+
+            requests.append(request)
+            positions.append(i)
+
+        if requests:
+            try:
+                async with self.db.session() as session:
+                    written = await self.usecase_factory(session).new_balance_updates(
+                        requests
+                    )
+            except Exception:
+                logger.exception("Failed to write %d streamed changes", len(requests))
+                written = [
+                    BalanceChangeBatchItemResult(index=i, error="Internal server error")
+                    for i in range(len(requests))
+                ]
+
+            for position, result in zip(positions, written):
+                result.index = seq + position
+                results[position] = result
+
+            self.batches += 1
+
+        for result in results:
+            self.frames += 1
+            if result.error is not None:  # type: ignore
+                self.failed_frames += 1
+
+            yield self._ack(result)  # type: ignore
+
+    @staticmethod
+    def _ack(result: BalanceChangeBatchItemResult) -> bytes:
+        return result.model_dump_json().encode() + b"\n"
@@ -0,0 +1,162 @@
+import asyncio
+import time
+from itertools import islice
+from typing import Callable
+from uuid import uuid4
+
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.dto.balance_change import JournalRecord, NewBalanceChangeRequest
+from app.usecase.balance_change import BalanceChangeUseCase
+from app.usecase.errors import TooManyRequestsError
+from infra.db.conn import Database
+from infra.utils.journal import Journal
+from infra.utils.log import logger
+
+
+# Обновления сначала пишутся в локальный журнал (fsync), в БД их переносит
+# фоновая задача в порядке записи. Принятое переживает падение процесса и БД
+class IngestionJournal:
+
+    def __init__(
+        self,
+        journal: Journal,
+        db: Database,
+        usecase_factory: Callable[[AsyncSession], BalanceChangeUseCase],
+        batch_size: int = 500,
+        retry_interval_ms: int = 1000,
+        max_retry_interval_ms: int = 30_000,
+        max_backlog_bytes: int = 1024 * 1024 * 1024,
+    ):
+        self.journal = journal
+        self.db = db
+        self.usecase_factory = usecase_factory
+        self.batch_size = batch_size
+        self.retry_interval = retry_interval_ms / 1000
+        self.max_retry_interval = max_retry_interval_ms / 1000
+        self.max_backlog_bytes = max_backlog_bytes
+
+        self._position = journal.checkpoint
+        self._appended = asyncio.Event()
+        self._replayer: asyncio.Task | None = None
+        self._closed = False
+
+        self.accepted = 0
+        self.rejected = 0
+        self.replayed = 0
+        self.failed_items = 0
+        self.failed_batches = 0
+        self.last_replay_ms = 0.0
+
+    async def put(self, request_dto: NewBalanceChangeRequest) -> None:
+        BalanceChangeUseCase.validate_request(request_dto)
+
+        if self._closed:
+            raise TooManyRequestsError("Ingestion journal is shutting down")
+
+        if self.journal.backlog_bytes() >= self.max_backlog_bytes:
+            self.rejected += 1
+            raise TooManyRequestsError(
+                "Ingestion journal is full", retry_after=self.retry_interval
+            )
+
+        # без ключа бота - свой ключ повтора: пачка, записанная до падения,
+        # но не отмеченная в журнале, при повторе не запишется второй раз
+        record = JournalRecord(
+            **request_dto.model_dump(),
+            replay_key=(
+                f"journal:{uuid4().hex}"
+                if request_dto.idempotency_key is None
+                else None
+            ),
+        )
+        await self.journal.append(record.model_dump_json().encode())
+        self.accepted += 1
+        self._appended.set()
+
+    def start(self) -> None:
+        if self._replayer is None:
+            self._position = self.journal.checkpoint
+            self._replayer = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        # что не успели перенести в БД - перенесем после следующего запуска
+        self._closed = True
+        if self._replayer is not None:
+            self._appended.set()
+            await self._replayer
+            self._replayer = None
+
+        await self.journal.close()
+
+    def stats(self) -> dict:
+        return {
+            **self.journal.stats(),
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "replayed": self.replayed,
+            "failed_items": self.failed_items,
+            "failed_batches": self.failed_batches,
+            "last_replay_ms": round(self.last_replay_ms, 3),
+        }
+
+    async def _run(self) -> None:
+        retry_interval = self.retry_interval
+
+        while True:
+            self._appended.clear()
+            batch = list(islice(self.journal.read(self._position), self.batch_size))
+            if not batch:
+                if self._closed:
+                    return
+                await self._appended.wait()
+                continue
+
+            if await self._replay(batch):
+                retry_interval = self.retry_interval
+                continue
+
+            # на ошибке БД та же пачка, дальше не идем: порядок не нарушается
+            if self._closed:
+                return
+            await asyncio.sleep(retry_interval)
+            retry_interval = min(retry_interval * 2, self.max_retry_interval)
+
+    async def _replay(self, batch: list) -> bool:
+        updates: list[NewBalanceChangeRequest] = []
+        for _, record in batch:
+            try:
+                updates.append(JournalRecord.model_validate_json(record))
+            except ValidationError:
+                logger.exception("Skipping malformed journal record")
+                self.failed_items += 1
+
+        started = time.perf_counter()
+        try:
+            async with self.db.session() as session:
+                results = await self.usecase_factory(session).new_balance_updates(
+                    updates
+                )
+        except Exception:
+            logger.exception("Failed to replay %d journaled updates", len(updates))
+            self.failed_batches += 1
+            return False
+        finally:
+            self.last_replay_ms = (time.perf_counter() - started) * 1000
+
+        for result in results:
+            if result.error is not None:
+                logger.warning(
+                    "Journaled balance change for %s rejected: %s",
+                    updates[result.index].account_name,
+                    result.error,
+                )
+                self.failed_items += 1
+            else:
+                self.replayed += 1
+
+        self._position = batch[-1][0]
+        self.journal.commit(self._position)
+
+        return True
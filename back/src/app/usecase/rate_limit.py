@@ -0,0 +1,101 @@
+import hashlib
+from collections import Counter
+from typing import Iterable, NoReturn
+
+from app.usecase.errors import TooManyRequestsError
+from infra.utils.config import RateLimitConfig
+from infra.utils.rate_limit import TokenBuckets
+
+
+# Лимит приема от ботов: ведро на api key и на (api key, аккаунт).
+# Без БД, поэтому стоит до открытия сессии, один на процесс
+class IngestionRateLimiter:
+
+    def __init__(self, cfg: RateLimitConfig) -> None:
+        self.key_buckets: TokenBuckets[str] | None = None
+        if cfg.key_rate > 0:
+            self.key_buckets = TokenBuckets(
+                cfg.key_rate, max(cfg.key_burst, 1), cfg.max_keys
+            )
+
+        self.account_buckets: TokenBuckets[tuple[str, str]] | None = None
+        if cfg.account_rate > 0:
+            self.account_buckets = TokenBuckets(
+                cfg.account_rate, max(cfg.account_burst, 1), cfg.max_keys
+            )
+
+        self.verify_buckets: TokenBuckets[str] | None = None
+        if cfg.verify_rate > 0:
+            self.verify_buckets = TokenBuckets(
+                cfg.verify_rate, max(cfg.verify_burst, 1), cfg.max_keys
+            )
+
+        self.admitted = 0
+        self.rejected: Counter[str] = Counter()
+        self.rejected_verifications = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.key_buckets is not None or self.account_buckets is not None
+
+    def admit(self, api_key: str, account_names: Iterable[str]) -> None:
+        # по токену за обновление в оба ведра, при отказе не списываем ничего
+        if not self.enabled:
+            return
+
+        costs = Counter(account_names)
+        if self.key_buckets is not None:
+            wait = self.key_buckets.acquire(api_key, costs.total())
+            if wait:
+                self._reject(api_key, wait)
+
+        if self.account_buckets is not None:
+            charged: list[tuple[tuple[str, str], int]] = []
+            for account_name, cost in costs.items():
+                key = (api_key, account_name)
+                wait = self.account_buckets.acquire(key, cost)
+                if not wait:
+                    charged.append((key, cost))
+                    continue
+
+                # отказ целиком: возвращаем уже списанные токены
+                if self.key_buckets is not None:
+                    self.key_buckets.release(api_key, costs.total())
+                for key, cost in charged:
+                    self.account_buckets.release(key, cost)
+                self._reject(api_key, wait)
+
+        self.admitted += 1
+
+    def admit_verification(self, client: str) -> None:
+        # токен списывается до PBKDF2, удачная проверка его возвращает
+        if self.verify_buckets is None:
+            return
+
+        wait = self.verify_buckets.acquire(client)
+        if wait:
+            self.rejected_verifications += 1
+            raise TooManyRequestsError("Too many failed api key checks", wait)
+
+    def verified(self, client: str) -> None:
+        if self.verify_buckets is not None:
+            self.verify_buckets.release(client)
+
+    def stats(self) -> dict:
+        return {
+            "admitted": self.admitted,
+            "rejected": sum(self.rejected.values()),
+            # ключи только отпечатком, сами ключи - секреты
+            "rejected_by_key": dict(self.rejected),
+            "rejected_verifications": self.rejected_verifications,
+            "buckets": (len(self.key_buckets) if self.key_buckets else 0)
+            + (len(self.account_buckets) if self.account_buckets else 0),
+        }
+
+    def _reject(self, api_key: str, wait: float) -> NoReturn:
+        self.rejected[self._fingerprint(api_key)] += 1
+        raise TooManyRequestsError("Rate limit exceeded", retry_after=wait)
+
+    @staticmethod
+    def _fingerprint(api_key: str) -> str:
+        return hashlib.sha256(api_key.encode()).hexdigest()[:12]
@@ -0,0 +1,49 @@
+import hashlib
+import time
+from uuid import UUID
+
+from jose import jwt
+
+from app.dto.auth import TokenUser
+from app.usecase.errors import UnauthorizedError
+from infra.utils.cache import LRUCache
+from infra.utils.config import AuthConfig
+
+
+class TokenUseCase:
+    """
+    Validates access tokens. Needs only the config, no database.
+    Decoded tokens are kept by sha256 digest until their `exp`.
+    """
+
+    def __init__(
+        self,
+        cfg: AuthConfig,
+        token_cache: LRUCache[bytes, TokenUser] | None = None,
+    ) -> None:
+        self._cfg = cfg
+        self.token_cache = token_cache
+
+    def get_user_from_token(self, token: str) -> TokenUser:
+        digest = hashlib.sha256(token.encode()).digest()
+        if self.token_cache is not None:
+            user = self.token_cache.get(digest)
+            if user is not None:
+                return user
+
+        try:
+            payload = jwt.decode(
+                token, self._cfg.secret, algorithms=[self._cfg.algorithm]
+            )
+            user_id = UUID(payload.get("sub"))
+        except Exception:
+            raise UnauthorizedError("Invalid token")
+
+        user = TokenUser(id=user_id)
+
+        # кэшируем только до истечения токена
+        expires_in = payload.get("exp", 0) - time.time()
+        if self.token_cache is not None and expires_in > 0:
+            self.token_cache.put(digest, user, ttl=expires_in)
+
+        return user
@@ -0,0 +1,219 @@
+import asyncio
+import time
+from typing import Callable
+
+from sqlalchemy.exc import (
+    DBAPIError,
+    DisconnectionError,
+    InterfaceError,
+    OperationalError,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.dto.balance_change import NewBalanceChangeRequest
+from app.usecase.balance_change import BalanceChangeUseCase
+from app.usecase.errors import TooManyRequestsError
+from infra.db.conn import Database
+from infra.utils.log import logger
+
+
+# Очередь в памяти, фоновая задача пишет пачками: одна транзакция на пачку.
+# Принятое, но не записанное, теряется при падении процесса
+class WriteBehindQueue:
+
+    def __init__(
+        self,
+        db: Database,
+        usecase_factory: Callable[[AsyncSession], BalanceChangeUseCase],
+        queue_size: int = 10_000,
+        batch_size: int = 500,
+        flush_interval_ms: int = 50,
+        put_timeout_ms: int = 0,
+        retry_interval_ms: int = 1000,
+        max_retry_interval_ms: int = 30_000,
+        max_attempts: int = 3,
+    ):
+        self.db = db
+        self.usecase_factory = usecase_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self.put_timeout = put_timeout_ms / 1000
+        self.retry_interval = retry_interval_ms / 1000
+        self.max_retry_interval = max_retry_interval_ms / 1000
+        self.max_attempts = max_attempts
+
+        self._queue: asyncio.Queue[NewBalanceChangeRequest | None] = asyncio.Queue(
+            queue_size
+        )
+        self._writer: asyncio.Task | None = None
+        self._retry_interval = self.retry_interval
+        self._closed = False
+
+        self.accepted = 0
+        self.rejected = 0
+        self.flushes = 0
+        self.flushed_items = 0
+        self.failed_items = 0
+        self.failed_batches = 0
+        self.dropped_items = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self._total_flush_ms = 0.0
+
+    async def put(self, request_dto: NewBalanceChangeRequest) -> None:
+        BalanceChangeUseCase.validate_request(request_dto)
+
+        if self._closed:
+            raise TooManyRequestsError("Ingestion queue is shutting down")
+
+        try:
+            if self.put_timeout > 0:
+                await asyncio.wait_for(
+                    self._queue.put(request_dto), timeout=self.put_timeout
+                )
+            else:
+                self._queue.put_nowait(request_dto)
+        except (asyncio.QueueFull, asyncio.TimeoutError):
+            self.rejected += 1
+            raise TooManyRequestsError(
+                "Ingestion queue is full", retry_after=self.flush_interval
+            )
+
+        self.accepted += 1
+
+    def start(self) -> None:
+        if self._writer is None:
+            self._writer = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        # новые не принимаем, ждем записи уже принятых
+        self._closed = True
+        if self._writer is None:
+            return
+
+        await self._queue.put(None)
+        await self._writer
+        self._writer = None
+
+    def stats(self) -> dict:
+        return {
+            "depth": self._queue.qsize(),
+            "capacity": self._queue.maxsize,
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "flushes": self.flushes,
+            "flushed_items": self.flushed_items,
+            "failed_items": self.failed_items,
+            "failed_batches": self.failed_batches,
+            "dropped_items": self.dropped_items,
+            "last_flush_ms": round(self.last_flush_ms, 3),
+            "avg_flush_ms": (
+                round(self._total_flush_ms / self.flushes, 3) if self.flushes else 0.0
+            ),
+            "max_flush_ms": round(self.max_flush_ms, 3),
+        }
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+
+        while not stopping:
+            item = await self._queue.get()
+            if item is None:
+                break
+
+            batch = [item]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+
+                if item is None:
+                    stopping = True
+                    break
+
+                batch.append(item)
+
+            await self._write(batch)
+
+    async def _write(self, batch: list[NewBalanceChangeRequest]) -> None:
+        attempts = 0
+        while (error := await self._flush(batch)) is not None:
+            if not is_transient(error):
+                # пачку делим пополам, пока не найдем плохое обновление:
+                # остальные проходят, порядок половин сохраняется
+                if len(batch) > 1:
+                    middle = len(batch) // 2
+                    await self._write(batch[:middle])
+                    await self._write(batch[middle:])
+                    return
+
+                attempts += 1
+                if attempts >= self.max_attempts:
+                    logger.error("Dropping balance change %r", batch[0])
+                    self.dropped_items += 1
+                    return
+
+                await asyncio.sleep(self.retry_interval)
+                continue
+
+            # БД недоступна - повторяем ту же пачку, пока следующие ждут в очереди:
+            # порядок обновлений аккаунта не нарушается, а полная очередь дает 429.
+            # При остановке ждем не дольше одного полного круга backoff,
+            # следующие пачки после него сбрасываются сразу
+            if self._closed and self._retry_interval >= self.max_retry_interval:
+                logger.error("Dropping %d balance changes on stop", len(batch))
+                self.dropped_items += len(batch)
+                return
+
+            await asyncio.sleep(self._retry_interval)
+            self._retry_interval = min(
+                self._retry_interval * 2, self.max_retry_interval
+            )
+
+        self._retry_interval = self.retry_interval
+
+    async def _flush(self, batch: list[NewBalanceChangeRequest]) -> Exception | None:
+        started = time.perf_counter()
+        try:
+            async with self.db.session() as session:
+                results = await self.usecase_factory(session).new_balance_updates(batch)
+        except Exception as e:
+            logger.exception("Failed to write %d balance changes", len(batch))
+            self.failed_batches += 1
+            return e
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self.flushes += 1
+            self.last_flush_ms = elapsed_ms
+            self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+            self._total_flush_ms += elapsed_ms
+
+        for result in results:
+            if result.error is not None:
+                logger.warning(
+                    "Balance change for %s rejected: %s",
+                    batch[result.index].account_name,
+                    result.error,
+                )
+                self.failed_items += 1
+            else:
+                self.flushed_items += 1
+
+        return None
+
+
+def is_transient(error: Exception) -> bool:
+    # нет связи с БД - повторяем ту же пачку, остальное - ошибка данных или кода
+    if isinstance(error, DBAPIError):
+        return error.connection_invalidated or isinstance(
+            error, (OperationalError, InterfaceError)
+        )
+
+    return isinstance(error, (DisconnectionError, OSError, TimeoutError))
@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import DateTime, text
+from sqlalchemy import BigInteger, DateTime, text
 from sqlalchemy.orm import Mapped, mapped_column
 
 from domain.entity.base import BaseEntity
@@ -15,3 +15,11 @@ class Account(BaseEntity):
     )
     last_balance_update: Mapped[datetime] = mapped_column(DateTime(timezone=True))
     is_active: Mapped[bool] = mapped_column(default=True, server_default=text("true"))
+    # Последний запрос от бота, в том числе без изменения баланса (heartbeat)
+    last_seen_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), default=None
+    )
+    # Счетчик изменений: +1 на каждое записанное изменение баланса (ETag)
+    version: Mapped[int] = mapped_column(
+        BigInteger, default=0, server_default=text("0")
+    )
@@ -1,7 +1,9 @@
 from enum import Enum
 from uuid import UUID
-from sqlalchemy import String
+from sqlalchemy import DDL, BigInteger, Identity, Index, String, UniqueConstraint, event
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.schema import CreateColumn
 
 from domain.entity.base import BaseEntity
 
@@ -16,9 +18,50 @@ class BalanceChangeState(str, Enum):
 
 class BalanceChange(BaseEntity):
     __tablename__ = "balance_changes"
+    __table_args__ = (
+        UniqueConstraint("account_id", "idempotency_key"),
+        # История аккаунта за период в порядке записи
+        Index(
+            "ix_balance_changes_account_id_created_at_seq",
+            "account_id",
+            "created_at",
+            "seq",
+        ),
+        # Периоды по всем аккаунтам: таблица только дописывается,
+        # created_at растет вместе с физическим порядком строк
+        Index("ix_balance_changes_created_at", "created_at", postgresql_using="brin"),
+    )
 
+    # Порядок записи: у изменений одной транзакции created_at один (now()).
+    # Изменения аккаунта пишутся под FOR UPDATE его строки, поэтому номера
+    # последовательности растут в порядке записи на любом воркере
+    seq: Mapped[int] = mapped_column(BigInteger, Identity(), sort_order=-9997)
     account_id: Mapped[UUID]
     state_raw: Mapped[BalanceChangeState] = mapped_column(String)
     state: Mapped[BalanceChangeState] = mapped_column(String)
     balance: Mapped[float]
     balance_diff: Mapped[float]
+    # Ключ повторов от бота - повтор не создает вторую запись
+    idempotency_key: Mapped[str | None] = mapped_column(default=None)
+
+
+@compiles(CreateColumn, "sqlite")
+def _sqlite_identity(element, compiler, **kw):
+    # SQLite (тесты) знает автонумерацию только у INTEGER PRIMARY KEY
+    column = element.element
+    if column.identity is None:
+        return compiler.visit_create_column(element, **kw)
+
+    return f"{column.name} {compiler.type_compiler.process(column.type)}"
+
+
+event.listen(
+    BalanceChange.__table__,
+    "after_create",
+    DDL(
+        "CREATE TRIGGER balance_changes_seq AFTER INSERT ON balance_changes "
+        "WHEN NEW.seq IS NULL BEGIN "
+        "UPDATE balance_changes SET seq = NEW.rowid WHERE rowid = NEW.rowid; "
+        "END"
+    ).execute_if(dialect="sqlite"),
+)
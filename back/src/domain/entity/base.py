@@ -19,7 +19,6 @@ class BaseEntity(AsyncAttrs, DeclarativeBase):
 
     id: Mapped[UUID] = mapped_column(
         primary_key=True,
-        index=True,
         default=uuid4,
         server_default=func.gen_random_uuid(),
         sort_order=-9999,
@@ -1,10 +1,20 @@
-from typing import Sequence
+from datetime import datetime
+from typing import Iterable, Sequence
 from uuid import UUID
 
-from sqlalchemy import select
+from sqlalchemy import Row, and_, bindparam, func, insert, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from domain.entity.account import Account
+from domain.entity.balance_change import BalanceChange
+from infra.db.balance_change import period_conditions, pnl_columns
+from infra.db.dialect import dialect_insert
+from infra.db.statements import (
+    changed_values,
+    column_values,
+    mark_written,
+    table_columns,
+)
 
 
 class AccountRepository:
@@ -16,28 +26,225 @@ class AccountRepository:
 
         return result.scalars().all()
 
+    async def get_all_rows(self, columns: Iterable[str]) -> Sequence[Row]:
+        """All accounts as plain rows of `columns`, ordered by name."""
+        stmt = select(*table_columns(Account, columns)).order_by(Account.name)
+
+        connection = await self.session.connection()
+        result = await connection.execute(stmt)
+
+        return result.all()
+
+    async def get_list_version(self) -> Row:
+        """
+        (count, version sum, latest last_seen_at) of all accounts: changes
+        whenever the account list does, in one aggregate over the table.
+        """
+        stmt = select(
+            func.count(Account.id),
+            func.coalesce(func.sum(Account.version), 0),
+            func.max(Account.last_seen_at),
+        )
+        result = await self.session.execute(stmt)
+
+        return result.one()
+
+    async def get_version(self, account_id: UUID) -> int | None:
+        stmt = select(Account.version).where(Account.id == account_id)
+
+        return (await self.session.execute(stmt)).scalar_one_or_none()
+
+    async def get_summaries(
+        self, date_from: datetime | None, date_to: datetime | None
+    ) -> Sequence[Row]:
+        """
+        Every account with the period totals in one grouped query:
+        (Account, pnl, deposits, withdrawals, updates) rows, ordered by name.
+        """
+        stmt = (
+            select(Account, *pnl_columns())
+            .outerjoin(
+                BalanceChange,
+                and_(
+                    BalanceChange.account_id == Account.id,
+                    *period_conditions(date_from, date_to),
+                ),
+            )
+            .group_by(Account.id)
+            .order_by(Account.name)
+        )
+        result = await self.session.execute(stmt)
+
+        return result.all()
+
     async def get_by_id(self, account_id: UUID) -> Account | None:
         stmt = select(Account).where(Account.id == account_id).limit(1)
         result = await self.session.execute(stmt)
 
         return result.scalars().first()
 
-    async def get_by_name(self, account_name: str) -> Account | None:
+    async def get_by_name(
+        self, account_name: str, for_update: bool = False
+    ) -> Account | None:
         stmt = select(Account).where(Account.name == account_name).limit(1)
+        if for_update:
+            # строка могла быть прочитана раньше без блокировки - перечитываем
+            stmt = stmt.with_for_update().execution_options(populate_existing=True)
+
         result = await self.session.execute(stmt)
 
         return result.scalars().first()
 
+    async def get_by_names(
+        self, account_names: Sequence[str], for_update: bool = False
+    ) -> Sequence[Account]:
+        if not account_names:
+            return []
+
+        stmt = select(Account).where(Account.name.in_(account_names))
+        if for_update:
+            # Единый порядок блокировки строк - без дедлоков между батчами
+            stmt = (
+                stmt.order_by(Account.name)
+                .with_for_update()
+                .execution_options(populate_existing=True)
+            )
+
+        result = await self.session.execute(stmt)
+
+        return result.scalars().all()
+
     async def create(self, account: Account) -> Account:
-        self.session.add(account)
-        await self.session.flush()
-        await self.session.refresh(account)
+        # INSERT ... RETURNING: серверные значения приходят тем же запросом
+        stmt = insert(Account).values(**column_values(account)).returning(Account)
 
-        return account
+        return (await self.session.scalars(stmt)).one()
 
     async def update(self, account: Account) -> Account:
-        await self.session.merge(account)
-        await self.session.flush()
-        await self.session.refresh(account)
+        """
+        Writes changed columns with one UPDATE by primary key. The version
+        is bumped even if nothing else changed: a change was recorded.
+        """
+        values = changed_values(account)
+
+        stmt = (
+            update(Account)
+            .where(Account.id == account.id)
+            .values(**values, version=Account.version + 1)
+        )
+        with self.session.no_autoflush:
+            await self.session.execute(
+                stmt, execution_options={"synchronize_session": False}
+            )
+        mark_written(account, values)
 
         return account
+
+    async def update_if_unchanged(self, account: Account, expected: Account) -> bool:
+        """
+        Writes the account state only if the row still matches `expected`.
+        Returns False when the row was changed elsewhere in the meantime.
+        """
+        stmt = (
+            update(Account)
+            .where(
+                Account.id == expected.id,
+                Account.balance == expected.balance,
+                Account.is_balance_fixed == expected.is_balance_fixed,
+                Account.is_active == expected.is_active,
+            )
+            .values(
+                balance=account.balance,
+                is_balance_fixed=account.is_balance_fixed,
+                is_active=account.is_active,
+                version=Account.version + 1,
+            )
+        )
+        result = await self.session.execute(stmt)
+
+        return result.rowcount == 1  # type: ignore
+
+    async def create_if_not_exists(self, account: Account) -> Account:
+        """
+        Creates the account unless a concurrent transaction already did.
+        Returns the stored row locked for update, in one statement:
+        the no-op DO UPDATE locks an existing row and makes RETURNING return it.
+        """
+        stmt = dialect_insert(self.session, Account).values(**column_values(account))
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Account.name], set_={"name": stmt.excluded.name}
+        ).returning(Account)
+        result = await self.session.scalars(
+            stmt, execution_options={"populate_existing": True}
+        )
+
+        return result.one()
+
+    async def create_many_if_not_exists(self, accounts: Sequence[Account]) -> None:
+        if not accounts:
+            return
+
+        stmt = dialect_insert(self.session, Account).on_conflict_do_nothing(
+            index_elements=[Account.name]
+        )
+        await self.session.execute(
+            stmt,
+            [
+                {
+                    "name": account.name,
+                    "balance": account.balance,
+                    "last_balance_update": account.last_balance_update,
+                }
+                for account in accounts
+            ],
+        )
+
+    async def update_last_seen(self, last_seen: dict[UUID, datetime]) -> None:
+        """One executemany UPDATE by primary key, no rows are loaded."""
+        if not last_seen:
+            return
+
+        await self.session.execute(
+            update(Account),
+            [
+                {"id": account_id, "last_seen_at": seen_at}
+                for account_id, seen_at in last_seen.items()
+            ],
+        )
+
+    async def update_many(self, accounts: Sequence[Account]) -> Sequence[Account]:
+        """
+        Accounts in one executemany UPDATE by primary key: changed columns
+        and the version bump, which every given account gets.
+        """
+        if not accounts:
+            return accounts
+
+        # одинаковый набор колонок у всех строк - один executemany
+        keys = set().union(*(changed_values(account) for account in accounts))
+        rows = [
+            (account, {key: getattr(account, key) for key in keys})
+            for account in accounts
+        ]
+        table = Account.__table__
+        stmt = (
+            update(table)
+            .where(table.c.id == bindparam("account_id"))
+            .values(
+                {key: bindparam(f"new_{key}") for key in keys}
+                | {"version": table.c.version + 1}
+            )
+        )
+        with self.session.no_autoflush:
+            await self.session.execute(
+                stmt,
+                [
+                    {"account_id": account.id}
+                    | {f"new_{key}": value for key, value in values.items()}
+                    for account, values in rows
+                ],
+            )
+        for account, values in rows:
+            mark_written(account, values)
+
+        return accounts
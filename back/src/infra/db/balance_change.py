@@ -1,11 +1,93 @@
+from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import Sequence
-from uuid import UUID
+from typing import AsyncIterator, Iterable, Sequence
+from uuid import UUID, uuid4
 
-from sqlalchemy import select
+from sqlalchemy import Row, Select, case, func, insert, select, tuple_, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from domain.entity.balance_change import BalanceChange
+from domain.entity.account import Account
+from domain.entity.balance_change import BalanceChange, BalanceChangeState
+from infra.db.dialect import epoch_seconds
+from infra.db.statements import (
+    changed_values,
+    column_values,
+    mark_written,
+    table_columns,
+)
+
+COPY_COLUMNS = (
+    "id",
+    "created_at",
+    "account_id",
+    "state_raw",
+    "state",
+    "balance",
+    "balance_diff",
+    "idempotency_key",
+)
+
+# Пополнения и выводы - не результат игры, в PnL не входят
+PNL_EXCLUDED_STATES = (
+    BalanceChangeState.DEPOSIT.value,
+    BalanceChangeState.WITHDRAW.value,
+)
+
+
+def _sum_diff(condition):
+    return func.coalesce(
+        func.sum(case((condition, BalanceChange.balance_diff), else_=0)), 0
+    )
+
+
+def pnl_columns() -> tuple:
+    """Aggregates of a period: pnl, deposits, withdrawals, updates."""
+    return (
+        _sum_diff(BalanceChange.state.not_in(PNL_EXCLUDED_STATES)).label("pnl"),
+        _sum_diff(BalanceChange.state == BalanceChangeState.DEPOSIT.value).label(
+            "deposits"
+        ),
+        _sum_diff(BalanceChange.state == BalanceChangeState.WITHDRAW.value).label(
+            "withdrawals"
+        ),
+        func.count(BalanceChange.id).label("updates"),
+    )
+
+
+def period_conditions(date_from: datetime | None, date_to: datetime | None) -> list:
+    conditions = []
+    if date_from:
+        conditions.append(BalanceChange.created_at >= date_from)
+    if date_to:
+        conditions.append(BalanceChange.created_at < date_to)
+
+    return conditions
+
+
+def history_statement(
+    account_id: UUID,
+    date_from: datetime | None,
+    date_to: datetime | None,
+    after: tuple[datetime, int] | None = None,
+) -> Select:
+    stmt = (
+        select(BalanceChange)
+        .where(
+            BalanceChange.account_id == account_id,
+            *period_conditions(date_from, date_to),
+        )
+        .order_by(BalanceChange.created_at, BalanceChange.seq)
+    )
+    if after is not None:
+        created_at, seq = after
+        stmt = stmt.where(
+            # created_at отдельно - граница диапазона по индексу
+            BalanceChange.created_at >= created_at,
+            tuple_(BalanceChange.created_at, BalanceChange.seq)
+            > tuple_(created_at, seq),
+        )
+
+    return stmt
 
 
 class BalanceChangeRepository:
@@ -13,28 +95,256 @@ class BalanceChangeRepository:
         self.session = session
 
     async def get_by_account_id(
-        self, account_id: UUID, date_from: datetime | None, date_to: datetime | None
+        self,
+        account_id: UUID,
+        date_from: datetime | None,
+        date_to: datetime | None,
+        limit: int | None = None,
+        after: tuple[datetime, int] | None = None,
     ) -> Sequence[BalanceChange]:
-        stmt = select(BalanceChange).where(BalanceChange.account_id == account_id)
-        if date_from:
-            stmt = stmt.where(BalanceChange.created_at >= date_from)
-        if date_to:
-            stmt = stmt.where(BalanceChange.created_at < date_to)
+        """
+        History ordered by (created_at, seq), so changes with one created_at
+        keep their write order. `after` is the (created_at, seq) of the last
+        change of the previous page: the page starts right after it in
+        the index, so every page costs the same.
+        """
+        stmt = history_statement(account_id, date_from, date_to, after).limit(limit)
 
         result = await self.session.execute(stmt)
 
         return result.scalars().all()
 
+    async def get_rows_by_account_id(
+        self,
+        account_id: UUID,
+        date_from: datetime | None,
+        date_to: datetime | None,
+        columns: Iterable[str],
+    ) -> Sequence[Row]:
+        """
+        History as plain rows of `columns`, in (created_at, seq) order.
+        Core statement on the session connection: no ORM identities.
+        """
+        stmt = history_statement(account_id, date_from, date_to).with_only_columns(
+            *table_columns(BalanceChange, columns)
+        )
+
+        connection = await self.session.connection()
+        result = await connection.execute(stmt)
+
+        return result.all()
+
+    async def stream_rows_by_account_id(
+        self,
+        account_id: UUID,
+        date_from: datetime | None,
+        date_to: datetime | None,
+        columns: Iterable[str],
+        batch_size: int = 1000,
+    ) -> AsyncIterator[Sequence[Row]]:
+        """
+        Same rows read through a server-side cursor, `batch_size` rows
+        at a time: only one batch is held in memory.
+        """
+        stmt = (
+            history_statement(account_id, date_from, date_to)
+            .with_only_columns(*table_columns(BalanceChange, columns))
+            .execution_options(yield_per=batch_size)
+        )
+
+        connection = await self.session.connection()
+        result = await connection.stream(stmt)
+        async for batch in result.partitions():
+            yield batch
+
+    async def get_pnl(
+        self, account_id: UUID, date_from: datetime | None, date_to: datetime | None
+    ) -> Row:
+        """One aggregate row: pnl, deposits, withdrawals, updates."""
+        stmt = select(*pnl_columns()).where(
+            BalanceChange.account_id == account_id,
+            *period_conditions(date_from, date_to),
+        )
+        result = await self.session.execute(stmt)
+
+        return result.one()
+
+    async def get_period_bounds(
+        self, account_id: UUID
+    ) -> tuple[datetime | None, datetime | None]:
+        stmt = select(
+            func.min(BalanceChange.created_at), func.max(BalanceChange.created_at)
+        ).where(BalanceChange.account_id == account_id)
+        first, last = (await self.session.execute(stmt)).one()
+
+        return first, last
+
+    async def get_buckets(
+        self,
+        account_id: UUID,
+        date_from: datetime | None,
+        date_to: datetime | None,
+        width: int,
+    ) -> Sequence[Row]:
+        """
+        History aggregated into `width` second buckets aligned to the epoch:
+        (bucket, open, close, min, max, balance_diff, pnl, updates) rows,
+        `bucket` is the bucket start divided by `width`.
+        """
+        bucket = epoch_seconds(self.session, BalanceChange.created_at) // width
+        order = (BalanceChange.created_at, BalanceChange.seq)
+        rows = (
+            select(
+                bucket.label("bucket"),
+                BalanceChange.balance,
+                BalanceChange.balance_diff,
+                BalanceChange.state,
+                # первая и последняя запись корзины - open и close
+                func.row_number()
+                .over(partition_by=bucket, order_by=order)
+                .label("first"),
+                func.row_number()
+                .over(partition_by=bucket, order_by=[c.desc() for c in order])
+                .label("last"),
+            )
+            .where(
+                BalanceChange.account_id == account_id,
+                *period_conditions(date_from, date_to),
+            )
+            .subquery()
+        )
+
+        stmt = (
+            select(
+                rows.c.bucket,
+                func.max(case((rows.c.first == 1, rows.c.balance))).label("open"),
+                func.max(case((rows.c.last == 1, rows.c.balance))).label("close"),
+                func.min(rows.c.balance).label("min"),
+                func.max(rows.c.balance).label("max"),
+                func.sum(rows.c.balance_diff).label("balance_diff"),
+                func.sum(
+                    case(
+                        (
+                            rows.c.state.not_in(PNL_EXCLUDED_STATES),
+                            rows.c.balance_diff,
+                        ),
+                        else_=0,
+                    )
+                ).label("pnl"),
+                func.count().label("updates"),
+            )
+            .group_by(rows.c.bucket)
+            .order_by(rows.c.bucket)
+        )
+        result = await self.session.execute(stmt)
+
+        return result.all()
+
+    async def get_by_idempotency_key(
+        self, account_name: str, idempotency_key: str
+    ) -> BalanceChange | None:
+        found = await self.get_by_idempotency_keys([(account_name, idempotency_key)])
+
+        return found[0][1] if found else None
+
+    async def get_by_idempotency_keys(
+        self, keys: Sequence[tuple[str, str]]
+    ) -> Sequence[tuple[str, BalanceChange]]:
+        """
+        Looks up stored changes by (account name, idempotency key) pairs.
+        Returns (account name, change) pairs.
+        """
+        if not keys:
+            return []
+
+        stmt = (
+            select(Account.name, BalanceChange)
+            .join(Account, Account.id == BalanceChange.account_id)
+            .where(tuple_(Account.name, BalanceChange.idempotency_key).in_(keys))
+        )
+        result = await self.session.execute(stmt)
+
+        return [(name, change) for name, change in result.all()]
+
+    @asynccontextmanager
+    async def savepoint(self) -> AsyncIterator[None]:
+        """
+        Writes inside are undone alone if they raise, the transaction goes on.
+        """
+        async with self.session.begin_nested():
+            yield
+
     async def create(self, balance_change: BalanceChange) -> BalanceChange:
-        self.session.add(balance_change)
-        await self.session.flush()
-        await self.session.refresh(balance_change)
+        stmt = (
+            insert(BalanceChange)
+            .values(**column_values(balance_change))
+            .returning(BalanceChange)
+        )
+        with self.session.no_autoflush:
+            result = await self.session.scalars(stmt)
 
-        return balance_change
+        return result.one()
+
+    async def create_many(
+        self, balance_changes: Sequence[BalanceChange]
+    ) -> Sequence[BalanceChange]:
+        """
+        Returns the stored changes in the order of `balance_changes`.
+        created_at is the server now(), one for the whole transaction:
+        changes of one account keep their order by seq.
+        """
+        if not balance_changes:
+            return []
+
+        rows = [column_values(balance_change) for balance_change in balance_changes]
+        # id задаем сами: порядок RETURNING восстанавливается по нему,
+        # и INSERT остается одним запросом на любой БД
+        for row in rows:
+            row.setdefault("id", uuid4())
+
+        with self.session.no_autoflush:
+            result = await self.session.scalars(
+                insert(BalanceChange).returning(BalanceChange), rows
+            )
+        created = {balance_change.id: balance_change for balance_change in result}
+
+        return [created[row["id"]] for row in rows]
+
+    async def copy_rows(self, rows: Sequence[tuple]) -> None:
+        """
+        Bulk load for backfills, rows follow COPY_COLUMNS and skip the ORM.
+        Postgres gets COPY through asyncpg, other databases an executemany INSERT.
+        """
+        if not rows:
+            return
+
+        connection = await self.session.connection()
+        if connection.dialect.name == "postgresql":
+            raw_connection = await connection.get_raw_connection()
+            await raw_connection.driver_connection.copy_records_to_table(
+                BalanceChange.__tablename__, records=rows, columns=COPY_COLUMNS
+            )
+            return
+
+        await self.session.execute(
+            insert(BalanceChange.__table__),
+            [dict(zip(COPY_COLUMNS, row)) for row in rows],
+        )
 
     async def update(self, balance_change: BalanceChange) -> BalanceChange:
-        await self.session.merge(balance_change)
-        await self.session.flush()
-        await self.session.refresh(balance_change)
+        values = changed_values(balance_change)
+        if not values:
+            return balance_change
+
+        stmt = (
+            update(BalanceChange)
+            .where(BalanceChange.id == balance_change.id)
+            .values(**values)
+        )
+        with self.session.no_autoflush:
+            await self.session.execute(
+                stmt, execution_options={"synchronize_session": False}
+            )
+        mark_written(balance_change, values)
 
         return balance_change
@@ -14,6 +14,7 @@ from infra.utils.log import logger
 
 class Database:
     def __init__(self, engine: AsyncEngine):
+        self.engine = engine
         self.session_factory = async_sessionmaker(
             bind=engine, class_=AsyncSession, expire_on_commit=False
         )
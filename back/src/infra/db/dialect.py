@@ -0,0 +1,23 @@
+from sqlalchemy import BigInteger, cast, func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def dialect_insert(session: AsyncSession, entity):
+    """
+    Returns dialect specific INSERT with `on_conflict_*` support.
+    Postgres in production, SQLite in tests.
+    """
+    if session.get_bind().dialect.name == "postgresql":
+        return postgresql.insert(entity)
+
+    return sqlite.insert(entity)
+
+
+def epoch_seconds(session: AsyncSession, column):
+    """Whole seconds since the Unix epoch of a timestamp column, truncated."""
+    if session.get_bind().dialect.name == "postgresql":
+        # CAST округляет дробные секунды, а :59.6 - еще прошлая минута
+        return cast(func.floor(func.extract("epoch", column)), BigInteger)
+
+    return cast(func.strftime("%s", column), BigInteger)
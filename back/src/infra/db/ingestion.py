@@ -0,0 +1,278 @@
+from uuid import uuid4
+
+from sqlalchemy import (
+    ColumnElement,
+    Float,
+    Numeric,
+    String,
+    Uuid,
+    and_,
+    case,
+    cast,
+    false,
+    func,
+    insert,
+    literal,
+    not_,
+    select,
+    true,
+    update,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from domain.entity.account import Account
+from domain.entity.balance_change import BalanceChange, BalanceChangeState
+
+accounts = Account.__table__
+balance_changes = BalanceChange.__table__
+
+
+class IngestionRepository:
+    """
+    Ingestion write path that computes the balance change rules in SQL.
+
+    On Postgres the balance change insert and the account update are one
+    statement (data-modifying CTEs), so an update costs a single round trip.
+    SQLite has no DML in CTEs - there the same expressions run as
+    INSERT ... SELECT and UPDATE, which is enough for tests.
+
+    The rules mirror `BalanceChangeUseCase._apply_update`.
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def apply_update(
+        self,
+        account_name: str,
+        state_raw: BalanceChangeState,
+        balance: float,
+        idempotency_key: str | None = None,
+    ) -> tuple[BalanceChange, Account] | None:
+        """
+        Stores the update and returns the created change with the new account
+        state. Returns None if there is no such account.
+        """
+        if self.session.get_bind().dialect.name == "postgresql":
+            return await self._apply_update_cte(
+                account_name, state_raw, balance, idempotency_key
+            )
+
+        return await self._apply_update_fallback(
+            account_name, state_raw, balance, idempotency_key
+        )
+
+    async def _apply_update_cte(
+        self,
+        account_name: str,
+        state_raw: BalanceChangeState,
+        balance: float,
+        idempotency_key: str | None,
+    ) -> tuple[BalanceChange, Account] | None:
+        prev = (
+            select(
+                accounts.c.id,
+                accounts.c.is_balance_fixed,
+                accounts.c.is_active,
+                _diff(balance, accounts.c.balance).label("diff"),
+            )
+            .where(accounts.c.name == account_name)
+            .with_for_update()
+            .cte("prev")
+        )
+        upd = (
+            update(accounts)
+            .where(accounts.c.id == prev.c.id)
+            .values(
+                _account_values(
+                    balance,
+                    state_raw,
+                    prev.c.is_balance_fixed,
+                    prev.c.is_active,
+                    prev.c.diff,
+                )
+            )
+            .returning(*_account_columns())
+            .cte("upd")
+        )
+        ins = (
+            _insert_change(
+                select(
+                    *_change_values(
+                        balance,
+                        state_raw,
+                        prev.c.id,
+                        prev.c.is_balance_fixed,
+                        prev.c.diff,
+                        idempotency_key,
+                    )
+                )
+            )
+            .returning(*balance_changes.c)
+            .cte("ins")
+        )
+        stmt = select(
+            ins, *[column for column in upd.c if column.name != "account_id"]
+        ).select_from(ins.join(upd, upd.c.account_id == ins.c.account_id))
+
+        row = (await self.session.execute(stmt)).mappings().first()
+        if row is None:
+            return None
+
+        return _change_from_row(row), _account_from_row(row)
+
+    async def _apply_update_fallback(
+        self,
+        account_name: str,
+        state_raw: BalanceChangeState,
+        balance: float,
+        idempotency_key: str | None,
+    ) -> tuple[BalanceChange, Account] | None:
+        diff = _diff(balance, accounts.c.balance)
+
+        ins = _insert_change(
+            select(
+                *_change_values(
+                    balance,
+                    state_raw,
+                    accounts.c.id,
+                    accounts.c.is_balance_fixed,
+                    diff,
+                    idempotency_key,
+                )
+            ).where(accounts.c.name == account_name)
+        ).returning(*balance_changes.c)
+        change_row = (await self.session.execute(ins)).mappings().first()
+        if change_row is None:
+            return None
+
+        # В SET выражения видят значения строки до обновления
+        upd = (
+            update(accounts)
+            .where(accounts.c.name == account_name)
+            .values(
+                _account_values(
+                    balance,
+                    state_raw,
+                    accounts.c.is_balance_fixed,
+                    accounts.c.is_active,
+                    diff,
+                )
+            )
+            .returning(*_account_columns())
+        )
+        account_row = (await self.session.execute(upd)).mappings().one()
+
+        return _change_from_row(change_row), _account_from_row(account_row)
+
+
+def _diff(balance: float, old_balance: ColumnElement) -> ColumnElement:
+    # round через numeric - в Postgres нет round(double precision, int).
+    # Половина от нуля, как round_diff в use case
+    return cast(
+        func.round(cast(literal(balance, Float) - old_balance, Numeric), 2), Float
+    )
+
+
+def _change_values(
+    balance: float,
+    state_raw: BalanceChangeState,
+    account_id: ColumnElement,
+    is_balance_fixed: ColumnElement,
+    diff: ColumnElement,
+    idempotency_key: str | None,
+) -> list[ColumnElement]:
+    # При фиксированном балансе ненулевая разница - пополнение или снятие
+    state = case(
+        (and_(is_balance_fixed, diff < 0), BalanceChangeState.WITHDRAW.value),
+        (and_(is_balance_fixed, diff > 0), BalanceChangeState.DEPOSIT.value),
+        else_=literal(state_raw.value, String),
+    )
+
+    return [
+        literal(uuid4(), Uuid),
+        account_id,
+        literal(state_raw.value, String),
+        state,
+        literal(balance, Float),
+        diff,
+        literal(idempotency_key, String),
+    ]
+
+
+def _insert_change(select_stmt):
+    return insert(balance_changes).from_select(
+        [
+            balance_changes.c.id,
+            balance_changes.c.account_id,
+            balance_changes.c.state_raw,
+            balance_changes.c.state,
+            balance_changes.c.balance,
+            balance_changes.c.balance_diff,
+            balance_changes.c.idempotency_key,
+        ],
+        select_stmt,
+    )
+
+
+def _account_values(
+    balance: float,
+    state_raw: BalanceChangeState,
+    is_balance_fixed: ColumnElement,
+    is_active: ColumnElement,
+    diff: ColumnElement,
+) -> dict:
+    if state_raw in [BalanceChangeState.LOCK, BalanceChangeState.SHUTDOWN]:
+        new_is_balance_fixed = true()
+    else:
+        whens = [
+            # Лок баланса произошел по причине остановки бота - снимаем фикс
+            (and_(is_balance_fixed, diff == 0, not_(is_active)), false()),
+        ]
+        if state_raw == BalanceChangeState.UPDATE:
+            # снимаем фикс с баланса если это регулярное обновление
+            whens.append((and_(is_balance_fixed, diff != 0), false()))
+
+        new_is_balance_fixed = case(*whens, else_=is_balance_fixed)
+
+    return {
+        "balance": literal(balance, Float),
+        "is_balance_fixed": new_is_balance_fixed,
+        "is_active": state_raw != BalanceChangeState.SHUTDOWN,
+        "version": accounts.c.version + 1,
+    }
+
+
+def _account_columns() -> list[ColumnElement]:
+    return [
+        accounts.c.id.label("account_id"),
+        accounts.c.name.label("account_name"),
+        accounts.c.balance.label("account_balance"),
+        accounts.c.is_balance_fixed.label("account_is_balance_fixed"),
+        accounts.c.is_active.label("account_is_active"),
+        accounts.c.last_balance_update.label("account_last_balance_update"),
+    ]
+
+
+def _change_from_row(row) -> BalanceChange:
+    return BalanceChange(
+        id=row["id"],
+        created_at=row["created_at"],
+        account_id=row["account_id"],
+        state_raw=row["state_raw"],
+        state=row["state"],
+        balance=row["balance"],
+        balance_diff=row["balance_diff"],
+        idempotency_key=row["idempotency_key"],
+    )
+
+
+def _account_from_row(row) -> Account:
+    return Account(
+        id=row["account_id"],
+        name=row["account_name"],
+        balance=row["account_balance"],
+        is_balance_fixed=row["account_is_balance_fixed"],
+        is_active=row["account_is_active"],
+        last_balance_update=row["account_last_balance_update"],
+    )
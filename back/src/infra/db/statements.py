@@ -0,0 +1,58 @@
+from typing import Iterable
+
+from sqlalchemy import Column, inspect
+from sqlalchemy.orm.attributes import set_committed_value
+
+from domain.entity.base import BaseEntity
+
+
+def column_values(entity: BaseEntity) -> dict:
+    """
+    Column values set on the entity. Unset columns are left out,
+    so their Python or server defaults apply on INSERT.
+    """
+    state = inspect(entity)
+
+    return {
+        key: state.dict[key]
+        for key in state.mapper.column_attrs.keys()
+        if key in state.dict
+    }
+
+
+def changed_values(entity: BaseEntity) -> dict:
+    """
+    Values to UPDATE: changed columns of a loaded entity, every set column
+    except the primary key of a transient or detached one.
+    """
+    state = inspect(entity)
+    if state.persistent:
+        return {key: state.dict[key] for key in state.committed_state}
+
+    values = column_values(entity)
+    for column in state.mapper.primary_key:
+        values.pop(column.key, None)
+
+    return values
+
+
+def mark_written(entity: BaseEntity, values: dict) -> None:
+    """
+    Marks values written by an explicit statement as the committed state,
+    so the unit of work doesn't UPDATE them again on the next flush.
+    """
+    if not inspect(entity).persistent:
+        return
+
+    for key, value in values.items():
+        set_committed_value(entity, key, value)
+
+
+def table_columns(entity: type[BaseEntity], names: Iterable[str]) -> list[Column]:
+    """
+    Table columns by name, in the given order: for Core selects of plain
+    rows without ORM identities.
+    """
+    table = entity.__table__
+
+    return [table.c[name] for name in names]
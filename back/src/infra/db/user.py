@@ -1,9 +1,11 @@
+from datetime import datetime
 from uuid import UUID
 
-from sqlalchemy import select
+from sqlalchemy import insert, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from domain.entity.user import User
+from infra.db.statements import changed_values, column_values, mark_written
 
 
 class UserRepository:
@@ -23,15 +25,24 @@ class UserRepository:
         return result.scalars().first()
 
     async def create(self, user: User) -> User:
-        self.session.add(user)
-        await self.session.flush()
-        await self.session.refresh(user)
+        stmt = insert(User).values(**column_values(user)).returning(User)
 
-        return user
+        return (await self.session.scalars(stmt)).one()
 
     async def update(self, user: User) -> User:
-        await self.session.merge(user)
-        await self.session.flush()
-        await self.session.refresh(user)
+        values = changed_values(user)
+        if not values:
+            return user
+
+        stmt = update(User).where(User.id == user.id).values(**values)
+        with self.session.no_autoflush:
+            await self.session.execute(
+                stmt, execution_options={"synchronize_session": False}
+            )
+        mark_written(user, values)
 
         return user
+
+    async def update_last_login(self, user_id: UUID, last_login: datetime) -> None:
+        stmt = update(User).where(User.id == user_id).values(last_login=last_login)
+        await self.session.execute(stmt)
@@ -1,18 +1,18 @@
 """account
 
 Revision ID: eca00f9a9181
-Revises: 
+Revises:
 Create Date: 2025-11-20 17:28:45.735175
 
 """
+
 from typing import Sequence, Union
 
 from alembic import op
 import sqlalchemy as sa
 
-
 # revision identifiers, used by Alembic.
-revision: str = 'eca00f9a9181'
+revision: str = "eca00f9a9181"
 down_revision: Union[str, Sequence[str], None] = None
 branch_labels: Union[str, Sequence[str], None] = None
 depends_on: Union[str, Sequence[str], None] = None
@@ -21,22 +21,33 @@ depends_on: Union[str, Sequence[str], None] = None
 def upgrade() -> None:
     """Upgrade schema."""
     # ### commands auto generated by Alembic - please adjust! ###
-    op.create_table('accounts',
-    sa.Column('id', sa.Uuid(), server_default=sa.text('(gen_random_uuid())'), nullable=False),
-    sa.Column('created_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
-    sa.Column('name', sa.String(), nullable=False),
-    sa.Column('current_balance', sa.Float(), nullable=False),
-    sa.Column('last_balance_update', sa.DateTime(), nullable=False),
-    sa.PrimaryKeyConstraint('id', name=op.f('pk_accounts')),
-    sa.UniqueConstraint('name', name=op.f('uq_accounts_name'))
+    op.create_table(
+        "accounts",
+        sa.Column(
+            "id",
+            sa.Uuid(),
+            server_default=sa.text("(gen_random_uuid())"),
+            nullable=False,
+        ),
+        sa.Column(
+            "created_at",
+            sa.DateTime(),
+            server_default=sa.text("(CURRENT_TIMESTAMP)"),
+            nullable=False,
+        ),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("current_balance", sa.Float(), nullable=False),
+        sa.Column("last_balance_update", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk_accounts")),
+        sa.UniqueConstraint("name", name=op.f("uq_accounts_name")),
     )
-    op.create_index(op.f('ix_accounts_id'), 'accounts', ['id'], unique=False)
+    op.create_index(op.f("ix_accounts_id"), "accounts", ["id"], unique=False)
     # ### end Alembic commands ###
 
 
 def downgrade() -> None:
     """Downgrade schema."""
     # ### commands auto generated by Alembic - please adjust! ###
-    op.drop_index(op.f('ix_accounts_id'), table_name='accounts')
-    op.drop_table('accounts')
+    op.drop_index(op.f("ix_accounts_id"), table_name="accounts")
+    op.drop_table("accounts")
     # ### end Alembic commands ###
@@ -5,6 +5,7 @@ Revises: 97612310611f
 Create Date: 2025-11-24 19:04:50.869827
 
 """
+
 from typing import Sequence, Union
 
 from alembic import op
@@ -12,8 +13,8 @@ import sqlalchemy as sa
 from sqlalchemy.dialects import postgresql
 
 # revision identifiers, used by Alembic.
-revision: str = 'fa97866f75da'
-down_revision: Union[str, Sequence[str], None] = '97612310611f'
+revision: str = "fa97866f75da"
+down_revision: Union[str, Sequence[str], None] = "97612310611f"
 branch_labels: Union[str, Sequence[str], None] = None
 depends_on: Union[str, Sequence[str], None] = None
 
@@ -21,56 +22,86 @@ depends_on: Union[str, Sequence[str], None] = None
 def upgrade() -> None:
     """Upgrade schema."""
     # ### commands auto generated by Alembic - please adjust! ###
-    op.alter_column('accounts', 'created_at',
-               existing_type=postgresql.TIMESTAMP(),
-               type_=sa.DateTime(timezone=True),
-               existing_nullable=False,
-               existing_server_default=sa.text('CURRENT_TIMESTAMP'))
-    op.alter_column('accounts', 'last_balance_update',
-               existing_type=postgresql.TIMESTAMP(),
-               type_=sa.DateTime(timezone=True),
-               existing_nullable=False)
-    op.alter_column('balance_changes', 'created_at',
-               existing_type=postgresql.TIMESTAMP(),
-               type_=sa.DateTime(timezone=True),
-               existing_nullable=False,
-               existing_server_default=sa.text('CURRENT_TIMESTAMP'))
-    op.alter_column('users', 'created_at',
-               existing_type=postgresql.TIMESTAMP(),
-               type_=sa.DateTime(timezone=True),
-               existing_nullable=False,
-               existing_server_default=sa.text('CURRENT_TIMESTAMP'))
-    op.alter_column('users', 'last_login',
-               existing_type=postgresql.TIMESTAMP(),
-               type_=sa.DateTime(timezone=True),
-               existing_nullable=False)
+    op.alter_column(
+        "accounts",
+        "created_at",
+        existing_type=postgresql.TIMESTAMP(),
+        type_=sa.DateTime(timezone=True),
+        existing_nullable=False,
+        existing_server_default=sa.text("CURRENT_TIMESTAMP"),
+    )
+    op.alter_column(
+        "accounts",
+        "last_balance_update",
+        existing_type=postgresql.TIMESTAMP(),
+        type_=sa.DateTime(timezone=True),
+        existing_nullable=False,
+    )
+    op.alter_column(
+        "balance_changes",
+        "created_at",
+        existing_type=postgresql.TIMESTAMP(),
+        type_=sa.DateTime(timezone=True),
+        existing_nullable=False,
+        existing_server_default=sa.text("CURRENT_TIMESTAMP"),
+    )
+    op.alter_column(
+        "users",
+        "created_at",
+        existing_type=postgresql.TIMESTAMP(),
+        type_=sa.DateTime(timezone=True),
+        existing_nullable=False,
+        existing_server_default=sa.text("CURRENT_TIMESTAMP"),
+    )
+    op.alter_column(
+        "users",
+        "last_login",
+        existing_type=postgresql.TIMESTAMP(),
+        type_=sa.DateTime(timezone=True),
+        existing_nullable=False,
+    )
     # ### end Alembic commands ###
 
 
 def downgrade() -> None:
     """Downgrade schema."""
     # ### commands auto generated by Alembic - please adjust! ###
-    op.alter_column('users', 'last_login',
-               existing_type=sa.DateTime(timezone=True),
-               type_=postgresql.TIMESTAMP(),
-               existing_nullable=False)
-    op.alter_column('users', 'created_at',
-               existing_type=sa.DateTime(timezone=True),
-               type_=postgresql.TIMESTAMP(),
-               existing_nullable=False,
-               existing_server_default=sa.text('CURRENT_TIMESTAMP'))
-    op.alter_column('balance_changes', 'created_at',
-               existing_type=sa.DateTime(timezone=True),
-               type_=postgresql.TIMESTAMP(),
-               existing_nullable=False,
-               existing_server_default=sa.text('CURRENT_TIMESTAMP'))
-    op.alter_column('accounts', 'last_balance_update',
-               existing_type=sa.DateTime(timezone=True),
-               type_=postgresql.TIMESTAMP(),
-               existing_nullable=False)
-    op.alter_column('accounts', 'created_at',
-               existing_type=sa.DateTime(timezone=True),
-               type_=postgresql.TIMESTAMP(),
-               existing_nullable=False,
-               existing_server_default=sa.text('CURRENT_TIMESTAMP'))
+    op.alter_column(
+        "users",
+        "last_login",
+        existing_type=sa.DateTime(timezone=True),
+        type_=postgresql.TIMESTAMP(),
+        existing_nullable=False,
+    )
+    op.alter_column(
+        "users",
+        "created_at",
+        existing_type=sa.DateTime(timezone=True),
+        type_=postgresql.TIMESTAMP(),
+        existing_nullable=False,
+        existing_server_default=sa.text("CURRENT_TIMESTAMP"),
+    )
+    op.alter_column(
+        "balance_changes",
+        "created_at",
+        existing_type=sa.DateTime(timezone=True),
+        type_=postgresql.TIMESTAMP(),
+        existing_nullable=False,
+        existing_server_default=sa.text("CURRENT_TIMESTAMP"),
+    )
+    op.alter_column(
+        "accounts",
+        "last_balance_update",
+        existing_type=sa.DateTime(timezone=True),
+        type_=postgresql.TIMESTAMP(),
+        existing_nullable=False,
+    )
+    op.alter_column(
+        "accounts",
+        "created_at",
+        existing_type=sa.DateTime(timezone=True),
+        type_=postgresql.TIMESTAMP(),
+        existing_nullable=False,
+        existing_server_default=sa.text("CURRENT_TIMESTAMP"),
+    )
     # ### end Alembic commands ###
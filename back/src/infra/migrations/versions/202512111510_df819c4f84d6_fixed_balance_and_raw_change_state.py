@@ -11,7 +11,6 @@ from typing import Sequence, Union
 from alembic import op
 import sqlalchemy as sa
 
-
 # revision identifiers, used by Alembic.
 revision: str = "df819c4f84d6"
 down_revision: Union[str, Sequence[str], None] = "fa97866f75da"
@@ -5,15 +5,15 @@ Revises: df819c4f84d6
 Create Date: 2025-12-11 17:27:02.440874
 
 """
+
 from typing import Sequence, Union
 
 from alembic import op
 import sqlalchemy as sa
 
-
 # revision identifiers, used by Alembic.
-revision: str = '1c066e3430fd'
-down_revision: Union[str, Sequence[str], None] = 'df819c4f84d6'
+revision: str = "1c066e3430fd"
+down_revision: Union[str, Sequence[str], None] = "df819c4f84d6"
 branch_labels: Union[str, Sequence[str], None] = None
 depends_on: Union[str, Sequence[str], None] = None
 
@@ -21,12 +21,17 @@ depends_on: Union[str, Sequence[str], None] = None
 def upgrade() -> None:
     """Upgrade schema."""
     # ### commands auto generated by Alembic - please adjust! ###
-    op.add_column('accounts', sa.Column('is_active', sa.Boolean(), server_default=sa.text('true'), nullable=False))
+    op.add_column(
+        "accounts",
+        sa.Column(
+            "is_active", sa.Boolean(), server_default=sa.text("true"), nullable=False
+        ),
+    )
     # ### end Alembic commands ###
 
 
 def downgrade() -> None:
     """Downgrade schema."""
     # ### commands auto generated by Alembic - please adjust! ###
-    op.drop_column('accounts', 'is_active')
+    op.drop_column("accounts", "is_active")
     # ### end Alembic commands ###
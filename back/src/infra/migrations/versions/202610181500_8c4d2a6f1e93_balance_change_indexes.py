@@ -0,0 +1,51 @@
+"""balance_change_indexes
+
+Revision ID: 8c4d2a6f1e93
+Revises: 5e1a9d7c2b64
+Create Date: 2026-10-18 15:00:27.530914
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "8c4d2a6f1e93"
+down_revision: Union[str, Sequence[str], None] = "5e1a9d7c2b64"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Первичный ключ уже индекс, ix_*_id только замедляли вставку
+    op.drop_index(op.f("ix_accounts_id"), table_name="accounts")
+    op.drop_index(op.f("ix_balance_changes_id"), table_name="balance_changes")
+    op.drop_index(op.f("ix_users_id"), table_name="users")
+    op.create_index(
+        "ix_balance_changes_account_id_created_at",
+        "balance_changes",
+        ["account_id", "created_at"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_balance_changes_created_at",
+        "balance_changes",
+        ["created_at"],
+        unique=False,
+        postgresql_using="brin",
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_balance_changes_created_at", table_name="balance_changes")
+    op.drop_index(
+        "ix_balance_changes_account_id_created_at", table_name="balance_changes"
+    )
+    op.create_index(op.f("ix_users_id"), "users", ["id"], unique=False)
+    op.create_index(
+        op.f("ix_balance_changes_id"), "balance_changes", ["id"], unique=False
+    )
+    op.create_index(op.f("ix_accounts_id"), "accounts", ["id"], unique=False)
@@ -0,0 +1,51 @@
+"""balance_change_seq
+
+Revision ID: d27b5e8a3c10
+Revises: a41f6c0d9e27
+Create Date: 2026-10-18 17:00:42.306815
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "d27b5e8a3c10"
+down_revision: Union[str, Sequence[str], None] = "a41f6c0d9e27"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Существующие строки нумеруются в физическом порядке, то есть примерно
+    # в порядке вставки
+    op.add_column(
+        "balance_changes",
+        sa.Column("seq", sa.BigInteger(), sa.Identity(), nullable=False),
+    )
+    op.create_index(
+        "ix_balance_changes_account_id_created_at_seq",
+        "balance_changes",
+        ["account_id", "created_at", "seq"],
+        unique=False,
+    )
+    op.drop_index(
+        "ix_balance_changes_account_id_created_at", table_name="balance_changes"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index(
+        "ix_balance_changes_account_id_created_at",
+        "balance_changes",
+        ["account_id", "created_at"],
+        unique=False,
+    )
+    op.drop_index(
+        "ix_balance_changes_account_id_created_at_seq", table_name="balance_changes"
+    )
+    op.drop_column("balance_changes", "seq")
@@ -0,0 +1,136 @@
+import time
+from collections import OrderedDict
+from typing import Callable, Generic, Hashable, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class LRUCache(Generic[K, V]):
+    """
+    Bounded in-process cache, evicts least recently used entries.
+    With `ttl` (seconds) entries also expire, `put` can override it per entry.
+    Not thread safe - meant to be used from the event loop only.
+    """
+
+    def __init__(self, capacity: int, ttl: float | None = None):
+        self.capacity = capacity
+        self.ttl = ttl
+        self._data: OrderedDict[K, tuple[float | None, V]] = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: K) -> V | None:
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self.hits += 1
+
+        return value
+
+    def put(self, key: K, value: V, ttl: float | None = None) -> None:
+        ttl = ttl if ttl is not None else self.ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+
+        while len(self._data) > self.capacity:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key: K) -> V | None:
+        entry = self._data.pop(key, None)
+
+        return entry[1] if entry is not None else None
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: K) -> bool:
+        return key in self._data
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+
+        return {
+            "size": len(self._data),
+            "capacity": self.capacity,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class SizedLRUCache(LRUCache[K, V]):
+    """
+    LRUCache also bounded by the total size of its values, as measured by
+    `sizeof`: least recently used entries are evicted until a new one fits.
+    Values larger than `max_entry_bytes` are not stored at all.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        max_bytes: int,
+        sizeof: Callable[[V], int],
+        max_entry_bytes: int | None = None,
+    ):
+        super().__init__(capacity)
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = min(max_entry_bytes or max_bytes, max_bytes)
+        self.sizeof = sizeof
+
+        self.bytes = 0
+        self.rejected = 0
+
+    def put(self, key: K, value: V, ttl: float | None = None) -> None:
+        self.pop(key)
+        size = self.sizeof(value)
+        if size > self.max_entry_bytes:
+            self.rejected += 1
+            return
+
+        self._data[key] = (None, value)
+        self.bytes += size
+
+        while len(self._data) > self.capacity or self.bytes > self.max_bytes:
+            _, (_, evicted) = self._data.popitem(last=False)
+            self.bytes -= self.sizeof(evicted)
+            self.evictions += 1
+
+    def pop(self, key: K) -> V | None:
+        value = super().pop(key)
+        if value is not None:
+            self.bytes -= self.sizeof(value)
+
+        return value
+
+    def clear(self) -> None:
+        super().clear()
+        self.bytes = 0
+
+    def stats(self) -> dict:
+        return super().stats() | {
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "rejected": self.rejected,
+        }
@@ -41,6 +41,90 @@ class AuthConfig(BaseModel):
     api_secret: str = (
         "XahagS9FOnMopwVQN0wI7M8e1vLH+EFRRXg3l3iDGjI12whe4ckO8rb/jB43XgGw"  # apisecret
     )
+    # Проверенные api секреты (HMAC дайджест), 0 - PBKDF2 на каждый запрос
+    api_secret_cache_size: int = 64
+    api_secret_cache_ttl_seconds: int = 300
+    # PBKDF2 вне цикла событий: не больше hash_workers вычислений одновременно
+    hash_workers: int = 2
+    hash_in_processes: bool = False
+    # Проверенные JWT живут в кэше до своего exp, 0 - decode на каждый запрос
+    token_cache_size: int = 1024
+
+
+class WriteBehindConfig(BaseModel):
+    # POST /balance_change/ отвечает 202, запись в БД - фоновыми пачками
+    enabled: bool = False
+    queue_size: int = 10_000
+    batch_size: int = 500
+    flush_interval_ms: int = 50
+    put_timeout_ms: int = 0  # 0 - сразу 429 при полной очереди
+    # Пачка при ошибке БД повторяется с растущей паузой до этого предела
+    retry_interval_ms: int = 1000
+    max_retry_interval_ms: int = 30_000
+    # Обновление, на котором пачка падает не из-за связи с БД, после стольких
+    # попыток пишется в лог и сбрасывается
+    max_attempts: int = 3
+
+
+class IngestionStreamConfig(BaseModel):
+    # POST /balance_change/stream: кадры, пришедшие вместе, пишутся одной пачкой
+    max_batch: int = 500
+    max_frame_bytes: int = 64 * 1024
+
+
+class HeartbeatConfig(BaseModel):
+    # UPDATE с тем же балансом на активном аккаунте не пишет изменение,
+    # только отметку last_seen_at, которая сбрасывается в БД раз в интервал
+    enabled: bool = False
+    flush_interval_ms: int = 5000
+
+
+class JournalConfig(BaseModel):
+    # POST /balance_change/ и /ingest отвечают 202 после fsync в локальный журнал,
+    # в БД обновления переносит фоновый воспроизводитель по порядку
+    enabled: bool = False
+    directory: str = "./data/journal"
+    segment_bytes: int = 64 * 1024 * 1024
+    fsync_interval_ms: int = 5
+    batch_size: int = 500
+    retry_interval_ms: int = 1000
+    max_retry_interval_ms: int = 30_000
+    max_backlog_bytes: int = 1024 * 1024 * 1024  # дальше - 429
+
+
+class RateLimitConfig(BaseModel):
+    # Токены в секунду на api ключ и на пару (api ключ, аккаунт), 0 - без лимита.
+    # Сверх лимита - 429 с Retry-After до открытия сессии БД
+    key_rate: float = 0
+    key_burst: float = 1000
+    account_rate: float = 0
+    account_burst: float = 20
+    # Проверки секрета (PBKDF2) на адрес клиента, удачные не расходуют токен
+    verify_rate: float = 1
+    verify_burst: float = 20
+    max_keys: int = 100_000
+
+
+class IngestionConfig(BaseModel):
+    account_cache_size: int = 10_000  # 0 - cache disabled
+    # Изменение и аккаунт пишутся одним запросом (CTE), правила считает БД
+    single_statement: bool = False
+    write_behind: WriteBehindConfig = WriteBehindConfig()
+    journal: JournalConfig = JournalConfig()
+    rate_limit: RateLimitConfig = RateLimitConfig()
+    stream: IngestionStreamConfig = IngestionStreamConfig()
+    heartbeat: HeartbeatConfig = HeartbeatConfig()
+    # Ответы на повторы по idempotency_key, 0 - только проверка в БД
+    idempotency_cache_size: int = 100_000
+    idempotency_ttl_seconds: int = 600
+
+
+class HistoryConfig(BaseModel):
+    # Кэш готовых ответов истории, 0 - выключен
+    cache_size: int = 10_000
+    cache_bytes: int = 64 * 1024 * 1024
+    # Ответы больше - не кэшируются, чтобы не вытеснять все остальное
+    cache_entry_bytes: int = 4 * 1024 * 1024
 
 
 class Config(BaseModel):
@@ -49,6 +133,8 @@ class Config(BaseModel):
     server: ServerConfig = ServerConfig()
     db: DatabaseConfig = DatabaseConfig()
     auth: AuthConfig = AuthConfig()
+    ingestion: IngestionConfig = IngestionConfig()
+    history: HistoryConfig = HistoryConfig()
 
 
 @lru_cache(maxsize=1)
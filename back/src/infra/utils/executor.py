@@ -0,0 +1,74 @@
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Callable, ParamSpec, TypeVar
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+
+class BoundedExecutor:
+    """
+    Runs blocking CPU work (password hashing) outside the event loop.
+    At most `max_workers` calls run at once, the rest wait without blocking
+    the loop. Process pools need picklable, module level callables.
+    """
+
+    def __init__(self, max_workers: int, use_processes: bool = False):
+        self.max_workers = max_workers
+        self.use_processes = use_processes
+        self._executor: Executor | None = None
+        self._semaphore: asyncio.Semaphore | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+        self.running = 0
+        self.waiting = 0
+        self.completed = 0
+
+    async def run(self, func: Callable[P, R], *args: P.args, **kwargs: P.kwargs) -> R:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # семафор привязан к циклу событий, при смене цикла (тесты) пересоздаем
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_workers)
+
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()  # type: ignore
+        finally:
+            self.waiting -= 1
+
+        self.running += 1
+        try:
+            return await loop.run_in_executor(
+                self._get_executor(), partial(func, *args, **kwargs)
+            )
+        finally:
+            self.running -= 1
+            self.completed += 1
+            self._semaphore.release()  # type: ignore
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> dict:
+        return {
+            "max_workers": self.max_workers,
+            "kind": "process" if self.use_processes else "thread",
+            "running": self.running,
+            "waiting": self.waiting,
+            "completed": self.completed,
+        }
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.use_processes:
+                self._executor = ProcessPoolExecutor(self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    self.max_workers, thread_name_prefix="hash"
+                )
+
+        return self._executor
@@ -0,0 +1,225 @@
+import asyncio
+import os
+import struct
+import zlib
+from typing import Iterator, NamedTuple
+
+# длина и crc32 записи, затем сама запись
+HEADER = struct.Struct("<II")
+SEGMENT_SUFFIX = ".log"
+CHECKPOINT_FILE = "checkpoint"
+
+
+class Position(NamedTuple):
+    segment: int
+    offset: int
+
+
+# Журнал записей на диске по сегментам, только из event loop (не потокобезопасен)
+class Journal:
+
+    def __init__(
+        self,
+        directory: str,
+        segment_bytes: int = 64 * 1024 * 1024,
+        fsync_interval_ms: int = 5,
+    ):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.fsync_interval = fsync_interval_ms / 1000
+
+        self._segment = 0
+        self._fd: int | None = None
+        self._size = 0
+        self._unsynced: list[int] = []
+        self._waiters: list[asyncio.Future] = []
+        self._syncer: asyncio.Task | None = None
+        self.checkpoint = Position(0, 0)
+        self._backlog = 0
+
+        self.appended = 0
+        self.fsyncs = 0
+
+    def open(self) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        self.checkpoint = self._read_checkpoint()
+
+        segments = self.segments()
+        self._segment = segments[-1] if segments else self.checkpoint.segment
+        self._size = self._recover(self._segment)
+        self._fd = os.open(
+            self._path(self._segment), os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644
+        )
+        self._backlog = self._scan_backlog()
+
+    async def close(self) -> None:
+        if self._syncer is not None:
+            await self._syncer
+        if self._fd is not None:
+            await asyncio.to_thread(self._sync, [self._fd], close=True)
+            self._fd = None
+
+    async def append(self, record: bytes) -> Position:
+        # возвращает конец записи после fsync, общего для записей за fsync_interval
+        if self._fd is None:
+            raise RuntimeError("Journal is not open")
+
+        frame = HEADER.pack(len(record), zlib.crc32(record)) + record
+        if self._size > 0 and self._size + len(frame) > self.segment_bytes:
+            self._rotate()
+
+        os.write(self._fd, frame)
+        self._size += len(frame)
+        self._backlog += len(frame)
+        self.appended += 1
+        position = Position(self._segment, self._size)
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        if self._syncer is None:
+            self._syncer = asyncio.create_task(self._sync_group())
+        await waiter
+
+        return position
+
+    def read(self, start: Position) -> Iterator[tuple[Position, bytes]]:
+        for segment in self.segments():
+            if segment < start.segment:
+                continue
+
+            offset = start.offset if segment == start.segment else 0
+            for end, record in self._read_segment(segment, offset):
+                yield Position(segment, end), record
+
+    def commit(self, position: Position) -> None:
+        # все до position обработано, сегменты до него удаляем
+        tmp_path = os.path.join(self.directory, CHECKPOINT_FILE + ".tmp")
+        with open(tmp_path, "w") as file:
+            file.write(f"{position.segment} {position.offset}")
+        # без fsync: после сбоя повторное чтение с более старой отметки безопасно,
+        # потребитель обязан быть идемпотентным
+        os.replace(tmp_path, os.path.join(self.directory, CHECKPOINT_FILE))
+        self.checkpoint = position
+
+        for segment in self.segments():
+            if segment >= position.segment:
+                break
+            os.remove(self._path(segment))
+        # пересчет по файлам - у потребителя, не на пути записи
+        self._backlog = self._scan_backlog()
+
+    def segments(self) -> list[int]:
+        return sorted(
+            int(name.removesuffix(SEGMENT_SUFFIX))
+            for name in os.listdir(self.directory)
+            if name.endswith(SEGMENT_SUFFIX)
+        )
+
+    def backlog_bytes(self) -> int:
+        return self._backlog
+
+    def stats(self) -> dict:
+        return {
+            "segments": len(self.segments()),
+            "backlog_bytes": self.backlog_bytes(),
+            "appended": self.appended,
+            "fsyncs": self.fsyncs,
+            "records_per_fsync": (
+                round(self.appended / self.fsyncs, 2) if self.fsyncs else 0.0
+            ),
+        }
+
+    def _scan_backlog(self) -> int:
+        total = 0
+        for segment in self.segments():
+            if segment < self.checkpoint.segment:
+                continue
+            size = self._size if segment == self._segment else self._file_size(segment)
+            if segment == self.checkpoint.segment:
+                size -= self.checkpoint.offset
+            total += size
+
+        return total
+
+    async def _sync_group(self) -> None:
+        await asyncio.sleep(self.fsync_interval)
+
+        # все, что записано до этого момента, попадает в один fsync
+        waiters, self._waiters = self._waiters, []
+        fds, self._unsynced = self._unsynced + [self._fd], []
+        self._syncer = None
+        try:
+            await asyncio.to_thread(self._sync, fds[:-1], close=True)
+            await asyncio.to_thread(self._sync, fds[-1:], close=False)
+        except OSError as e:
+            for waiter in waiters:
+                if not waiter.done():
+                    waiter.set_exception(e)
+            return
+
+        self.fsyncs += 1
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+
+    @staticmethod
+    def _sync(fds: list, close: bool) -> None:
+        for fd in fds:
+            os.fsync(fd)
+            if close:
+                os.close(fd)
+
+    def _rotate(self) -> None:
+        # старый файл закроется после ближайшего fsync
+        self._unsynced.append(self._fd)  # type: ignore
+        self._segment += 1
+        self._size = 0
+        self._fd = os.open(
+            self._path(self._segment), os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644
+        )
+
+    def _recover(self, segment: int) -> int:
+        # запись, оборванная падением посреди write, отрезается
+        path = self._path(segment)
+        if not os.path.exists(path):
+            return 0
+
+        end = 0
+        for end, _ in self._read_segment(segment, 0):
+            pass
+
+        if end < self._file_size(segment):
+            os.truncate(path, end)
+
+        return end
+
+    def _read_segment(self, segment: int, offset: int) -> Iterator[tuple[int, bytes]]:
+        with open(self._path(segment), "rb") as file:
+            file.seek(offset)
+            while True:
+                header = file.read(HEADER.size)
+                if len(header) < HEADER.size:
+                    return
+
+                length, crc = HEADER.unpack(header)
+                record = file.read(length)
+                if len(record) < length or zlib.crc32(record) != crc:
+                    return
+
+                offset += HEADER.size + length
+                yield offset, record
+
+    def _read_checkpoint(self) -> Position:
+        try:
+            with open(os.path.join(self.directory, CHECKPOINT_FILE)) as file:
+                segment, offset = file.read().split()
+        except FileNotFoundError:
+            return Position(0, 0)
+
+        return Position(int(segment), int(offset))
+
+    def _file_size(self, segment: int) -> int:
+        return os.path.getsize(self._path(segment))
+
+    def _path(self, segment: int) -> str:
+        return os.path.join(self.directory, f"{segment:016d}{SEGMENT_SUFFIX}")
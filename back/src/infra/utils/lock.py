@@ -0,0 +1,52 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Hashable, Iterable
+
+
+class ShardedLock:
+    """
+    Fixed set of asyncio locks, picked by key hash.
+
+    Keys that land on the same shard are serialized, all other keys run in
+    parallel. Memory does not grow with the number of keys.
+    """
+
+    def __init__(self, shards: int = 1024):
+        self._shards = shards
+        self._locks: list[asyncio.Lock] = []
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def __call__(self, key: Hashable) -> asyncio.Lock:
+        return self._get_locks()[self._shard(key)]
+
+    @asynccontextmanager
+    async def many(self, keys: Iterable[Hashable]) -> AsyncIterator[None]:
+        """
+        Acquires locks for all keys. Shards are taken in ascending order,
+        so two overlapping calls can't deadlock each other.
+        """
+        locks = self._get_locks()
+        shards = sorted({self._shard(key) for key in keys})
+
+        acquired: list[asyncio.Lock] = []
+        try:
+            for shard in shards:
+                await locks[shard].acquire()
+                acquired.append(locks[shard])
+
+            yield
+        finally:
+            for lock in reversed(acquired):
+                lock.release()
+
+    def _shard(self, key: Hashable) -> int:
+        return hash(key) % self._shards
+
+    def _get_locks(self) -> list[asyncio.Lock]:
+        # asyncio.Lock привязывается к циклу событий - пересоздаем при смене цикла
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._locks = [asyncio.Lock() for _ in range(self._shards)]
+            self._loop = loop
+
+        return self._locks
@@ -0,0 +1,47 @@
+import time
+from collections import OrderedDict
+from typing import Generic, Hashable, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+
+
+# Ведро токенов на ключ, только из event loop (не потокобезопасно).
+# Сверх max_keys вытесняется давно не использованный ключ - вернется полным
+class TokenBuckets(Generic[K]):
+
+    def __init__(self, rate: float, burst: float, max_keys: int = 100_000):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        # ключ -> [токены, время последнего пополнения]
+        self._buckets: OrderedDict[K, list[float]] = OrderedDict()
+
+    def acquire(self, key: K, cost: float = 1) -> float:
+        # 0 - списано, иначе секунды до нужного числа токенов.
+        # Больше burst не списываем, иначе запрос не пройдет никогда
+        cost = min(cost, self.burst)
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if len(self._buckets) >= self.max_keys:
+                self._buckets.popitem(last=False)
+            bucket = self._buckets[key] = [self.burst, now]
+        else:
+            # горячий ключ флудящего бота не должен вытесняться первым
+            self._buckets.move_to_end(key)
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+
+        if bucket[0] >= cost:
+            bucket[0] -= cost
+            return 0.0
+
+        return (cost - bucket[0]) / self.rate
+
+    def release(self, key: K, cost: float = 1) -> None:
+        bucket = self._buckets.get(key)
+        if bucket is not None:
+            bucket[0] = min(self.burst, bucket[0] + cost)
+
+    def __len__(self) -> int:
+        return len(self._buckets)
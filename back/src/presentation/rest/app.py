@@ -1,4 +1,5 @@
 import logging
+import math
 from contextlib import asynccontextmanager
 
 from asgi_correlation_id import CorrelationIdMiddleware
@@ -11,27 +12,81 @@ from app.usecase.errors import (
     InternalServerError,
     InvalidInputError,
     NotFoundError,
+    TooManyRequestsError,
     UnauthorizedError,
 )
+from infra.db.account import AccountRepository
 from infra.utils.config import load_config
+from presentation.rest.deps import (
+    get_account_cache,
+    get_database,
+    get_ingestion_journal,
+    get_last_seen_tracker,
+    get_password_hasher,
+    get_write_behind_queue,
+)
 from presentation.rest.middleware.timeout import TimeoutMiddleware
 from presentation.rest.router.auth import router as auth_router
 from presentation.rest.router.account import router as account_router
 from presentation.rest.router.balance_change import router as balance_change_router
+from presentation.rest.router.stats import router as stats_router
 
 cfg = load_config()
 
 logger = logging.getLogger(__name__)
 
 
+async def warm_account_cache() -> None:
+    account_cache = get_account_cache()
+    if account_cache is None:
+        return
+
+    try:
+        async with get_database().session() as session:
+            accounts = await AccountRepository(session).get_all()
+    except Exception:
+        # Кэш заполнится по ходу приема обновлений
+        logger.exception("Failed to warm account cache")
+        return
+
+    account_cache.warm(accounts)
+    logger.info("Account cache warmed with %d accounts", len(accounts))
+
+
 @asynccontextmanager
 async def lifespan(fapp: FastAPI):
     """
     Lifespan function to handle startup and shutdown events.
     """
+    await warm_account_cache()
+
+    write_behind = get_write_behind_queue()
+    if write_behind is not None:
+        write_behind.start()
+
+    last_seen = get_last_seen_tracker()
+    if last_seen is not None:
+        last_seen.start()
+
+    journal = get_ingestion_journal()
+    if journal is not None:
+        # Сначала доигрываются записи, оставшиеся с прошлого запуска
+        journal.start()
 
     yield  # Startup event
 
+    if write_behind is not None:
+        # Дописываем все принятые обновления перед остановкой
+        await write_behind.stop()
+
+    if journal is not None:
+        await journal.stop()
+
+    if last_seen is not None:
+        await last_seen.stop()
+
+    get_password_hasher().shutdown()
+
     # Останавливаем планировщик при завершении приложения
 
 
@@ -61,6 +116,7 @@ v1_router = APIRouter(prefix="/api/v1")
 v1_router.include_router(auth_router)
 v1_router.include_router(account_router)
 v1_router.include_router(balance_change_router)
+v1_router.include_router(stats_router)
 
 app.include_router(v1_router)
 
@@ -84,10 +140,13 @@ def readiness():
 # --- Exception handlers ---
 
 
-def error_response(status_code: int, message: str) -> JSONResponse:
+def error_response(
+    status_code: int, message: str, headers: dict[str, str] | None = None
+) -> JSONResponse:
     return JSONResponse(
         status_code=status_code,
         content={"error": {"message": message}},
+        headers=headers,
     )
 
 
@@ -142,3 +201,14 @@ def unauthorized_handler(request: Request, exc: UnauthorizedError) -> JSONRespon
 @app.exception_handler(ForbiddenError)
 def forbidden_handler(request: Request, exc: ForbiddenError) -> JSONResponse:
     return error_response(403, exc.message)
+
+
+@app.exception_handler(TooManyRequestsError)
+def too_many_requests_handler(
+    request: Request, exc: TooManyRequestsError
+) -> JSONResponse:
+    headers = None
+    if exc.retry_after is not None:
+        headers = {"Retry-After": str(max(1, math.ceil(exc.retry_after)))}
+
+    return error_response(429, exc.message, headers)
@@ -1,6 +1,7 @@
 # --- Configuration ---
 
 
+from functools import lru_cache
 from typing import Annotated, AsyncGenerator
 
 from fastapi import Depends, HTTPException
@@ -10,15 +11,29 @@ from starlette.requests import Request
 from starlette.status import HTTP_403_FORBIDDEN
 
 from app.dto.auth import TokenUser
+from app.dto.balance_change import BalanceChangeResponse
 from app.usecase.account import AccountUseCase
+from app.usecase.account_cache import AccountCache
+from app.usecase.api_secret import ApiSecretUseCase
 from app.usecase.auth import AuthUseCase
 from app.usecase.balance_change import BalanceChangeUseCase
-
-from infra.db.conn import DatabaseManager
+from app.usecase.heartbeat import LastSeenTracker
+from app.usecase.history_cache import HistoryCache
+from app.usecase.ingestion_stream import IngestionStream
+from app.usecase.journal import IngestionJournal
+from app.usecase.rate_limit import IngestionRateLimiter
+from app.usecase.token import TokenUseCase
+from app.usecase.write_behind import WriteBehindQueue
+
+from infra.db.conn import Database, DatabaseManager
 from infra.db.account import AccountRepository
 from infra.db.balance_change import BalanceChangeRepository
+from infra.db.ingestion import IngestionRepository
 from infra.db.user import UserRepository
+from infra.utils.cache import LRUCache
 from infra.utils.config import Config, load_config
+from infra.utils.executor import BoundedExecutor
+from infra.utils.journal import Journal
 
 
 # --- Configuration ---
@@ -29,19 +44,199 @@ ConfigDep = Annotated[Config, Depends(load_config)]
 # --- Database ---
 
 
-async def get_db(config: ConfigDep) -> AsyncGenerator[AsyncSession, None]:
+def get_database() -> Database:
     db = DatabaseManager.get_db_instance()
 
     if db is None:
-        db = DatabaseManager.init_db(config.db)
+        db = DatabaseManager.init_db(load_config().db)
+
+    return db
 
-    async with db.session() as session:
+
+async def get_db() -> AsyncGenerator[AsyncSession, None]:
+    async with get_database().session() as session:
         yield session
 
 
 DbSessionDep = Annotated[AsyncSession, Depends(get_db)]
 
 
+# --- Caches ---
+
+
+@lru_cache(maxsize=1)
+def get_account_cache() -> AccountCache | None:
+    size = load_config().ingestion.account_cache_size
+    if size <= 0:
+        return None
+
+    return AccountCache(size)
+
+
+AccountCacheDep = Annotated[AccountCache | None, Depends(get_account_cache)]
+
+
+@lru_cache(maxsize=1)
+def get_idempotency_cache() -> LRUCache[tuple[str, str], BalanceChangeResponse] | None:
+    cfg = load_config().ingestion
+    if cfg.idempotency_cache_size <= 0:
+        return None
+
+    return LRUCache(cfg.idempotency_cache_size, ttl=cfg.idempotency_ttl_seconds)
+
+
+IdempotencyCacheDep = Annotated[
+    LRUCache[tuple[str, str], BalanceChangeResponse] | None,
+    Depends(get_idempotency_cache),
+]
+
+
+@lru_cache(maxsize=1)
+def get_history_cache() -> HistoryCache | None:
+    cfg = load_config().history
+    if cfg.cache_size <= 0 or cfg.cache_bytes <= 0:
+        return None
+
+    return HistoryCache(cfg.cache_size, cfg.cache_bytes, cfg.cache_entry_bytes)
+
+
+HistoryCacheDep = Annotated[HistoryCache | None, Depends(get_history_cache)]
+
+
+@lru_cache(maxsize=1)
+def get_verified_secrets_cache() -> LRUCache[bytes, bool] | None:
+    cfg = load_config().auth
+    if cfg.api_secret_cache_size <= 0:
+        return None
+
+    return LRUCache(cfg.api_secret_cache_size, ttl=cfg.api_secret_cache_ttl_seconds)
+
+
+VerifiedSecretsCacheDep = Annotated[
+    LRUCache[bytes, bool] | None, Depends(get_verified_secrets_cache)
+]
+
+
+@lru_cache(maxsize=1)
+def get_token_cache() -> LRUCache[bytes, TokenUser] | None:
+    size = load_config().auth.token_cache_size
+    if size <= 0:
+        return None
+
+    return LRUCache(size)
+
+
+TokenCacheDep = Annotated[LRUCache[bytes, TokenUser] | None, Depends(get_token_cache)]
+
+
+@lru_cache(maxsize=1)
+def get_password_hasher() -> BoundedExecutor:
+    cfg = load_config().auth
+
+    return BoundedExecutor(cfg.hash_workers, use_processes=cfg.hash_in_processes)
+
+
+PasswordHasherDep = Annotated[BoundedExecutor, Depends(get_password_hasher)]
+
+
+# --- Background workers ---
+
+
+@lru_cache(maxsize=1)
+def get_last_seen_tracker() -> LastSeenTracker | None:
+    cfg = load_config().ingestion.heartbeat
+    if not cfg.enabled:
+        return None
+
+    return LastSeenTracker(get_database(), flush_interval_ms=cfg.flush_interval_ms)
+
+
+LastSeenTrackerDep = Annotated[LastSeenTracker | None, Depends(get_last_seen_tracker)]
+
+
+# для кода со своими сессиями: фоновые писатели, стримы, /ingest
+def balance_change_usecase_factory(session: AsyncSession) -> BalanceChangeUseCase:
+    return BalanceChangeUseCase(
+        AccountRepository(session),
+        BalanceChangeRepository(session),
+        account_cache=get_account_cache(),
+        ingestion_repository=(
+            IngestionRepository(session)
+            if load_config().ingestion.single_statement
+            else None
+        ),
+        idempotency_cache=get_idempotency_cache(),
+        last_seen=get_last_seen_tracker(),
+        history_cache=get_history_cache(),
+    )
+
+
+@lru_cache(maxsize=1)
+def get_write_behind_queue() -> WriteBehindQueue | None:
+    cfg = load_config().ingestion.write_behind
+    if not cfg.enabled:
+        return None
+
+    return WriteBehindQueue(
+        get_database(),
+        balance_change_usecase_factory,
+        queue_size=cfg.queue_size,
+        batch_size=cfg.batch_size,
+        flush_interval_ms=cfg.flush_interval_ms,
+        put_timeout_ms=cfg.put_timeout_ms,
+        retry_interval_ms=cfg.retry_interval_ms,
+        max_retry_interval_ms=cfg.max_retry_interval_ms,
+        max_attempts=cfg.max_attempts,
+    )
+
+
+WriteBehindQueueDep = Annotated[
+    WriteBehindQueue | None, Depends(get_write_behind_queue)
+]
+
+
+@lru_cache(maxsize=1)
+def get_ingestion_journal() -> IngestionJournal | None:
+    cfg = load_config().ingestion.journal
+    if not cfg.enabled:
+        return None
+
+    journal = Journal(
+        cfg.directory,
+        segment_bytes=cfg.segment_bytes,
+        fsync_interval_ms=cfg.fsync_interval_ms,
+    )
+    journal.open()
+
+    return IngestionJournal(
+        journal,
+        get_database(),
+        balance_change_usecase_factory,
+        batch_size=cfg.batch_size,
+        retry_interval_ms=cfg.retry_interval_ms,
+        max_retry_interval_ms=cfg.max_retry_interval_ms,
+        max_backlog_bytes=cfg.max_backlog_bytes,
+    )
+
+
+IngestionJournalDep = Annotated[IngestionJournal | None, Depends(get_ingestion_journal)]
+
+
+@lru_cache(maxsize=1)
+def get_ingestion_stream() -> IngestionStream:
+    cfg = load_config().ingestion.stream
+
+    return IngestionStream(
+        get_database(),
+        balance_change_usecase_factory,
+        max_batch=cfg.max_batch,
+        max_frame_bytes=cfg.max_frame_bytes,
+    )
+
+
+IngestionStreamDep = Annotated[IngestionStream, Depends(get_ingestion_stream)]
+
+
 def get_account_repository(db_session: DbSessionDep) -> AccountRepository:
     return AccountRepository(db_session)
 
@@ -58,6 +253,20 @@ BalanceChangeRepDep = Annotated[
 ]
 
 
+def get_ingestion_repository(
+    config: ConfigDep, db_session: DbSessionDep
+) -> IngestionRepository | None:
+    if not config.ingestion.single_statement:
+        return None
+
+    return IngestionRepository(db_session)
+
+
+IngestionRepDep = Annotated[
+    IngestionRepository | None, Depends(get_ingestion_repository)
+]
+
+
 def get_user_repository(db_session: DbSessionDep) -> UserRepository:
     return UserRepository(db_session)
 
@@ -74,17 +283,60 @@ def get_account_usecase(account_repo: AccountRepDep):
 AccountUseCaseDep = Annotated[AccountUseCase, Depends(get_account_usecase)]
 
 
-def get_auth_usecase(cfg: ConfigDep, user_repo: UserRepositoryDep):
-    return AuthUseCase(cfg.auth, user_repo)
+def get_auth_usecase(
+    cfg: ConfigDep,
+    user_repo: UserRepositoryDep,
+    hasher: PasswordHasherDep,
+):
+    return AuthUseCase(cfg.auth, user_repo, hasher)
 
 
 AuthUseCaseDep = Annotated[AuthUseCase, Depends(get_auth_usecase)]
 
 
+@lru_cache(maxsize=1)
+def get_api_secret_usecase() -> ApiSecretUseCase:
+    return ApiSecretUseCase(
+        load_config().auth, get_verified_secrets_cache(), get_password_hasher()
+    )
+
+
+ApiSecretUseCaseDep = Annotated[ApiSecretUseCase, Depends(get_api_secret_usecase)]
+
+
+@lru_cache(maxsize=1)
+def get_rate_limiter() -> IngestionRateLimiter:
+    return IngestionRateLimiter(load_config().ingestion.rate_limit)
+
+
+RateLimiterDep = Annotated[IngestionRateLimiter, Depends(get_rate_limiter)]
+
+
+def get_token_usecase(cfg: ConfigDep, token_cache: TokenCacheDep):
+    return TokenUseCase(cfg.auth, token_cache)
+
+
+TokenUseCaseDep = Annotated[TokenUseCase, Depends(get_token_usecase)]
+
+
 def get_balance_change_usecase(
-    account_repo: AccountRepDep, balance_change_repo: BalanceChangeRepDep
+    account_repo: AccountRepDep,
+    balance_change_repo: BalanceChangeRepDep,
+    account_cache: AccountCacheDep,
+    idempotency_cache: IdempotencyCacheDep,
+    ingestion_repo: IngestionRepDep,
+    last_seen: LastSeenTrackerDep,
+    history_cache: HistoryCacheDep,
 ):
-    return BalanceChangeUseCase(account_repo, balance_change_repo)
+    return BalanceChangeUseCase(
+        account_repo,
+        balance_change_repo,
+        account_cache=account_cache,
+        ingestion_repository=ingestion_repo,
+        idempotency_cache=idempotency_cache,
+        last_seen=last_seen,
+        history_cache=history_cache,
+    )
 
 
 BalanceChangeUseCaseDep = Annotated[
@@ -98,10 +350,10 @@ security = HTTPBearer()
 
 
 async def get_current_user(
-    auth_use_case: AuthUseCaseDep,
+    token_use_case: TokenUseCaseDep,
     credentials: Annotated[HTTPAuthorizationCredentials, Depends(security)],
 ) -> TokenUser:
-    return auth_use_case.get_user_from_token(credentials.credentials)
+    return token_use_case.get_user_from_token(credentials.credentials)
 
 
 CurrentUserDep = Annotated[TokenUser, Depends(get_current_user)]
@@ -125,11 +377,83 @@ async def get_request_api_key(
     raise HTTPException(status_code=HTTP_403_FORBIDDEN, detail="Not authenticated")
 
 
+async def check_api_secret(
+    rate_limiter: IngestionRateLimiter,
+    api_secret_use_case: ApiSecretUseCase,
+    request: Request,
+    api_key: str,
+) -> bool:
+    # неудачные проверки не кешируются: без лимита поток плохих ключей жжет CPU
+    client = request.client.host if request.client else ""
+    rate_limiter.admit_verification(client)
+    await api_secret_use_case.validate_api_secret(api_key)
+    rate_limiter.verified(client)
+
+    return True
+
+
 async def verify_api_call(
-    auth_use_case: AuthUseCaseDep,
+    rate_limiter: RateLimiterDep,
+    api_secret_use_case: ApiSecretUseCaseDep,
+    request: Request,
     api_key: Annotated[str, Depends(get_request_api_key)],
 ) -> bool:
-    return auth_use_case.validate_api_secret(api_key)
+    return await check_api_secret(rate_limiter, api_secret_use_case, request, api_key)
 
 
 VerifiedApiCallDep = Annotated[bool, Depends(verify_api_call)]
+
+
+def request_account_names(body) -> list[str]:
+    # имена аккаунтов из одиночного или пакетного тела, еще до валидации
+    if not isinstance(body, dict):
+        return []
+
+    if "items" in body:
+        items = body["items"] if isinstance(body["items"], list) else []
+
+        return [
+            str(item.get("account_name")) for item in items if isinstance(item, dict)
+        ]
+
+    return [str(body.get("account_name"))]
+
+
+async def admit_api_call(
+    rate_limiter: RateLimiterDep,
+    request: Request,
+    api_key: Annotated[str, Depends(get_request_api_key)],
+) -> None:
+    # в dependencies роута: FastAPI разрешает их раньше параметров,
+    # отказ не открывает сессию и не проверяет секрет
+    if not rate_limiter.enabled:
+        return
+
+    try:
+        body = await request.json()
+    except Exception:
+        # невалидное тело отклонит валидация
+        return
+
+    rate_limiter.admit(api_key, request_account_names(body))
+
+
+async def get_stream_api_key(request: Request) -> str:
+    # тело потока читать нельзя: ключ только в заголовке или в query
+    api_key = request.headers.get("X-Api-Key") or request.query_params.get("api_key")
+    if api_key:
+        return api_key
+
+    raise HTTPException(status_code=HTTP_403_FORBIDDEN, detail="Not authenticated")
+
+
+async def verify_stream_call(
+    rate_limiter: RateLimiterDep,
+    api_secret_use_case: ApiSecretUseCaseDep,
+    request: Request,
+    api_key: Annotated[str, Depends(get_stream_api_key)],
+) -> bool:
+    return await check_api_secret(rate_limiter, api_secret_use_case, request, api_key)
+
+
+VerifiedStreamCallDep = Annotated[bool, Depends(verify_stream_call)]
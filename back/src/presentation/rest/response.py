@@ -0,0 +1,35 @@
+from starlette.requests import ClientDisconnect, Request
+from starlette.responses import Response, StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+
+# Ответ, генератор которого еще читает тело запроса. Обычный StreamingResponse
+# на ASGI < 2.4 параллельно ждет http.disconnect и съедает куски тела
+class DuplexStreamingResponse(StreamingResponse):
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await self.stream_response(send)
+        except OSError:
+            raise ClientDisconnect()
+
+        if self.background is not None:
+            await self.background()
+
+
+def etag_headers(version: str) -> dict[str, str]:
+    # no-cache: браузер хранит ответ, но каждый раз сверяет ETag
+    return {"ETag": f'W/"{version}"', "Cache-Control": "no-cache"}
+
+
+def not_modified(request: Request, version: str) -> Response | None:
+    # 304, если у клиента эта версия (If-None-Match, слабое сравнение)
+    header = request.headers.get("if-none-match")
+    if header is None:
+        return None
+
+    tags = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    if "*" not in tags and f'"{version}"' not in tags:
+        return None
+
+    return Response(status_code=304, headers=etag_headers(version))
@@ -1,14 +1,64 @@
-from fastapi import APIRouter
+from datetime import datetime
 
-from app.dto.account import AccountResponse
-from presentation.rest.deps import AccountUseCaseDep, CurrentUserDep
+from fastapi import APIRouter, Request, Response
+
+from app.dto.account import AccountResponse, AccountSummaryResponse
+from presentation.rest.deps import (
+    AccountCacheDep,
+    AccountUseCaseDep,
+    CurrentUserDep,
+)
+from presentation.rest.response import etag_headers, not_modified
 
 router = APIRouter(prefix="/accounts", tags=["accounts"])
 
 
-@router.get("")
+@router.get(
+    "",
+    response_model=list[AccountResponse],
+    responses={304: {"description": "Not modified since the If-None-Match ETag"}},
+)
 async def get_accounts(
+    request: Request,
     use_case: AccountUseCaseDep,
     _: CurrentUserDep,
-) -> list[AccountResponse]:
-    return await use_case.get_accounts()
+) -> Response:
+    # версия до данных: изменения между запросами дадут новый ETag в следующий раз
+    version = await use_case.get_accounts_version()
+    response = not_modified(request, version)
+    if response is not None:
+        return response
+
+    return Response(
+        await use_case.get_accounts_json(),
+        media_type="application/json",
+        headers=etag_headers(version),
+    )
+
+
+@router.get("/summary")
+async def get_accounts_summary(
+    use_case: AccountUseCaseDep,
+    _: CurrentUserDep,
+    date_from: datetime | None = None,
+    date_to: datetime | None = None,
+) -> list[AccountSummaryResponse]:
+    """
+    Every account with its PnL for the period, one query for the whole
+    dashboard instead of a history request per account.
+    """
+    return await use_case.get_summaries(date_from, date_to)
+
+
+@router.delete("/cache", status_code=204)
+async def invalidate_account_cache(
+    account_cache: AccountCacheDep,
+    _: CurrentUserDep,
+    name: str | None = None,
+) -> None:
+    """
+    Drops cached account state, e.g. after accounts were edited directly in the DB.
+    Without `name` the whole cache is dropped.
+    """
+    if account_cache is not None:
+        account_cache.invalidate(name)
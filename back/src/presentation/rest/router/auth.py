@@ -1,7 +1,13 @@
-from fastapi import APIRouter
+from uuid import UUID
+
+from fastapi import APIRouter, BackgroundTasks
 
 from app.dto.auth import LoginRequest, Token
-from presentation.rest.deps import AuthUseCaseDep
+from app.usecase.auth import AuthUseCase
+from infra.db.user import UserRepository
+from infra.utils.config import load_config
+from infra.utils.log import logger
+from presentation.rest.deps import AuthUseCaseDep, get_database
 
 
 router = APIRouter(prefix="/auth", tags=["auth"])
@@ -11,13 +17,25 @@ router = APIRouter(prefix="/auth", tags=["auth"])
 async def login(
     data: LoginRequest,
     auth_use_case: AuthUseCaseDep,
+    background_tasks: BackgroundTasks,
 ):
     user = await auth_use_case.authenticate_user(data.username, data.password)
+    background_tasks.add_task(update_last_login, user.id)
 
     token = await auth_use_case.create_token_for_user(user)
     return Token(access_token=token)
 
 
+async def update_last_login(user_id: UUID) -> None:
+    # Выполняется после ответа, сессия запроса к этому моменту уже закрыта
+    try:
+        async with get_database().session() as session:
+            auth_use_case = AuthUseCase(load_config().auth, UserRepository(session))
+            await auth_use_case.update_last_login(user_id)
+    except Exception:
+        logger.exception("Failed to update last login for user %s", user_id)
+
+
 # @router.post("/register")
 async def register(
     data: LoginRequest,
@@ -1,32 +1,288 @@
 from datetime import datetime
+from typing import Annotated
 from uuid import UUID
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import TypeAdapter, ValidationError
+from starlette.status import HTTP_403_FORBIDDEN
 
-from app.dto.balance_change import BalanceChangeResponse, NewBalanceChangeRequest
+from app.dto.balance_change import (
+    AcceptedResponse,
+    BalanceChangeBatchResponse,
+    BalanceChangeBucketResponse,
+    BalanceChangePageResponse,
+    BalanceChangePnLResponse,
+    BalanceChangeResponse,
+    HeartbeatResponse,
+    HistoryBucket,
+    HistoryFormat,
+    NewBalanceChangeBatchRequest,
+    NewBalanceChangeRequest,
+)
 from presentation.rest.deps import (
     BalanceChangeUseCaseDep,
     CurrentUserDep,
+    IngestionJournalDep,
+    IngestionStreamDep,
+    RateLimiterDep,
     VerifiedApiCallDep,
+    VerifiedStreamCallDep,
+    WriteBehindQueueDep,
+    admit_api_call,
+    balance_change_usecase_factory,
+    check_api_secret,
+    get_api_secret_usecase,
+    get_database,
+    get_ingestion_journal,
+    get_rate_limiter,
+    get_stream_api_key,
+    get_write_behind_queue,
+)
+from presentation.rest.response import (
+    DuplexStreamingResponse,
+    etag_headers,
+    not_modified,
 )
 
 router = APIRouter(prefix="/balance_change", tags=["balance_change"])
 
+ACCEPTED_RESPONSES: dict[int | str, dict] = {
+    202: {"model": AcceptedResponse, "description": "Queued or journaled"}
+}
+
+
+def accepted() -> JSONResponse:
+    return JSONResponse(status_code=202, content=AcceptedResponse().model_dump())
 
-@router.get("/{account_id}")
+
+history_buckets = TypeAdapter(list[BalanceChangeBucketResponse])
+
+
+@router.get(
+    "/{account_id}",
+    response_model=list[BalanceChangeResponse] | list[BalanceChangeBucketResponse],
+    responses={304: {"description": "Not modified since the If-None-Match ETag"}},
+)
 async def get_account_balance_change(
+    request: Request,
     use_case: BalanceChangeUseCaseDep,
     account_id: UUID,
     date_from: datetime | None,
     date_to: datetime | None,
     _: CurrentUserDep,
-) -> list[BalanceChangeResponse]:
-    return await use_case.get_change_for_account(account_id, date_from, date_to)
+    bucket: HistoryBucket | None = None,
+    max_points: Annotated[int | None, Query(ge=2, le=10_000)] = None,
+) -> Response:
+    """
+    Raw history, or with `bucket` and/or `max_points` the history aggregated
+    per bucket: open/close/min/max balance, sum of diffs, PnL. `max_points`
+    widens the buckets so the period fits into that many points,
+    e.g. the chart width in pixels.
+    """
+    version = await use_case.get_history_version(account_id)
+    if version is not None:
+        response = not_modified(request, version)
+        if response is not None:
+            return response
 
+    if bucket is not None or max_points is not None:
+        buckets = await use_case.get_history_buckets(
+            account_id, date_from, date_to, bucket, max_points
+        )
+        body = history_buckets.dump_json(buckets)
+    else:
+        # сырые строки сразу в JSON, без ORM и повторной валидации ответа
+        body = await use_case.get_change_json_for_account(
+            account_id, date_from, date_to, version
+        )
 
-@router.post("/")
-async def new_balance_change(
+    return Response(
+        body,
+        media_type="application/json",
+        headers=etag_headers(version) if version is not None else None,
+    )
+
+
+@router.get(
+    "/{account_id}/stream",
+    response_class=StreamingResponse,
+    responses={200: {"description": "History as a JSON array or NDJSON"}},
+)
+async def stream_account_balance_change(
+    account_id: UUID,
+    date_from: datetime | None,
+    date_to: datetime | None,
+    _: CurrentUserDep,
+    fmt: Annotated[HistoryFormat, Query(alias="format")] = HistoryFormat.JSON,
+):
+    """
+    The same history as GET /{account_id}, streamed from a server-side
+    cursor: memory stays flat however long the period is.
+    """
+
+    async def body():
+        # своя сессия: сессии зависимостей не живут до конца ответа
+        async with get_database().session() as session:
+            usecase = balance_change_usecase_factory(session)
+            async for chunk in usecase.stream_change_for_account(
+                account_id, date_from, date_to, fmt
+            ):
+                yield chunk
+
+    ndjson = fmt == HistoryFormat.NDJSON
+    return StreamingResponse(
+        body(), media_type="application/x-ndjson" if ndjson else "application/json"
+    )
+
+
+@router.get("/{account_id}/page")
+async def get_account_balance_change_page(
     use_case: BalanceChangeUseCaseDep,
+    account_id: UUID,
+    date_from: datetime | None,
+    date_to: datetime | None,
+    _: CurrentUserDep,
+    limit: Annotated[int, Query(ge=1, le=1000)] = 100,
+    cursor: str | None = None,
+) -> BalanceChangePageResponse:
+    """
+    History page by page in write order. Pass `next_cursor`
+    of the response as `cursor` to get the next page, until it is null.
+    """
+    return await use_case.get_change_page_for_account(
+        account_id, date_from, date_to, limit, cursor
+    )
+
+
+@router.get("/{account_id}/pnl")
+async def get_account_pnl(
+    use_case: BalanceChangeUseCaseDep,
+    account_id: UUID,
+    date_from: datetime | None,
+    date_to: datetime | None,
+    _: CurrentUserDep,
+) -> BalanceChangePnLResponse:
+    """
+    Totals of the period without the history: PnL (deposits and withdrawals
+    excluded), deposit and withdrawal sums, number of changes.
+    """
+    return await use_case.get_pnl_for_account(account_id, date_from, date_to)
+
+
+@router.post(
+    "/",
+    dependencies=[Depends(admit_api_call)],
+    response_model=BalanceChangeResponse | HeartbeatResponse,
+    responses=ACCEPTED_RESPONSES,
+)
+async def new_balance_change(
+    journal: IngestionJournalDep,
+    write_behind: WriteBehindQueueDep,
     request_dto: NewBalanceChangeRequest,
     _: VerifiedApiCallDep,
-) -> BalanceChangeResponse:
-    return await use_case.new_balance_update(request_dto)
+) -> Response | BalanceChangeResponse | HeartbeatResponse:
+    if journal is not None:
+        await journal.put(request_dto)
+
+        return accepted()
+
+    if write_behind is not None:
+        await write_behind.put(request_dto)
+
+        return accepted()
+
+    # сессию открываем только для записи сразу, в режимах с очередью она не нужна
+    async with get_database().session() as session:
+        return await balance_change_usecase_factory(session).new_balance_update(
+            request_dto
+        )
+
+
+@router.post(
+    "/ingest",
+    response_model=BalanceChangeResponse | HeartbeatResponse,
+    responses=ACCEPTED_RESPONSES,
+)
+async def ingest_balance_change(request: Request) -> Response:
+    """
+    Lean variant of `POST /balance_change/` for bots: the api key goes in
+    the X-Api-Key header, the NewBalanceChangeRequest body is decoded once,
+    and only process-wide objects are used instead of the per-request
+    dependency graph. The response is the same, and the change is committed
+    before it is sent.
+    """
+    api_key = request.headers.get("X-Api-Key")
+    if not api_key:
+        raise HTTPException(status_code=HTTP_403_FORBIDDEN, detail="Not authenticated")
+
+    try:
+        request_dto = NewBalanceChangeRequest.model_validate_json(await request.body())
+    except ValidationError as e:
+        raise RequestValidationError(
+            [
+                {**error, "loc": ("body", *error["loc"])}
+                for error in e.errors(include_url=False)
+            ]
+        )
+
+    # лимит до проверки секрета: PBKDF2 дороже разбора тела
+    rate_limiter = get_rate_limiter()
+    rate_limiter.admit(api_key, [request_dto.account_name])
+    await check_api_secret(rate_limiter, get_api_secret_usecase(), request, api_key)
+
+    journal = get_ingestion_journal()
+    if journal is not None:
+        await journal.put(request_dto)
+
+        return accepted()
+
+    write_behind = get_write_behind_queue()
+    if write_behind is not None:
+        await write_behind.put(request_dto)
+
+        return accepted()
+
+    async with get_database().session() as session:
+        use_case = balance_change_usecase_factory(session)
+        response = await use_case.new_balance_update(request_dto)
+
+    return Response(response.model_dump_json(), media_type="application/json")
+
+
+@router.post("/batch", dependencies=[Depends(admit_api_call)])
+async def new_balance_change_batch(
+    use_case: BalanceChangeUseCaseDep,
+    request_dto: NewBalanceChangeBatchRequest,
+    _: VerifiedApiCallDep,
+) -> BalanceChangeBatchResponse:
+    items = await use_case.new_balance_updates(request_dto.items)
+
+    return BalanceChangeBatchResponse(items=items)
+
+
+@router.post(
+    "/stream",
+    response_class=DuplexStreamingResponse,
+    responses={200: {"description": "NDJSON acks, one per frame"}},
+)
+async def new_balance_change_stream(
+    request: Request,
+    stream: IngestionStreamDep,
+    rate_limiter: RateLimiterDep,
+    api_key: Annotated[str, Depends(get_stream_api_key)],
+    _: VerifiedStreamCallDep,
+):
+    """
+    Body is NDJSON, one NewBalanceChangeRequest per line, as long as needed.
+    Every frame gets an ack line in order: {"index", "result", "error"}.
+    The api key goes in the X-Api-Key header or the api_key query param.
+    """
+
+    def admit(account_name: str) -> None:
+        rate_limiter.admit(api_key, [account_name])
+
+    return DuplexStreamingResponse(
+        stream.run(request.stream(), admit if rate_limiter.enabled else None),
+        media_type="application/x-ndjson",
+    )
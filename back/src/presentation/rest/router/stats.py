@@ -0,0 +1,48 @@
+from fastapi import APIRouter
+
+from presentation.rest.deps import (
+    AccountCacheDep,
+    CurrentUserDep,
+    HistoryCacheDep,
+    IdempotencyCacheDep,
+    IngestionJournalDep,
+    IngestionStreamDep,
+    LastSeenTrackerDep,
+    PasswordHasherDep,
+    RateLimiterDep,
+    TokenCacheDep,
+    VerifiedSecretsCacheDep,
+    WriteBehindQueueDep,
+)
+
+router = APIRouter(prefix="/stats", tags=["stats"])
+
+
+@router.get("")
+async def get_stats(
+    account_cache: AccountCacheDep,
+    idempotency_cache: IdempotencyCacheDep,
+    write_behind: WriteBehindQueueDep,
+    verified_secrets: VerifiedSecretsCacheDep,
+    password_hasher: PasswordHasherDep,
+    token_cache: TokenCacheDep,
+    ingestion_stream: IngestionStreamDep,
+    last_seen: LastSeenTrackerDep,
+    journal: IngestionJournalDep,
+    rate_limiter: RateLimiterDep,
+    history_cache: HistoryCacheDep,
+    _: CurrentUserDep,
+) -> dict:
+    return {
+        "account_cache": account_cache.stats() if account_cache else None,
+        "idempotency_cache": (idempotency_cache.stats() if idempotency_cache else None),
+        "write_behind": write_behind.stats() if write_behind else None,
+        "verified_secrets": verified_secrets.stats() if verified_secrets else None,
+        "password_hasher": password_hasher.stats(),
+        "token_cache": token_cache.stats() if token_cache else None,
+        "ingestion_stream": ingestion_stream.stats(),
+        "last_seen": last_seen.stats() if last_seen else None,
+        "journal": journal.stats() if journal else None,
+        "rate_limit": rate_limiter.stats(),
+        "history_cache": history_cache.stats() if history_cache else None,
+    }
@@ -0,0 +1,129 @@
+"""
+Bulk import of balance updates from bot logs.
+
+    PYTHONPATH=./src uv run python -m run.backfill logs.ndjson
+    PYTHONPATH=./src uv run python -m run.backfill logs.csv --chunk-size 50000
+
+One record per line: NDJSON objects or CSV with a header, fields
+account_name, state, balance and optional created_at, idempotency_key.
+Records must be in time order per account. The whole import is one
+transaction, on error nothing is written.
+"""
+
+import argparse
+import asyncio
+import csv
+import sys
+from itertools import islice
+from typing import AsyncIterator, Iterator
+
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.dto.balance_change import BackfillRecord
+from app.usecase.backfill import BackfillProgress, BackfillUseCase
+from infra.db.account import AccountRepository
+from infra.db.balance_change import BalanceChangeRepository
+from infra.db.conn import Database, DatabaseManager
+from infra.utils.config import load_config
+
+
+class BadRecordError(Exception):
+    def __init__(self, line: int, error: Exception):
+        super().__init__(f"line {line}: {error}")
+
+
+# Записей за один переход в поток чтения
+READ_BATCH = 1000
+
+
+async def read_records(path: str, fmt: str) -> AsyncIterator[BackfillRecord]:
+    """Reads the file lazily, in batches off the event loop."""
+    records = parse_records(path, fmt)
+    try:
+        while batch := await asyncio.to_thread(list, islice(records, READ_BATCH)):
+            for record in batch:
+                yield record
+    finally:
+        records.close()
+
+
+def parse_records(path: str, fmt: str) -> Iterator[BackfillRecord]:
+    with open(path, newline="", encoding="utf-8") as file:
+        if fmt == "csv":
+            reader = csv.DictReader(file)
+            for row in reader:
+                # пустые необязательные поля -> None
+                data = {key: value for key, value in row.items() if value != ""}
+                try:
+                    yield BackfillRecord.model_validate(data)
+                except ValidationError as e:
+                    raise BadRecordError(reader.line_num, e)
+            return
+
+        for line_num, line in enumerate(file, start=1):
+            if not line.strip():
+                continue
+
+            try:
+                yield BackfillRecord.model_validate_json(line)
+            except ValidationError as e:
+                raise BadRecordError(line_num, e)
+
+
+def print_progress(progress: BackfillProgress) -> None:
+    print(
+        f"\r{progress.records} records, {progress.written} written, "
+        f"{progress.skipped} skipped, {progress.rate:,.0f} records/s",
+        end="",
+        file=sys.stderr,
+        flush=True,
+    )
+
+
+async def backfill(db: Database, path: str, fmt: str, chunk_size: int) -> None:
+    async with db.session_factory() as session, session.begin():
+        usecase = BackfillUseCase(
+            AccountRepository(session),
+            BalanceChangeRepository(session),
+            chunk_size=chunk_size,
+            on_progress=print_progress,
+        )
+        progress = await usecase.run(read_records(path, fmt))
+
+    print(
+        f"\nDone: {progress.written} changes for {progress.accounts} accounts "
+        f"({progress.created_accounts} new), {progress.skipped} skipped",
+        file=sys.stderr,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=["ndjson", "csv"], default=None)
+    parser.add_argument("--chunk-size", type=int, default=10_000)
+    parser.add_argument("--dsn", default=None, help="defaults to db.dsn from config")
+    args = parser.parse_args()
+
+    fmt = args.format or ("csv" if args.path.endswith(".csv") else "ndjson")
+
+    async def run() -> None:
+        if args.dsn is not None:
+            db = Database(create_async_engine(args.dsn))
+        else:
+            db = DatabaseManager.init_db(load_config().db)
+
+        try:
+            await backfill(db, args.path, fmt, args.chunk_size)
+        finally:
+            await db.engine.dispose()
+
+    try:
+        asyncio.run(run())
+    except BadRecordError as e:
+        sys.exit(f"\nImport aborted, nothing written: {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+from datetime import datetime
+import pytest
+import pytest_asyncio
+from sqlalchemy import delete, event, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from domain.entity.account import Account
+from domain.entity.balance_change import BalanceChange
+
+from app.usecase.account_cache import AccountCache
+from app.usecase.balance_change import BalanceChangeUseCase
+from app.dto.balance_change import NewBalanceChangeRequest, BalanceChangeState
+from infra.db.account import AccountRepository
+from infra.db.balance_change import BalanceChangeRepository
+
+
+@pytest_asyncio.fixture
+async def ready_db_session(db_session: AsyncSession):
+    await db_session.execute(delete(BalanceChange))
+    await db_session.execute(delete(Account))
+    account = Account(name="account", balance=100, last_balance_update=datetime.now())
+    db_session.add(account)
+    await db_session.commit()
+    await db_session.refresh(account)
+
+    return db_session, account
+
+
+def get_usecase(session: AsyncSession, cache: AccountCache) -> BalanceChangeUseCase:
+    return BalanceChangeUseCase(
+        AccountRepository(session),
+        BalanceChangeRepository(session),
+        account_cache=cache,
+    )
+
+
+class StatementLog:
+    def __init__(self, session: AsyncSession):
+        self.engine = session.get_bind()
+        self.statements: list[str] = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self)
+        return self
+
+    def __exit__(self, *args):
+        event.remove(self.engine, "before_cursor_execute", self)
+
+
+@pytest.mark.asyncio
+async def test_cached_account_skips_lookup(
+    ready_db_session: tuple[AsyncSession, Account],
+):
+    session, account = ready_db_session
+
+    cache = AccountCache(10)
+    cache.warm([account])
+    usecase = get_usecase(session, cache)
+
+    dto = NewBalanceChangeRequest(
+        account_name=account.name, state=BalanceChangeState.LOCK, balance=150
+    )
+    with StatementLog(session) as log:
+        output = await usecase.new_balance_update(dto)
+
+    assert output.balance_diff == 50
+    assert not any("FROM accounts" in statement for statement in log.statements)
+    assert cache.stats()["hits"] == 1
+
+    await session.refresh(account)
+    assert account.balance == 150
+    assert account.is_balance_fixed
+    assert cache.get(account.name).is_balance_fixed
+
+
+@pytest.mark.asyncio
+async def test_stale_cache_falls_back_to_db(
+    ready_db_session: tuple[AsyncSession, Account],
+):
+    session, account = ready_db_session
+
+    cache = AccountCache(10)
+    cache.warm([account])
+    usecase = get_usecase(session, cache)
+
+    # аккаунт изменен в обход сервиса
+    await session.execute(
+        update(Account).where(Account.id == account.id).values(balance=80)
+    )
+
+    dto = NewBalanceChangeRequest(
+        account_name=account.name, state=BalanceChangeState.UPDATE, balance=90
+    )
+    output = await usecase.new_balance_update(dto)
+    assert output.balance_diff == 10
+
+    await session.refresh(account)
+    assert account.balance == 90
+    assert cache.get(account.name).balance == 90
+
+
+def test_account_cache_eviction():
+    cache = AccountCache(2)
+    accounts = [
+        Account(
+            name=f"account_{i}",
+            balance=i,
+            is_balance_fixed=False,
+            is_active=True,
+            last_balance_update=datetime.now(),
+        )
+        for i in range(3)
+    ]
+    cache.warm(accounts)
+
+    assert cache.get("account_0") is None
+    assert cache.get("account_2").balance == 2
+
+    cache.invalidate("account_2")
+    assert cache.get("account_2") is None
+
+    stats = cache.stats()
+    assert stats["size"] == 1
+    assert stats["evictions"] == 1
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
@@ -0,0 +1,80 @@
+import asyncio
+import time
+
+import pytest
+
+from app.usecase.api_secret import ApiSecretUseCase
+from app.usecase.auth import AuthUseCase, hash_password
+from app.usecase.errors import UnauthorizedError
+from infra.utils.cache import LRUCache
+from infra.utils.config import AuthConfig
+from infra.utils.executor import BoundedExecutor
+
+API_SECRET = "apisecret"
+
+
+@pytest.mark.asyncio
+async def test_verified_secret_is_cached_as_digest(monkeypatch):
+    cache: LRUCache[bytes, bool] = LRUCache(10, ttl=60)
+    usecase = ApiSecretUseCase(AuthConfig(), cache)
+
+    assert await usecase.validate_api_secret(API_SECRET)
+    assert len(cache) == 1
+    assert all(API_SECRET.encode() not in key for key in cache._data)
+
+    async def fail(*args):
+        raise AssertionError("PBKDF2 must not run for a cached secret")
+
+    monkeypatch.setattr(usecase, "_verify_password", fail)
+    assert await usecase.validate_api_secret(API_SECRET)
+    assert cache.stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_secret_is_not_cached():
+    cache: LRUCache[bytes, bool] = LRUCache(10, ttl=60)
+    usecase = ApiSecretUseCase(AuthConfig(), cache)
+
+    for _ in range(3):
+        with pytest.raises(UnauthorizedError):
+            await usecase.validate_api_secret("wrong")
+
+    assert len(cache) == 0
+
+
+class FakeUserRepository:
+    def __init__(self, password: str):
+        self.user = type("User", (), {"password_hash": hash_password(password)})()
+
+    async def get_by_name(self, username: str):
+        return self.user
+
+
+@pytest.mark.asyncio
+async def test_logins_do_not_block_event_loop():
+    hasher = BoundedExecutor(2)
+    usecase = AuthUseCase(
+        AuthConfig(), FakeUserRepository("password"), hasher=hasher  # type: ignore
+    )
+
+    # "другие запросы": короткие задачи, которые должны выполняться во время логинов
+    served: list[float] = []
+
+    async def other_requests():
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(0.005)
+            served.append(time.perf_counter() - started)
+
+    ticker = asyncio.create_task(other_requests())
+    try:
+        logins = [usecase.authenticate_user("user", "password") for _ in range(6)]
+        await asyncio.gather(*logins)
+    finally:
+        ticker.cancel()
+        hasher.shutdown()
+
+    # при PBKDF2 в цикле событий каждая задержка была бы не меньше одного хеша
+    assert len(served) >= 5
+    assert max(served) < 0.05
+    assert hasher.stats()["completed"] == 6
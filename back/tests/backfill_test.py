@@ -0,0 +1,185 @@
+from datetime import datetime, timedelta, timezone
+from itertools import product
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from domain.entity.balance_change import BalanceChange
+
+from app.dto.balance_change import (
+    BackfillRecord,
+    BalanceChangeState,
+    NewBalanceChangeRequest,
+)
+from app.usecase.backfill import BackfillUseCase
+from app.usecase.balance_change import BalanceChangeUseCase
+from infra.db.account import AccountRepository
+from infra.db.balance_change import BalanceChangeRepository
+from run.backfill import BadRecordError, read_records
+
+
+async def aiter(items):
+    for item in items:
+        yield item
+
+
+STATES = [
+    BalanceChangeState.UPDATE,
+    BalanceChangeState.LOCK,
+    BalanceChangeState.SHUTDOWN,
+]
+
+
+def history() -> list[tuple[BalanceChangeState, float]]:
+    balance, steps = 100.0, []
+    for state, delta in product(STATES * 2, [0, 12.34, -5.5]):
+        balance = round(balance + delta, 2)
+        steps.append((state, balance))
+
+    return steps
+
+
+@pytest.mark.asyncio
+async def test_backfill_replays_live_rules(clean_db: AsyncSession):
+    session = clean_db
+    live = BalanceChangeUseCase(
+        AccountRepository(session), BalanceChangeRepository(session)
+    )
+    for state, balance in history():
+        await live.new_balance_update(
+            NewBalanceChangeRequest(account_name="live", state=state, balance=balance)
+        )
+
+    started = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    records = [
+        BackfillRecord(
+            account_name="backfill",
+            state=state,
+            balance=balance,
+            created_at=started + timedelta(minutes=i),
+        )
+        for i, (state, balance) in enumerate(history())
+    ]
+    # запрещенные состояния пропускаются, как и в API
+    records.insert(
+        3,
+        BackfillRecord(
+            account_name="backfill", state=BalanceChangeState.DEPOSIT, balance=1
+        ),
+    )
+    reported = []
+    usecase = BackfillUseCase(
+        AccountRepository(session),
+        BalanceChangeRepository(session),
+        chunk_size=4,
+        on_progress=lambda progress: reported.append(progress.written),
+    )
+    progress = await usecase.run(aiter(records))
+    await session.commit()
+
+    assert (progress.written, progress.skipped) == (len(history()), 1)
+    assert (progress.accounts, progress.created_accounts) == (1, 1)
+    assert reported[0] == 4 and reported[-1] == len(history())
+
+    accounts = {
+        account.name: account
+        for account in await AccountRepository(session).get_by_names(
+            ["live", "backfill"]
+        )
+    }
+    changes = {}
+    for name, account in accounts.items():
+        await session.refresh(account)
+        stmt = (
+            select(BalanceChange)
+            .where(BalanceChange.account_id == account.id)
+            .order_by(BalanceChange.created_at)
+        )
+        changes[name] = [
+            (change.state_raw, change.state, change.balance, change.balance_diff)
+            for change in (await session.execute(stmt)).scalars()
+        ]
+
+    assert changes["backfill"] == changes["live"]
+    for field in ["balance", "is_balance_fixed", "is_active"]:
+        assert getattr(accounts["backfill"], field) == getattr(accounts["live"], field)
+
+
+@pytest.mark.asyncio
+async def test_read_records_csv(tmp_path):
+    path = tmp_path / "log.csv"
+    path.write_text(
+        "account_name,state,balance,created_at,idempotency_key\n"
+        "a,update,10.5,2025-01-01T00:00:00+00:00,\n"
+        "b,lock,3,,k1\n"
+    )
+
+    records = [record async for record in read_records(str(path), "csv")]
+
+    assert [record.account_name for record in records] == ["a", "b"]
+    assert records[0].created_at == datetime(2025, 1, 1, tzinfo=timezone.utc)
+    assert records[1].created_at is None
+    assert records[1].idempotency_key == "k1"
+
+
+@pytest.mark.asyncio
+async def test_backfill_keeps_newer_live_state(clean_db: AsyncSession):
+    session = clean_db
+    live = BalanceChangeUseCase(
+        AccountRepository(session), BalanceChangeRepository(session)
+    )
+    for state, balance in [
+        (BalanceChangeState.UPDATE, 100.0),
+        (BalanceChangeState.LOCK, 120.0),
+    ]:
+        await live.new_balance_update(
+            NewBalanceChangeRequest(account_name="live", state=state, balance=balance)
+        )
+    await session.commit()
+
+    def records(created_at: datetime, balance: float) -> list[BackfillRecord]:
+        return [
+            BackfillRecord(
+                account_name="live",
+                state=BalanceChangeState.UPDATE,
+                balance=balance,
+                created_at=created_at,
+            )
+        ]
+
+    usecase = BackfillUseCase(
+        AccountRepository(session), BalanceChangeRepository(session)
+    )
+    # старый лог: изменение пишется от текущего состояния, аккаунт не трогается
+    await usecase.run(aiter(records(datetime(2020, 1, 1, tzinfo=timezone.utc), 90)))
+    await session.commit()
+
+    account = await AccountRepository(session).get_by_name("live")
+    await session.refresh(account)
+    assert (account.balance, account.is_balance_fixed) == (120, True)
+    old = await session.scalar(select(BalanceChange).where(BalanceChange.balance == 90))
+    assert (old.state, old.balance_diff) == (BalanceChangeState.WITHDRAW, -30)
+
+    # импорт новее последнего изменения сохраняет состояние
+    future = datetime.now(timezone.utc) + timedelta(days=1)
+    await usecase.run(aiter(records(future, 130)))
+    await session.commit()
+
+    await session.refresh(account)
+    assert (account.balance, account.is_balance_fixed) == (130, False)
+
+
+@pytest.mark.asyncio
+async def test_read_records_ndjson_reports_bad_line(tmp_path):
+    path = tmp_path / "log.ndjson"
+    path.write_text(
+        '{"account_name": "a", "state": "update", "balance": 1}\n'
+        "\n"
+        '{"account_name": "a", "state": "nope", "balance": 2}\n'
+    )
+
+    # импорт прерывается целиком, номер строки в ошибке
+    with pytest.raises(BadRecordError, match="line 3"):
+        async for _ in read_records(str(path), "ndjson"):
+            pass
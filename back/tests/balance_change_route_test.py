@@ -0,0 +1,90 @@
+import httpx
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.usecase.write_behind import WriteBehindQueue
+from infra.db.conn import Database, DatabaseManager
+from presentation.rest import deps
+from presentation.rest.app import app
+from presentation.rest.router import balance_change as router
+
+URL = "/api/v1/balance_change"
+
+
+def update(balance: float, account_name: str = "account") -> dict:
+    return {"account_name": account_name, "state": "update", "balance": balance}
+
+
+@pytest_asyncio.fixture
+async def client(clean_db: AsyncSession, database: Database):
+    DatabaseManager.init_test_db(database)
+    app.dependency_overrides[deps.verify_api_call] = lambda: True
+    app.dependency_overrides[deps.get_ingestion_journal] = lambda: None
+    app.dependency_overrides[deps.get_write_behind_queue] = lambda: None
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://test", params={"api_key": "key"}
+    ) as c:
+        yield c
+
+    app.dependency_overrides.clear()
+
+
+@pytest.mark.asyncio
+async def test_queued_update_is_accepted_without_session(
+    client: httpx.AsyncClient, database: Database, usecase_factory, monkeypatch
+):
+    queue = WriteBehindQueue(database, usecase_factory)
+    app.dependency_overrides[deps.get_write_behind_queue] = lambda: queue
+
+    def no_session():
+        raise AssertionError("queued update must not open a session")
+
+    monkeypatch.setattr(router, "get_database", no_session)
+
+    response = await client.post(f"{URL}/", json=update(10))
+
+    assert response.status_code == 202
+    assert response.json() == {"status": "accepted"}
+    assert queue.stats()["depth"] == 1
+
+
+@pytest.mark.asyncio
+async def test_update_is_written_directly(client: httpx.AsyncClient):
+    response = await client.post(f"{URL}/", json=update(10))
+
+    assert response.status_code == 200
+    assert response.json()["balance"] == 10
+    assert "id" in response.json()
+
+
+@pytest.mark.asyncio
+async def test_batch_reports_invalid_items_per_index(client: httpx.AsyncClient):
+    response = await client.post(
+        f"{URL}/batch",
+        json={
+            "items": [
+                update(10),
+                {"account_name": "account", "state": "update", "balance": "ten"},
+                {"account_name": "account", "balance": 12},
+                update(12),
+            ]
+        },
+    )
+
+    assert response.status_code == 200
+    items = response.json()["items"]
+    assert [item["index"] for item in items] == [0, 1, 2, 3]
+    assert items[0]["error"] is None and items[3]["error"] is None
+    assert items[3]["result"]["balance_diff"] == 2
+    assert items[1]["error"].startswith("balance:")
+    assert items[2]["error"].startswith("state:")
+
+
+@pytest.mark.asyncio
+async def test_empty_batch_is_rejected(client: httpx.AsyncClient):
+    response = await client.post(f"{URL}/batch", json={"items": []})
+
+    assert response.status_code == 422
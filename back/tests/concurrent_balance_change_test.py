@@ -0,0 +1,167 @@
+import asyncio
+import os
+from datetime import datetime
+import pytest
+import pytest_asyncio
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import (
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from domain.entity.account import Account
+from domain.entity.balance_change import BalanceChange
+from domain.entity.base import BaseEntity
+
+from app.usecase.balance_change import BalanceChangeUseCase
+from app.dto.balance_change import NewBalanceChangeRequest, BalanceChangeState
+from infra.db.account import AccountRepository
+from infra.db.balance_change import BalanceChangeRepository
+from infra.utils.lock import ShardedLock
+
+# Тесты на SQLite (StaticPool) идут через одно соединение, а обновления
+# сериализует блокировка в процессе - FOR UPDATE тут не проверяется.
+# Для проверки между воркерами - TEST_POSTGRES_DSN на пустую тестовую базу
+TEST_POSTGRES_DSN = os.environ.get("TEST_POSTGRES_DSN")
+
+
+async def post_update(
+    session_factory: async_sessionmaker,
+    dto: NewBalanceChangeRequest,
+    locks: ShardedLock | None = None,
+) -> None:
+    # Каждый запрос - своя сессия и транзакция, как в API
+    async with session_factory() as session:
+        usecase = BalanceChangeUseCase(
+            AccountRepository(session), BalanceChangeRepository(session)
+        )
+        if locks is not None:
+            usecase.locks = locks
+        await usecase.new_balance_update(dto)
+        await session.commit()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_updates_of_one_account(
+    clean_db: AsyncSession, session_factory: async_sessionmaker
+):
+    session = clean_db
+    account = Account(name="account", balance=0, last_balance_update=datetime.now())
+    session.add(account)
+    await session.commit()
+
+    balances = [float((i * 37) % 101) for i in range(1, 101)]
+    await asyncio.gather(
+        *(
+            post_update(
+                session_factory,
+                NewBalanceChangeRequest(
+                    account_name=account.name,
+                    state=BalanceChangeState.UPDATE,
+                    balance=balance,
+                ),
+            )
+            for balance in balances
+        )
+    )
+
+    await session.refresh(account)
+    changes = (
+        (
+            await session.execute(
+                select(BalanceChange).where(BalanceChange.account_id == account.id)
+            )
+        )
+        .scalars()
+        .all()
+    )
+    assert len(changes) == len(balances)
+
+    # Без потерянных обновлений разницы складываются в итоговое изменение баланса
+    assert round(sum(change.balance_diff for change in changes), 2) == account.balance
+
+
+@pytest.mark.asyncio
+async def test_concurrent_first_updates_create_one_account(
+    clean_db: AsyncSession, session_factory: async_sessionmaker
+):
+    session = clean_db
+
+    await asyncio.gather(
+        *(
+            post_update(
+                session_factory,
+                NewBalanceChangeRequest(
+                    account_name="new_account",
+                    state=BalanceChangeState.UPDATE,
+                    balance=100,
+                ),
+            )
+            for _ in range(20)
+        )
+    )
+
+    accounts = (await session.execute(select(Account))).scalars().all()
+    assert [account.name for account in accounts] == ["new_account"]
+
+    changes = (await session.execute(select(BalanceChange))).scalars().all()
+    assert len(changes) == 20
+    assert all(change.balance_diff == 0 for change in changes)
+
+
+@pytest_asyncio.fixture
+async def pg_session_factory():
+    engine = create_async_engine(TEST_POSTGRES_DSN, pool_size=20)
+    async with engine.begin() as conn:
+        await conn.run_sync(BaseEntity.metadata.create_all)
+
+    yield async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+    async with engine.begin() as conn:
+        await conn.run_sync(BaseEntity.metadata.drop_all)
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(TEST_POSTGRES_DSN is None, reason="TEST_POSTGRES_DSN not set")
+async def test_concurrent_updates_of_one_account_across_workers(
+    pg_session_factory: async_sessionmaker,
+):
+    async with pg_session_factory() as session:
+        account = Account(name="account", balance=0, last_balance_update=datetime.now())
+        session.add(account)
+        await session.commit()
+
+    balances = [float((i * 37) % 101) for i in range(1, 101)]
+    # своя блокировка у каждого запроса, как в разных воркерах:
+    # очередность держит только FOR UPDATE строки аккаунта
+    await asyncio.gather(
+        *(
+            post_update(
+                pg_session_factory,
+                NewBalanceChangeRequest(
+                    account_name=account.name,
+                    state=BalanceChangeState.UPDATE,
+                    balance=balance,
+                ),
+                ShardedLock(),
+            )
+            for balance in balances
+        )
+    )
+
+    async with pg_session_factory() as session:
+        account = await session.get(Account, account.id)
+        changes = (
+            (
+                await session.execute(
+                    select(BalanceChange).where(BalanceChange.account_id == account.id)
+                )
+            )
+            .scalars()
+            .all()
+        )
+
+    assert len(changes) == len(balances)
+    assert round(sum(change.balance_diff for change in changes), 2) == account.balance
@@ -1,13 +1,19 @@
 import pytest_asyncio
-from sqlalchemy import StaticPool
+from sqlalchemy import StaticPool, delete
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 
 # from presentation.rest.app import app
 
 # from infra.db import models  # pylint: disable=unused-import
+from domain.entity.account import Account
+from domain.entity.balance_change import BalanceChange
 from domain.entity.base import BaseEntity
+from domain.entity.user import User
 
-# from infra.db.conn import Database, DatabaseManager
+from app.usecase.balance_change import BalanceChangeUseCase
+from infra.db.account import AccountRepository
+from infra.db.balance_change import BalanceChangeRepository
+from infra.db.conn import Database
 
 # Create a test database URL
 TEST_DB_URL = "sqlite+aiosqlite:///:memory:"
@@ -37,3 +43,35 @@ async def db_session(test_db):
     async with TestSessionLocal() as session:
         yield session
         await session.rollback()
+
+
+@pytest_asyncio.fixture(scope="function")
+async def session_factory(test_db):
+    return TestSessionLocal
+
+
+@pytest_asyncio.fixture(scope="function")
+async def database(test_db) -> Database:
+    return Database(test_engine)
+
+
+@pytest_asyncio.fixture(scope="function")
+async def clean_db(db_session: AsyncSession):
+    await db_session.execute(delete(BalanceChange))
+    await db_session.execute(delete(Account))
+    await db_session.execute(delete(User))
+    await db_session.commit()
+
+    return db_session
+
+
+@pytest_asyncio.fixture(scope="function")
+async def usecase_factory():
+    """Use case factory for background writers, one session per batch."""
+
+    def factory(session: AsyncSession) -> BalanceChangeUseCase:
+        return BalanceChangeUseCase(
+            AccountRepository(session), BalanceChangeRepository(session)
+        )
+
+    return factory
@@ -0,0 +1,99 @@
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.requests import Request
+
+
+from app.dto.balance_change import BalanceChangeState, NewBalanceChangeRequest
+from app.usecase.account import AccountUseCase
+from app.usecase.account_cache import AccountCache
+from app.usecase.balance_change import BalanceChangeUseCase
+from infra.db.account import AccountRepository
+from infra.db.balance_change import BalanceChangeRepository
+from infra.db.ingestion import IngestionRepository
+from presentation.rest.response import not_modified
+
+
+def update(balance: float, state=BalanceChangeState.UPDATE) -> NewBalanceChangeRequest:
+    return NewBalanceChangeRequest(account_name="a", state=state, balance=balance)
+
+
+@pytest.mark.asyncio
+async def test_every_write_path_bumps_version(clean_db: AsyncSession):
+    session = clean_db
+    accounts = AccountRepository(session)
+    changes = BalanceChangeRepository(session)
+    usecases = [
+        BalanceChangeUseCase(accounts, changes),
+        BalanceChangeUseCase(accounts, changes, account_cache=AccountCache(10)),
+        BalanceChangeUseCase(
+            accounts, changes, ingestion_repository=IngestionRepository(session)
+        ),
+    ]
+    account_usecase = AccountUseCase(accounts)
+
+    change = await usecases[0].new_balance_update(update(100))
+    await session.commit()
+    account_id = change.account_id
+
+    seen = {
+        (
+            await usecases[0].get_history_version(account_id),
+            await account_usecase.get_accounts_version(),
+        )
+    }
+    # лок с тем же балансом не меняет строку аккаунта, но пишет изменение
+    requests = [update(100, BalanceChangeState.LOCK), update(100), update(110)]
+    for usecase in usecases:
+        for request in requests:
+            await usecase.new_balance_update(request)
+            await session.commit()
+            versions = (
+                await usecase.get_history_version(account_id),
+                await account_usecase.get_accounts_version(),
+            )
+            assert versions not in seen
+            seen.add(versions)
+
+    history_version = await usecases[0].get_history_version(account_id)
+    await usecases[0].new_balance_updates([update(120), update(120)])
+    await session.commit()
+    assert await usecases[0].get_history_version(account_id) != history_version
+
+    # last_seen_at - только в списке аккаунтов, история та же
+    history_version = await usecases[0].get_history_version(account_id)
+    list_version = await account_usecase.get_accounts_version()
+    await accounts.update_last_seen({account_id: datetime.now(timezone.utc)})
+    await session.commit()
+    assert await usecases[0].get_history_version(account_id) == history_version
+    assert await account_usecase.get_accounts_version() != list_version
+
+    # новый аккаунт меняет список
+    list_version = await account_usecase.get_accounts_version()
+    await usecases[0].new_balance_update(
+        NewBalanceChangeRequest(
+            account_name="b", state=BalanceChangeState.UPDATE, balance=1
+        )
+    )
+    await session.commit()
+    assert await account_usecase.get_accounts_version() != list_version
+
+
+def request(if_none_match: str | None) -> Request:
+    headers = []
+    if if_none_match is not None:
+        headers.append((b"if-none-match", if_none_match.encode()))
+
+    return Request({"type": "http", "method": "GET", "headers": headers})
+
+
+def test_not_modified():
+    assert not_modified(request(None), "7") is None
+    assert not_modified(request('W/"6"'), "7") is None
+
+    for header in ('W/"7"', '"7"', 'W/"6", W/"7"', "*"):
+        response = not_modified(request(header), "7")
+        assert response is not None
+        assert response.status_code == 304
+        assert response.headers["etag"] == 'W/"7"'
@@ -0,0 +1,197 @@
+import asyncio
+from datetime import datetime
+from itertools import product
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from domain.entity.account import Account
+from domain.entity.balance_change import BalanceChange
+
+from app.usecase.account_cache import AccountCache
+from app.usecase.balance_change import BalanceChangeUseCase
+from app.usecase.heartbeat import LastSeenTracker
+from app.dto.balance_change import (
+    BalanceChangeState,
+    HeartbeatResponse,
+    NewBalanceChangeRequest,
+)
+from infra.db.account import AccountRepository
+from infra.db.balance_change import BalanceChangeRepository
+from infra.db.conn import Database
+
+STATES = [
+    BalanceChangeState.UPDATE,
+    BalanceChangeState.LOCK,
+    BalanceChangeState.SHUTDOWN,
+]
+
+
+async def stored_changes(session: AsyncSession, account: Account) -> list[tuple]:
+    stmt = (
+        select(BalanceChange)
+        .where(BalanceChange.account_id == account.id)
+        .order_by(BalanceChange.created_at)
+    )
+    return [
+        (change.state_raw, change.state, change.balance, change.balance_diff)
+        for change in (await session.execute(stmt)).scalars()
+    ]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("with_cache", [False, True])
+async def test_heartbeat_keeps_account_transitions(
+    clean_db: AsyncSession, database: Database, with_cache: bool
+):
+    session = clean_db
+    tracker = LastSeenTracker(database)
+
+    accounts = {}
+    for heartbeat in [False, True]:
+        account = Account(
+            name=f"account_{heartbeat}",
+            balance=100,
+            last_balance_update=datetime.now(),
+        )
+        session.add(account)
+        accounts[heartbeat] = account
+    await session.commit()
+
+    usecases = {
+        False: BalanceChangeUseCase(
+            AccountRepository(session), BalanceChangeRepository(session)
+        ),
+        True: BalanceChangeUseCase(
+            AccountRepository(session),
+            BalanceChangeRepository(session),
+            account_cache=AccountCache(10) if with_cache else None,
+            last_seen=tracker,
+        ),
+    }
+
+    balance = 100.0
+    # каждый шаг повторяется: второй UPDATE с тем же балансом - heartbeat
+    for state, delta, _ in product(STATES, [0, 12.34, -5.5], range(2)):
+        balance = round(balance + delta, 2)
+        for heartbeat, account in accounts.items():
+            dto = NewBalanceChangeRequest(
+                account_name=account.name, state=state, balance=balance
+            )
+            output = await usecases[heartbeat].new_balance_update(dto)
+            assert output.balance == balance
+            await session.commit()
+            await session.refresh(account)
+
+        orm, heartbeat = accounts[False], accounts[True]
+        assert heartbeat.balance == orm.balance
+        assert heartbeat.is_balance_fixed == orm.is_balance_fixed
+        assert heartbeat.is_active == orm.is_active
+
+    orm_changes = await stored_changes(session, accounts[False])
+    heartbeat_changes = await stored_changes(session, accounts[True])
+    skipped = tracker.stats()["heartbeats"]
+    assert skipped > 0
+    assert len(heartbeat_changes) == len(orm_changes) - skipped
+    # пропущены только UPDATE без изменения баланса
+    assert [c for c in orm_changes if c[0] != "update" or c[3] != 0] == [
+        c for c in heartbeat_changes if c[0] != "update" or c[3] != 0
+    ]
+
+    await tracker.flush()
+    await session.refresh(accounts[True])
+    assert accounts[True].last_seen_at is not None
+    assert tracker.stats()["flushed_rows"] == 1
+
+
+@pytest.mark.asyncio
+async def test_batch_heartbeats(clean_db: AsyncSession, database: Database):
+    session = clean_db
+    tracker = LastSeenTracker(database)
+    usecase = BalanceChangeUseCase(
+        AccountRepository(session), BalanceChangeRepository(session), last_seen=tracker
+    )
+
+    def update(balance: float, state=BalanceChangeState.UPDATE):
+        return NewBalanceChangeRequest(
+            account_name="account", state=state, balance=balance
+        )
+
+    # первое обновление создает аккаунт, затем heartbeat, изменение, heartbeat,
+    # SHUTDOWN и UPDATE после него (аккаунт не активен - пишется)
+    results = await usecase.new_balance_updates(
+        [
+            update(10),
+            update(10),
+            update(12),
+            update(12),
+            update(12, BalanceChangeState.SHUTDOWN),
+            update(12),
+        ]
+    )
+    await session.commit()
+
+    assert [result.error for result in results] == [None] * 6
+    changes = (await session.execute(select(BalanceChange))).scalars().all()
+    assert len(changes) == 4
+    assert tracker.stats()["heartbeats"] == 2
+    assert tracker.stats()["pending"] == 1
+    assert isinstance(results[1].result, HeartbeatResponse)
+    assert not hasattr(results[1].result, "id")
+
+
+@pytest.mark.asyncio
+async def test_cached_heartbeat_skips_account_select(
+    clean_db: AsyncSession, database: Database
+):
+    session = clean_db
+    tracker = LastSeenTracker(database)
+    usecase = BalanceChangeUseCase(
+        AccountRepository(session),
+        BalanceChangeRepository(session),
+        account_cache=AccountCache(10),
+        last_seen=tracker,
+    )
+    dto = NewBalanceChangeRequest(
+        account_name="account", state=BalanceChangeState.UPDATE, balance=10
+    )
+    await usecase.new_balance_update(dto)
+    await session.commit()
+
+    statements: list[str] = []
+
+    def on_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    engine = session.bind.sync_engine
+    event.listen(engine, "before_cursor_execute", on_execute)
+    try:
+        response = await usecase.new_balance_update(dto)
+    finally:
+        event.remove(engine, "before_cursor_execute", on_execute)
+
+    assert isinstance(response, HeartbeatResponse)
+    assert statements == []
+
+
+@pytest.mark.asyncio
+async def test_cancelled_flush_keeps_pending(database: Database, monkeypatch):
+    tracker = LastSeenTracker(database)
+    account_id = uuid4()
+    tracker.touch(account_id)
+    started = asyncio.Event()
+
+    async def update_last_seen(self, pending):
+        started.set()
+        await asyncio.sleep(10)
+
+    monkeypatch.setattr(AccountRepository, "update_last_seen", update_last_seen)
+    flush = asyncio.create_task(tracker.flush())
+    await started.wait()
+    flush.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await flush
+
+    assert tracker.stats()["pending"] == 1
@@ -0,0 +1,136 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from uuid import uuid4
+
+from domain.entity.account import Account
+from domain.entity.balance_change import BalanceChange, BalanceChangeState
+
+from app.dto.balance_change import HistoryBucket
+from app.usecase.balance_change import BalanceChangeUseCase
+from infra.db.account import AccountRepository
+from infra.db.balance_change import BalanceChangeRepository
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+async def seed(session: AsyncSession, changes: list[tuple]) -> Account:
+    """changes: (minutes from START, state, balance)"""
+    account = Account(name="a", balance=0, last_balance_update=START)
+    session.add(account)
+    await session.flush()
+
+    balance = 0
+    rows = []
+    for minutes, state, new_balance in changes:
+        rows.append(
+            {
+                "id": uuid4(),
+                "created_at": START + timedelta(minutes=minutes),
+                "account_id": account.id,
+                "state_raw": state.value,
+                "state": state.value,
+                "balance": new_balance,
+                "balance_diff": new_balance - balance,
+            }
+        )
+        balance = new_balance
+    await session.execute(insert(BalanceChange.__table__), rows)
+    await session.commit()
+
+    return account
+
+
+def get_usecase(session: AsyncSession) -> BalanceChangeUseCase:
+    return BalanceChangeUseCase(
+        AccountRepository(session), BalanceChangeRepository(session)
+    )
+
+
+@pytest.mark.asyncio
+async def test_hour_buckets(clean_db: AsyncSession):
+    session = clean_db
+    update, deposit = BalanceChangeState.UPDATE, BalanceChangeState.DEPOSIT
+    account = await seed(
+        session,
+        [
+            (0, update, 100),
+            (10, update, 90),
+            (20, update, 130),
+            (50, update, 120),
+            (70, deposit, 170),  # второй час
+            (80, update, 160),
+            (200, update, 200),  # четвертый час, третий пустой
+        ],
+    )
+
+    buckets = await get_usecase(session).get_history_buckets(
+        account.id, None, None, HistoryBucket.HOUR
+    )
+
+    assert [bucket.start for bucket in buckets] == [
+        START,
+        START + timedelta(hours=1),
+        START + timedelta(hours=3),
+    ]
+    first, second, fourth = buckets
+    assert (first.open, first.close, first.min, first.max) == (100, 120, 90, 130)
+    assert (first.balance_diff, first.pnl, first.updates) == (120, 120, 4)
+    assert (second.open, second.close, second.min, second.max) == (170, 160, 160, 170)
+    assert (second.balance_diff, second.pnl, second.updates) == (40, -10, 2)
+    assert (fourth.open, fourth.close, fourth.updates) == (200, 200, 1)
+
+
+@pytest.mark.asyncio
+async def test_max_points_bounds_payload(clean_db: AsyncSession):
+    session = clean_db
+    changes = [
+        (minute, BalanceChangeState.UPDATE, minute % 37) for minute in range(0, 3000)
+    ]
+    account = await seed(session, changes)
+    usecase = get_usecase(session)
+
+    for max_points in (2, 10, 600):
+        buckets = await usecase.get_history_buckets(
+            account.id, None, None, None, max_points
+        )
+        assert 0 < len(buckets) <= max_points
+        assert sum(bucket.updates for bucket in buckets) == len(changes)
+        assert buckets[0].open == 0 and buckets[-1].close == 2999 % 37
+
+    # max_points не делает корзины мельче bucket
+    buckets = await usecase.get_history_buckets(
+        account.id, None, None, HistoryBucket.DAY, 600
+    )
+    assert len(buckets) == 3
+
+    # период задан - границы из него
+    buckets = await usecase.get_history_buckets(
+        account.id, START, START + timedelta(hours=1), None, 6
+    )
+    assert len(buckets) <= 6
+    assert sum(bucket.updates for bucket in buckets) == 60
+
+    assert await usecase.get_history_buckets(uuid4(), None, None, None, 10) == []
+
+
+@pytest.mark.asyncio
+async def test_fractional_seconds_stay_in_their_bucket(clean_db: AsyncSession):
+    session = clean_db
+    update = BalanceChangeState.UPDATE
+    # :59.4 и :59.94 - еще первая минута, округление унесло бы вторую дальше
+    account = await seed(
+        session, [(0.99, update, 100), (0.999, update, 110), (1, update, 120)]
+    )
+
+    buckets = await get_usecase(session).get_history_buckets(
+        account.id, None, None, HistoryBucket.MINUTE
+    )
+
+    assert [(bucket.start, bucket.updates) for bucket in buckets] == [
+        (START, 2),
+        (START + timedelta(minutes=1), 1),
+    ]
+    assert (buckets[0].open, buckets[0].close) == (100, 110)
@@ -0,0 +1,101 @@
+import pytest
+from sqlalchemy import event, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from domain.entity.account import Account
+
+from app.dto.balance_change import BalanceChangeState, NewBalanceChangeRequest
+from app.usecase.balance_change import BalanceChangeUseCase
+from app.usecase.history_cache import HistoryCache
+from infra.db.account import AccountRepository
+from infra.db.balance_change import BalanceChangeRepository
+from infra.utils.cache import SizedLRUCache
+
+
+def test_sized_cache_is_bounded_by_bytes():
+    cache: SizedLRUCache[str, bytes] = SizedLRUCache(
+        100, max_bytes=10, sizeof=len, max_entry_bytes=6
+    )
+    cache.put("a", b"1234")
+    cache.put("b", b"1234")
+    cache.get("a")
+    cache.put("c", b"1234")  # вытесняет b, а не прочитанный a
+
+    assert "a" in cache and "b" not in cache and "c" in cache
+    assert cache.bytes == 8 and cache.evictions == 1
+
+    cache.put("d", b"1234567")
+    assert "d" not in cache and cache.rejected == 1
+
+    cache.put("a", b"1")
+    cache.pop("c")
+    assert cache.bytes == 1
+    cache.clear()
+    assert cache.bytes == 0 and len(cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_history_served_from_cache_until_write(clean_db: AsyncSession):
+    session = clean_db
+    cache = HistoryCache(100, 1024 * 1024, 1024 * 1024)
+    usecase = BalanceChangeUseCase(
+        AccountRepository(session),
+        BalanceChangeRepository(session),
+        history_cache=cache,
+    )
+
+    async def update_balance(balance: float):
+        change = await usecase.new_balance_update(
+            NewBalanceChangeRequest(
+                account_name="a", state=BalanceChangeState.UPDATE, balance=balance
+            )
+        )
+        await session.commit()
+        return change.account_id
+
+    async def history(account_id) -> tuple[bytes, int]:
+        """Body and the number of statements it took, version check included."""
+        statements = []
+        engine = session.bind.sync_engine  # type: ignore
+
+        def listener(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            version = await usecase.get_history_version(account_id)
+            body = await usecase.get_change_json_for_account(
+                account_id, None, None, version
+            )
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+
+        return body, len(statements)
+
+    account_id = await update_balance(100)
+    first, queries = await history(account_id)
+    assert queries == 2
+    cached, queries = await history(account_id)
+    assert cached == first and queries == 1  # только версия
+
+    # запись этого процесса сбрасывает записи аккаунта
+    await update_balance(110)
+    assert len(cache._cache) == 0
+    second, queries = await history(account_id)
+    assert queries == 2 and second != first
+    assert second == (await history(account_id))[0]
+
+    # запись другого процесса - кэш не сброшен, но версия уже другая
+    await session.execute(
+        update(Account)
+        .where(Account.id == account_id)
+        .values(balance=120, version=Account.version + 1)
+    )
+    await session.commit()
+    _, queries = await history(account_id)
+    assert queries == 2
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (2, 3)
+    assert stats["invalidations"] == 1
+    assert stats["bytes"] == len(second)
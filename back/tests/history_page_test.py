@@ -0,0 +1,105 @@
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import insert, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from domain.entity.balance_change import BalanceChange, BalanceChangeState
+
+from app.dto.balance_change import NewBalanceChangeRequest
+from app.usecase.balance_change import BalanceChangeUseCase
+from app.usecase.errors import InvalidInputError
+from infra.db.account import AccountRepository
+from infra.db.balance_change import BalanceChangeRepository
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def get_usecase(session: AsyncSession) -> BalanceChangeUseCase:
+    return BalanceChangeUseCase(
+        AccountRepository(session), BalanceChangeRepository(session)
+    )
+
+
+@pytest.mark.asyncio
+async def test_pages_cover_history_in_order(clean_db: AsyncSession):
+    session = clean_db
+    account_id, other_id = uuid4(), uuid4()
+    rows = [
+        {
+            "id": uuid4(),
+            # по три изменения на одно время, id случайные - порядок по записи
+            "created_at": START + timedelta(seconds=i // 3),
+            "account_id": account_id,
+            "state_raw": BalanceChangeState.UPDATE.value,
+            "state": BalanceChangeState.UPDATE.value,
+            "balance": i,
+            "balance_diff": 1,
+        }
+        for i in range(50)
+    ]
+    other = dict(rows[0], id=uuid4(), account_id=other_id)
+    await session.execute(insert(BalanceChange.__table__), rows + [other])
+    await session.commit()
+    expected = [row["id"] for row in rows]
+    usecase = get_usecase(session)
+
+    ids, cursor, pages = [], None, 0
+    while True:
+        page = await usecase.get_change_page_for_account(
+            account_id, None, None, 7, cursor
+        )
+        pages += 1
+        ids += [item.id for item in page.items]
+        if page.next_cursor is None:
+            break
+        cursor = page.next_cursor
+    assert ids == expected
+    assert pages == 8
+
+    # полная история в том же порядке
+    history = await usecase.get_change_for_account(account_id, None, None)
+    assert [item.id for item in history] == expected
+
+    # ровно на границе страницы следующей нет
+    page = await usecase.get_change_page_for_account(account_id, None, None, 50)
+    assert len(page.items) == 50 and page.next_cursor is None
+
+    # курсор и период вместе
+    page = await usecase.get_change_page_for_account(
+        account_id, None, START + timedelta(seconds=3), 4
+    )
+    page = await usecase.get_change_page_for_account(
+        account_id, None, START + timedelta(seconds=3), 4, page.next_cursor
+    )
+    assert [item.id for item in page.items] == expected[4:8]
+    assert page.next_cursor is not None
+
+    for cursor in ("", "not a cursor", "bm90IGEgY3Vyc29y"):
+        with pytest.raises(InvalidInputError):
+            await usecase.get_change_page_for_account(
+                account_id, None, None, 10, cursor
+            )
+
+
+@pytest.mark.asyncio
+async def test_equal_timestamps_keep_write_order(clean_db: AsyncSession):
+    session = clean_db
+    usecase = get_usecase(session)
+    balances = [float(balance) for balance in (5, 3, 9, 1, 7, 2)]
+
+    for balance in balances:
+        change = await usecase.new_balance_update(
+            NewBalanceChangeRequest(
+                account_name="a", state=BalanceChangeState.UPDATE, balance=balance
+            )
+        )
+    # в Postgres now() один на транзакцию, в SQLite - на запрос с точностью
+    # до секунды, поэтому одинаковое время выставляем сами
+    await session.execute(update(BalanceChange).values(created_at=START))
+    await session.commit()
+
+    history = await usecase.get_change_for_account(change.account_id, None, None)
+    assert len({item.created_at for item in history}) == 1
+    assert [item.balance for item in history] == balances
@@ -0,0 +1,72 @@
+import json
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+from pydantic import TypeAdapter
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from domain.entity.balance_change import BalanceChange, BalanceChangeState
+
+from app.dto.balance_change import HistoryFormat
+from app.dto.balance_change import BalanceChangeResponse
+from app.usecase.balance_change import BalanceChangeUseCase
+from infra.db.account import AccountRepository
+from infra.db.balance_change import BalanceChangeRepository
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+history_items = TypeAdapter(list[BalanceChangeResponse])
+
+
+async def collect(usecase: BalanceChangeUseCase, *args) -> list[bytes]:
+    return [chunk async for chunk in usecase.stream_change_for_account(*args)]
+
+
+@pytest.mark.asyncio
+async def test_stream_matches_history(clean_db: AsyncSession):
+    session = clean_db
+    account_id = uuid4()
+    await session.execute(
+        insert(BalanceChange.__table__),
+        [
+            {
+                "id": uuid4(),
+                "created_at": START + timedelta(minutes=i),
+                "account_id": account_id,
+                "state_raw": BalanceChangeState.UPDATE.value,
+                "state": BalanceChangeState.UPDATE.value,
+                "balance": i,
+                "balance_diff": 1,
+            }
+            for i in range(2500)
+        ],
+    )
+    await session.commit()
+    usecase = BalanceChangeUseCase(
+        AccountRepository(session), BalanceChangeRepository(session)
+    )
+
+    history = await usecase.get_change_for_account(account_id, None, None)
+    chunks = await collect(usecase, account_id, None, None)
+    # по пачке курсора на чанк, плюс скобки
+    assert len(chunks) == 3 + 2
+    assert b"".join(chunks) == history_items.dump_json(history)
+    # без потока - те же байты
+    assert await usecase.get_change_json_for_account(
+        account_id, None, None
+    ) == history_items.dump_json(history)
+
+    chunks = await collect(usecase, account_id, None, None, HistoryFormat.NDJSON)
+    lines = b"".join(chunks).splitlines()
+    assert [json.loads(line)["id"] for line in lines] == [
+        str(item.id) for item in history
+    ]
+
+    date_to = START + timedelta(minutes=10)
+    chunks = await collect(usecase, account_id, None, date_to)
+    assert len(json.loads(b"".join(chunks))) == 10
+
+    assert b"".join(await collect(usecase, uuid4(), None, None)) == b"[]"
+    assert await collect(usecase, uuid4(), None, None, HistoryFormat.NDJSON) == []
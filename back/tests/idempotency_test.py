@@ -0,0 +1,198 @@
+import pytest
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from domain.entity.balance_change import BalanceChange
+
+from app.usecase.account_cache import AccountCache
+from app.usecase.balance_change import BalanceChangeUseCase
+from app.dto.balance_change import NewBalanceChangeRequest, BalanceChangeState
+from infra.db.account import AccountRepository
+from infra.db.balance_change import BalanceChangeRepository
+from infra.db.ingestion import IngestionRepository
+from infra.utils.cache import LRUCache
+
+
+def update(balance: float, key: str | None) -> NewBalanceChangeRequest:
+    return NewBalanceChangeRequest(
+        account_name="account",
+        state=BalanceChangeState.UPDATE,
+        balance=balance,
+        idempotency_key=key,
+    )
+
+
+async def count_changes(session: AsyncSession) -> int:
+    return await session.scalar(select(func.count()).select_from(BalanceChange))
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("with_cache", [False, True])
+@pytest.mark.parametrize("single_statement", [False, True])
+async def test_retry_returns_stored_change(
+    clean_db: AsyncSession, with_cache: bool, single_statement: bool
+):
+    session = clean_db
+    usecase = BalanceChangeUseCase(
+        AccountRepository(session),
+        BalanceChangeRepository(session),
+        ingestion_repository=IngestionRepository(session) if single_statement else None,
+        idempotency_cache=LRUCache(100, ttl=60) if with_cache else None,
+    )
+
+    first = await usecase.new_balance_update(update(100, "k1"))
+    await session.commit()
+    retry = await usecase.new_balance_update(update(100, "k1"))
+    await session.commit()
+
+    assert retry.id == first.id
+    assert await count_changes(session) == 1
+
+    # тот же ключ другого аккаунта - другое изменение
+    other = await usecase.new_balance_update(
+        NewBalanceChangeRequest(
+            account_name="other",
+            state=BalanceChangeState.UPDATE,
+            balance=100,
+            idempotency_key="k1",
+        )
+    )
+    await session.commit()
+    assert other.id != first.id
+
+    # без ключа повторы не схлопываются
+    await usecase.new_balance_update(update(110, None))
+    await usecase.new_balance_update(update(110, None))
+    await session.commit()
+    assert await count_changes(session) == 4
+
+
+@pytest.mark.asyncio
+async def test_batch_deduplicates_keys(clean_db: AsyncSession):
+    session = clean_db
+    usecase = BalanceChangeUseCase(
+        AccountRepository(session), BalanceChangeRepository(session)
+    )
+
+    stored = await usecase.new_balance_update(update(100, "k1"))
+    await session.commit()
+
+    results = await usecase.new_balance_updates(
+        [update(100, "k1"), update(120, "k2"), update(120, "k2"), update(130, None)]
+    )
+    await session.commit()
+
+    assert [result.error for result in results] == [None] * 4
+    assert results[0].result.id == stored.id
+    assert results[1].result.id == results[2].result.id
+    assert results[3].result.balance_diff == 10
+    assert await count_changes(session) == 3
+
+    account = await usecase.account_repository.get_by_name("account")
+    assert account.balance == 130
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("with_cache", [False, True])
+@pytest.mark.parametrize("single_statement", [False, True])
+async def test_retry_racing_uncommitted_original(
+    clean_db: AsyncSession, with_cache: bool, single_statement: bool
+):
+    session = clean_db
+    changes = BalanceChangeRepository(session)
+    usecase = BalanceChangeUseCase(
+        AccountRepository(session),
+        changes,
+        account_cache=AccountCache(10) if with_cache else None,
+        ingestion_repository=IngestionRepository(session) if single_statement else None,
+    )
+
+    await usecase.new_balance_update(update(90, None))
+    first = await usecase.new_balance_update(update(100, "k1"))
+    await session.commit()
+    version = await usecase.account_repository.get_version(first.account_id)
+
+    # повтор пришел, пока оригинал еще не закоммичен: поиск ключа его не видит
+    lookup = changes.get_by_idempotency_key
+    misses = [True]
+
+    async def racing_lookup(account_name: str, idempotency_key: str):
+        if misses and misses.pop():
+            return None
+        return await lookup(account_name, idempotency_key)
+
+    changes.get_by_idempotency_key = racing_lookup  # type: ignore
+    retry = await usecase.new_balance_update(update(100, "k1"))
+    await session.commit()
+
+    assert retry == first
+    assert await count_changes(session) == 2
+    # запись повтора откатилась вместе с обновлением аккаунта
+    assert await usecase.account_repository.get_version(first.account_id) == version
+
+    # сессия после отката точки сохранения рабочая
+    after = await usecase.new_balance_update(update(110, "k2"))
+    await session.commit()
+    assert after.balance_diff == 10
+    assert await count_changes(session) == 3
+
+
+@pytest.mark.asyncio
+async def test_batch_looks_up_keys_after_locking_accounts(clean_db: AsyncSession):
+    session = clean_db
+    usecase = BalanceChangeUseCase(
+        AccountRepository(session), BalanceChangeRepository(session)
+    )
+    await usecase.new_balance_update(update(100, None))
+    await session.commit()
+
+    statements = []
+    engine = session.bind.sync_engine  # type: ignore
+
+    def listener(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        await usecase.new_balance_updates([update(110, "k1"), update(120, None)])
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    await session.commit()
+
+    def first(fragment: str) -> int:
+        return next(i for i, sql in enumerate(statements) if fragment in sql)
+
+    # до блокировки строк незакоммиченный оригинал повтора не виден
+    assert first("FROM accounts \nWHERE accounts.name IN") < first(
+        "balance_changes.idempotency_key) IN"
+    )
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("batch", [False, True])
+async def test_retry_after_rollback_writes_change(clean_db: AsyncSession, batch: bool):
+    session = clean_db
+    cache = LRUCache(100, ttl=60)
+    usecase = BalanceChangeUseCase(
+        AccountRepository(session),
+        BalanceChangeRepository(session),
+        idempotency_cache=cache,
+    )
+
+    async def send(dto: NewBalanceChangeRequest):
+        if batch:
+            return (await usecase.new_balance_updates([dto]))[0].result
+
+        return await usecase.new_balance_update(dto)
+
+    await send(update(100, "k1"))
+    # оригинал откатился (ошибка дальше в запросе, таймаут) - в кеше его нет
+    await session.rollback()
+    assert cache.get(("account", "k1")) is None
+
+    retry = await send(update(100, "k1"))
+    await session.commit()
+
+    assert await count_changes(session) == 1
+    assert cache.get(("account", "k1")) == retry
+    assert (await send(update(100, "k1"))).id == retry.id
@@ -0,0 +1,93 @@
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import event, inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from infra.db.account import AccountRepository
+from infra.db.balance_change import BalanceChangeRepository
+
+
+class Plans:
+    """Query plans of the SELECTs sent to the database."""
+
+    def __init__(self):
+        self.statements: list[tuple[str, tuple]] = []
+
+    def _statement(self, conn, cursor, statement, parameters, *args):
+        if statement.lstrip().startswith("SELECT"):
+            self.statements.append((statement, parameters))
+
+    async def explain(self, session: AsyncSession) -> list[str]:
+        plans = []
+        for statement, parameters in self.statements:
+            connection = await session.connection()
+            result = await connection.exec_driver_sql(
+                f"EXPLAIN QUERY PLAN {statement}", parameters
+            )
+            plans.append(" | ".join(row[-1] for row in result))
+
+        return plans
+
+
+async def explain(session: AsyncSession, query) -> list[str]:
+    engine = session.bind.sync_engine  # type: ignore
+    plans = Plans()
+    event.listen(engine, "before_cursor_execute", plans._statement)
+    try:
+        await query
+    finally:
+        event.remove(engine, "before_cursor_execute", plans._statement)
+
+    return await plans.explain(session)
+
+
+@pytest.mark.asyncio
+async def test_history_queries_use_account_created_at_seq_index(
+    db_session: AsyncSession,
+):
+    repo = BalanceChangeRepository(db_session)
+    account_id = uuid4()
+    date_from = datetime.now(timezone.utc) - timedelta(days=1)
+    date_to = datetime.now(timezone.utc)
+    index = "INDEX ix_balance_changes_account_id_created_at_seq"
+
+    queries = [
+        repo.get_by_account_id(account_id, date_from, date_to),
+        repo.get_by_account_id(account_id, date_from, None),
+        # следующая страница - тот же поиск по индексу, с курсора
+        repo.get_by_account_id(account_id, None, None, 100, (date_from, 42)),
+        repo.get_pnl(account_id, date_from, date_to),
+        repo.get_period_bounds(account_id),
+    ]
+    for query in queries:
+        plans = await explain(db_session, query)
+        assert len(plans) == 1
+        assert index in plans[0], plans[0]
+        assert "SCAN balance_changes" not in plans[0]
+
+    # без периода - все равно поиск по аккаунту, а не полный просмотр
+    plans = await explain(db_session, repo.get_by_account_id(account_id, None, None))
+    assert "SEARCH balance_changes" in plans[0], plans[0]
+
+
+@pytest.mark.asyncio
+async def test_primary_keys_have_no_duplicate_index(db_session: AsyncSession):
+    def index_names(connection) -> dict[str, list[str]]:
+        inspector = inspect(connection)
+        return {
+            table: [index["name"] for index in inspector.get_indexes(table)]
+            for table in inspector.get_table_names()
+        }
+
+    connection = await db_session.connection()
+    indexes = await connection.run_sync(index_names)
+
+    for table, names in indexes.items():
+        assert f"ix_{table}_id" not in names
+    assert "ix_balance_changes_account_id_created_at_seq" in indexes["balance_changes"]
+
+    # аккаунт по имени - через уникальный индекс
+    plans = await explain(db_session, AccountRepository(db_session).get_by_name("a"))
+    assert "USING INDEX" in plans[0], plans[0]
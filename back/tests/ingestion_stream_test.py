@@ -0,0 +1,61 @@
+import json
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from domain.entity.balance_change import BalanceChange
+
+from app.usecase.ingestion_stream import IngestionStream
+from infra.db.conn import Database
+
+
+def frame(balance: float, state: str = "update") -> bytes:
+    return json.dumps(
+        {"account_name": "account", "state": state, "balance": balance}
+    ).encode()
+
+
+async def chunked(*chunks: bytes):
+    for chunk in chunks:
+        yield chunk
+
+
+async def read_acks(stream: IngestionStream, *chunks: bytes) -> list[dict]:
+    return [json.loads(ack) async for ack in stream.run(chunked(*chunks))]
+
+
+@pytest.mark.asyncio
+async def test_stream_acks_every_frame_in_order(
+    clean_db: AsyncSession, database: Database, usecase_factory
+):
+    session = clean_db
+    stream = IngestionStream(database, usecase_factory, max_batch=2)
+
+    body = b"\n".join(
+        [frame(10), frame(15), b"not json", frame(1, "deposit"), b"", frame(20)]
+    )
+    # кадры режутся между чанками как угодно, последний без перевода строки
+    acks = await read_acks(stream, body[:30], body[30:75], body[75:])
+
+    assert [ack["index"] for ack in acks] == [0, 1, 2, 3, 4]
+    assert [ack["error"] is None for ack in acks] == [True, True, False, False, True]
+    assert [acks[i]["result"]["balance_diff"] for i in (0, 1, 4)] == [0, 5, 5]
+
+    changes = (await session.execute(select(BalanceChange))).scalars().all()
+    assert len(changes) == 3
+    stats = stream.stats()
+    assert (stats["frames"], stats["failed_frames"]) == (5, 2)
+
+
+@pytest.mark.asyncio
+async def test_stream_rejects_oversized_frame(
+    clean_db: AsyncSession, database: Database, usecase_factory
+):
+    stream = IngestionStream(database, usecase_factory, max_frame_bytes=100)
+
+    acks = await read_acks(stream, frame(10) + b"\n", b"x" * 101, frame(20))
+
+    assert acks[0]["error"] is None
+    assert acks[1] == {"index": 1, "result": None, "error": "Frame is too large"}
+    assert len(acks) == 2
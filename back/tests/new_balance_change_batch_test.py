@@ -0,0 +1,168 @@
+from datetime import datetime
+import pytest
+import pytest_asyncio
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from domain.entity.account import Account
+from domain.entity.balance_change import BalanceChange
+
+from app.usecase.balance_change import BalanceChangeUseCase
+from app.dto.balance_change import (
+    BalanceChangeState,
+    HistoryBucket,
+    NewBalanceChangeRequest,
+)
+from infra.db.account import AccountRepository
+from infra.db.balance_change import BalanceChangeRepository
+
+
+async def clean_tables(db_session: AsyncSession):
+    await db_session.execute(delete(BalanceChange))
+    await db_session.execute(delete(Account))
+    await db_session.commit()
+
+
+@pytest_asyncio.fixture
+async def account() -> Account:
+    return Account(name="account", balance=100, last_balance_update=datetime.now())
+
+
+@pytest_asyncio.fixture
+async def ready_db_session(db_session: AsyncSession, account: Account):
+    await clean_tables(db_session)
+    db_session.add(account)
+    await db_session.commit()
+    await db_session.refresh(account)
+
+    return db_session, account
+
+
+def get_usecase(session: AsyncSession) -> BalanceChangeUseCase:
+    account_repo = AccountRepository(session)
+    balance_change_repo = BalanceChangeRepository(session)
+
+    return BalanceChangeUseCase(account_repo, balance_change_repo)
+
+
+@pytest.mark.asyncio
+async def test_batch_chains_updates_per_account(
+    ready_db_session: tuple[AsyncSession, Account],
+):
+    session, account = ready_db_session
+
+    usecase = get_usecase(session)
+    dtos = [
+        NewBalanceChangeRequest(
+            account_name=account.name, state=BalanceChangeState.UPDATE, balance=150
+        ),
+        NewBalanceChangeRequest(
+            account_name="new_account", state=BalanceChangeState.UPDATE, balance=10
+        ),
+        NewBalanceChangeRequest(
+            account_name=account.name, state=BalanceChangeState.LOCK, balance=120
+        ),
+        NewBalanceChangeRequest(
+            account_name="new_account", state=BalanceChangeState.SHUTDOWN, balance=15
+        ),
+    ]
+
+    results = await usecase.new_balance_updates(dtos)
+    assert [item.index for item in results] == [0, 1, 2, 3]
+    assert all(item.error is None for item in results)
+    assert [item.result.balance_diff for item in results] == [50, 0, -30, 5]
+    assert results[2].result.state == BalanceChangeState.LOCK
+
+    await session.refresh(account)
+    assert account.balance == 120
+    assert account.is_balance_fixed
+    assert account.is_active
+
+    new_account = await usecase.account_repository.get_by_name("new_account")
+    assert new_account.balance == 15
+    assert new_account.is_balance_fixed
+    assert not new_account.is_active
+
+
+@pytest.mark.asyncio
+async def test_batch_fixed_balance_rules(
+    ready_db_session: tuple[AsyncSession, Account],
+):
+    session, account = ready_db_session
+
+    usecase = get_usecase(session)
+    dtos = [
+        NewBalanceChangeRequest(
+            account_name=account.name, state=BalanceChangeState.LOCK, balance=100
+        ),
+        NewBalanceChangeRequest(
+            account_name=account.name, state=BalanceChangeState.UPDATE, balance=80
+        ),
+    ]
+
+    results = await usecase.new_balance_updates(dtos)
+    assert results[0].result.state == BalanceChangeState.LOCK
+    assert results[1].result.state == BalanceChangeState.WITHDRAW
+    assert results[1].result.state_raw == BalanceChangeState.UPDATE
+
+    await session.refresh(account)
+    assert not account.is_balance_fixed
+
+
+@pytest.mark.asyncio
+async def test_batch_invalid_item_does_not_fail_batch(
+    ready_db_session: tuple[AsyncSession, Account],
+):
+    session, account = ready_db_session
+
+    usecase = get_usecase(session)
+    dtos = [
+        NewBalanceChangeRequest(
+            account_name="other", state=BalanceChangeState.DEPOSIT, balance=200
+        ),
+        NewBalanceChangeRequest(
+            account_name=account.name, state=BalanceChangeState.UPDATE, balance=200
+        ),
+    ]
+
+    results = await usecase.new_balance_updates(dtos)
+    assert results[0].result is None
+    assert results[0].error
+    assert results[1].result.balance_diff == 100
+
+    # невалидный элемент не создает аккаунт
+    assert await usecase.account_repository.get_by_name("other") is None
+
+    changes = (await session.execute(select(BalanceChange))).scalars().all()
+    assert len(changes) == 1
+
+
+@pytest.mark.asyncio
+async def test_batch_keeps_order_of_one_account_in_history(
+    ready_db_session: tuple[AsyncSession, Account],
+):
+    session, account = ready_db_session
+    usecase = get_usecase(session)
+    balances = [10.0, 20.0, 5.0, 7.0]
+
+    await usecase.new_balance_updates(
+        [
+            NewBalanceChangeRequest(
+                account_name=account.name,
+                state=BalanceChangeState.UPDATE,
+                balance=balance,
+            )
+            for balance in balances
+        ]
+    )
+    await session.commit()
+
+    history = await usecase.get_change_for_account(account.id, None, None)
+    assert [change.balance for change in history] == balances
+    # время сервера одно на транзакцию, порядок держит seq
+    assert len({change.created_at for change in history}) == 1
+
+    (day,) = await usecase.get_history_buckets(
+        account.id, None, None, HistoryBucket.DAY
+    )
+    assert (day.open, day.close) == (10, 7)
@@ -0,0 +1,103 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+from app.usecase.account import AccountUseCase
+from app.usecase.balance_change import BalanceChangeUseCase
+from app.dto.balance_change import NewBalanceChangeRequest, BalanceChangeState
+from infra.db.account import AccountRepository
+from infra.db.balance_change import BalanceChangeRepository
+
+
+def get_usecase(session: AsyncSession) -> BalanceChangeUseCase:
+    return BalanceChangeUseCase(
+        AccountRepository(session), BalanceChangeRepository(session)
+    )
+
+
+@pytest.mark.asyncio
+async def test_pnl_matches_history(clean_db: AsyncSession):
+    session = clean_db
+    usecase = get_usecase(session)
+
+    updates = [
+        (BalanceChangeState.UPDATE, 100),
+        (BalanceChangeState.UPDATE, 120.1),  # +20.1
+        (BalanceChangeState.LOCK, 120.1),
+        (BalanceChangeState.UPDATE, 170.1),  # пополнение +50
+        (BalanceChangeState.UPDATE, 160),  # -10.1
+        (BalanceChangeState.LOCK, 160),
+        (BalanceChangeState.UPDATE, 100),  # вывод -60
+    ]
+    for state, balance in updates:
+        change = await usecase.new_balance_update(
+            NewBalanceChangeRequest(account_name="a", state=state, balance=balance)
+        )
+        await session.commit()
+    account_id = change.account_id
+
+    pnl = await usecase.get_pnl_for_account(account_id, None, None)
+    assert pnl.pnl == 10
+    assert pnl.deposits == 50
+    assert pnl.withdrawals == -60
+    assert pnl.updates == len(updates)
+
+    # то же, что считает клиент по истории
+    history = await usecase.get_change_for_account(account_id, None, None)
+    excluded = {BalanceChangeState.DEPOSIT, BalanceChangeState.WITHDRAW}
+    assert pnl.pnl == round(
+        sum(item.balance_diff for item in history if item.state not in excluded), 2
+    )
+
+    # пустой период - нули
+    before = datetime.now(timezone.utc) - timedelta(days=1)
+    empty = await usecase.get_pnl_for_account(account_id, None, before)
+    assert empty.pnl == empty.deposits == empty.withdrawals == empty.updates == 0
+
+
+@pytest.mark.asyncio
+async def test_summary_has_every_account_in_one_query(clean_db: AsyncSession):
+    session = clean_db
+    usecase = get_usecase(session)
+
+    for name, balances in [("a", [100, 110, 105]), ("b", [50, 70]), ("c", [10])]:
+        for balance in balances:
+            await usecase.new_balance_update(
+                NewBalanceChangeRequest(
+                    account_name=name, state=BalanceChangeState.UPDATE, balance=balance
+                )
+            )
+        await session.commit()
+
+    statements = []
+    engine = session.bind.sync_engine  # type: ignore
+
+    def listener(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        summaries = await AccountUseCase(AccountRepository(session)).get_summaries(
+            None, None
+        )
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    assert len(statements) == 1
+    assert [summary.name for summary in summaries] == ["a", "b", "c"]
+    for summary in summaries:
+        pnl = await usecase.get_pnl_for_account(summary.id, None, None)
+        assert (summary.pnl, summary.updates) == (pnl.pnl, pnl.updates)
+    assert [summary.pnl for summary in summaries] == [5, 20, 0]
+    assert summaries[0].balance == 105
+
+    # аккаунт без изменений за период тоже в списке, с нулями
+    future = datetime.now(timezone.utc) + timedelta(days=1)
+    summaries = await AccountUseCase(AccountRepository(session)).get_summaries(
+        future, None
+    )
+    assert len(summaries) == 3
+    assert all(summary.updates == 0 and summary.pnl == 0 for summary in summaries)
@@ -0,0 +1,117 @@
+import pytest
+
+from app.usecase.errors import TooManyRequestsError, UnauthorizedError
+from app.usecase.rate_limit import IngestionRateLimiter
+from infra.utils import rate_limit
+from infra.utils.config import RateLimitConfig
+from presentation.rest.deps import check_api_secret
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(rate_limit.time, "monotonic", clock)
+
+    return clock
+
+
+def test_account_bucket_refills_and_reports_retry_after(clock: Clock):
+    limiter = IngestionRateLimiter(RateLimitConfig(account_rate=2, account_burst=3))
+
+    for _ in range(3):
+        limiter.admit("key", ["a"])
+    # другие аккаунты того же ключа не задеты
+    limiter.admit("key", ["b"])
+
+    with pytest.raises(TooManyRequestsError) as e:
+        limiter.admit("key", ["a"])
+    assert e.value.retry_after == pytest.approx(0.5)
+
+    clock.now += 0.5
+    limiter.admit("key", ["a"])
+
+    stats = limiter.stats()
+    assert stats["admitted"] == 5
+    assert stats["rejected"] == 1
+    assert list(stats["rejected_by_key"].values()) == [1]
+    assert "key" not in stats["rejected_by_key"]
+
+
+def test_rejected_batch_is_not_charged(clock: Clock):
+    limiter = IngestionRateLimiter(
+        RateLimitConfig(key_rate=1, key_burst=4, account_rate=1, account_burst=2)
+    )
+
+    limiter.admit("key", ["a", "a"])
+    # "a" не проходит - токены ключа и "b" возвращаются
+    with pytest.raises(TooManyRequestsError):
+        limiter.admit("key", ["b", "a"])
+
+    limiter.admit("key", ["b", "b"])
+    with pytest.raises(TooManyRequestsError) as e:
+        limiter.admit("key", ["c"])
+    assert e.value.retry_after == pytest.approx(1)
+
+    # у другого ключа свои корзины
+    limiter.admit("other", ["a"])
+
+
+def test_disabled_limiter_admits_everything():
+    limiter = IngestionRateLimiter(RateLimitConfig())
+
+    assert not limiter.enabled
+    for _ in range(10_000):
+        limiter.admit("key", ["a"])
+
+
+def test_buckets_evict_least_recently_used(clock: Clock):
+    buckets = rate_limit.TokenBuckets(rate=1, burst=2, max_keys=2)
+
+    buckets.acquire("hot", 2)
+    buckets.acquire("cold")
+    buckets.acquire("hot")
+    # новый ключ вытесняет "cold", а не раньше созданный "hot"
+    buckets.acquire("new")
+
+    assert buckets.acquire("hot") > 0
+
+
+@pytest.mark.asyncio
+async def test_failed_verifications_are_limited_before_the_check(clock: Clock):
+    class Request:
+        client = type("Client", (), {"host": "10.0.0.1"})
+
+    class ApiSecretUseCase:
+        checks = 0
+
+        async def validate_api_secret(self, secret: str) -> bool:
+            self.checks += 1
+            if secret != "good":
+                raise UnauthorizedError("Invalid token")
+
+            return True
+
+    limiter = IngestionRateLimiter(RateLimitConfig(verify_rate=1, verify_burst=2))
+    use_case = ApiSecretUseCase()
+
+    # удачные проверки токен возвращают
+    for _ in range(5):
+        await check_api_secret(limiter, use_case, Request(), "good")
+
+    for _ in range(2):
+        with pytest.raises(UnauthorizedError):
+            await check_api_secret(limiter, use_case, Request(), "bad")
+    with pytest.raises(TooManyRequestsError):
+        await check_api_secret(limiter, use_case, Request(), "bad")
+
+    # отказ лимитом не дошел до проверки секрета
+    assert use_case.checks == 7
+    assert limiter.stats()["rejected_verifications"] == 1
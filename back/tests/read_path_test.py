@@ -0,0 +1,42 @@
+from datetime import datetime, timezone
+
+import pytest
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from domain.entity.account import Account
+
+from app.dto.account import AccountResponse
+from app.usecase.account import AccountUseCase
+from infra.db.account import AccountRepository
+
+
+@pytest.mark.asyncio
+async def test_accounts_json_matches_models(clean_db: AsyncSession):
+    session = clean_db
+    repo = AccountRepository(session)
+    now = datetime.now(timezone.utc)
+    for name, balance, last_seen_at in [
+        ("b", 10, None),
+        ("a", 12.35, now),
+        ("c", -1, now),
+    ]:
+        await repo.create(
+            Account(
+                name=name,
+                balance=balance,
+                last_balance_update=now,
+                last_seen_at=last_seen_at,
+            )
+        )
+    await session.commit()
+    usecase = AccountUseCase(repo)
+
+    session.expunge_all()
+    body = await usecase.get_accounts_json()
+    # строки не попадают в identity map сессии
+    assert not session.identity_map
+
+    accounts = await usecase.get_accounts()
+    assert body == TypeAdapter(list[AccountResponse]).dump_json(accounts)
+    assert [account.name for account in accounts] == ["a", "b", "c"]
@@ -0,0 +1,155 @@
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from domain.entity.account import Account
+from domain.entity.balance_change import BalanceChange, BalanceChangeState
+from domain.entity.user import User
+
+from infra.db.account import AccountRepository
+from infra.db.balance_change import BalanceChangeRepository
+from infra.db.user import UserRepository
+
+
+class Statements:
+    """First keyword of every statement sent to the database."""
+
+    def __init__(self):
+        self.sql: list[str] = []
+
+    def clear(self) -> None:
+        self.sql.clear()
+
+    def _statement(self, conn, cursor, statement, *args):
+        self.sql.append(statement.split()[0])
+
+
+@pytest.fixture
+def statements(db_session: AsyncSession):
+    engine = db_session.bind.sync_engine  # type: ignore
+    statements = Statements()
+    event.listen(engine, "before_cursor_execute", statements._statement)
+    yield statements
+    event.remove(engine, "before_cursor_execute", statements._statement)
+
+
+async def commit(session: AsyncSession, statements: Statements) -> list[str]:
+    """Commits and returns what was sent: nothing may be left for the flush."""
+    await session.commit()
+
+    return statements.sql
+
+
+def new_account(name: str, balance: float = 10) -> Account:
+    return Account(
+        name=name, balance=balance, last_balance_update=datetime.now(timezone.utc)
+    )
+
+
+def new_change(account: Account, balance: float) -> BalanceChange:
+    return BalanceChange(
+        account_id=account.id,
+        state_raw=BalanceChangeState.UPDATE,
+        state=BalanceChangeState.UPDATE,
+        balance=balance,
+        balance_diff=balance - account.balance,
+    )
+
+
+@pytest.mark.asyncio
+async def test_account_repository_writes(clean_db: AsyncSession, statements):
+    session = clean_db
+    repo = AccountRepository(session)
+
+    statements.clear()
+    account = await repo.create(new_account("a"))
+    assert await commit(session, statements) == ["INSERT"]
+    assert account.id is not None and account.created_at is not None
+    assert account.is_active and not account.is_balance_fixed
+
+    statements.clear()
+    account.balance = 20
+    await repo.update(account)
+    assert await commit(session, statements) == ["UPDATE"]
+
+    statements.clear()
+    existing = await repo.create_if_not_exists(new_account("a", balance=99))
+    created = await repo.create_if_not_exists(new_account("b"))
+    assert await commit(session, statements) == ["INSERT", "INSERT"]
+    assert existing.id == account.id and existing.balance == 20
+    assert created.balance == 10 and created.created_at is not None
+
+    accounts = await repo.get_by_names(["a", "b"])
+    statements.clear()
+    for stored in accounts:
+        stored.balance += 1
+    await repo.update_many(accounts)
+    assert await commit(session, statements) == ["UPDATE"]
+
+    statements.clear()
+    await repo.create_many_if_not_exists([new_account("b"), new_account("c")])
+    await repo.update_last_seen({account.id: datetime.now(timezone.utc)})
+    assert await commit(session, statements) == ["INSERT", "UPDATE"]
+
+    session.expire_all()
+    balances = {stored.name: stored.balance for stored in await repo.get_all()}
+    assert balances == {"a": 21, "b": 11, "c": 10}
+
+
+@pytest.mark.asyncio
+async def test_balance_change_repository_writes(clean_db: AsyncSession, statements):
+    session = clean_db
+    account = await AccountRepository(session).create(new_account("a"))
+    await session.commit()
+    repo = BalanceChangeRepository(session)
+
+    statements.clear()
+    change = await repo.create(new_change(account, 15))
+    assert await commit(session, statements) == ["INSERT"]
+    assert change.id is not None and change.created_at is not None
+
+    statements.clear()
+    change.balance_diff = 0
+    await repo.update(change)
+    assert await commit(session, statements) == ["UPDATE"]
+
+    statements.clear()
+    changes = await repo.create_many(
+        [new_change(account, balance) for balance in (1, 2, 3)]
+    )
+    assert await commit(session, statements) == ["INSERT"]
+    assert [change.balance for change in changes] == [1, 2, 3]
+    assert all(change.created_at is not None for change in changes)
+
+    session.expire_all()
+    stored = (await session.execute(select(BalanceChange))).scalars().all()
+    assert sorted(change.balance for change in stored) == [1, 2, 3, 15]
+    assert {change.balance_diff for change in stored if change.balance == 15} == {0}
+
+
+@pytest.mark.asyncio
+async def test_user_repository_writes(clean_db: AsyncSession, statements):
+    session = clean_db
+    repo = UserRepository(session)
+
+    statements.clear()
+    user = await repo.create(
+        User(
+            username="user",
+            last_login=datetime.now(timezone.utc),
+            password_hash="hash",
+        )
+    )
+    assert await commit(session, statements) == ["INSERT"]
+    assert user.id is not None and user.created_at is not None
+
+    statements.clear()
+    user.password_hash = "other"
+    await repo.update(user)
+    await repo.update_last_login(user.id, datetime.now(timezone.utc))
+    assert await commit(session, statements) == ["UPDATE", "UPDATE"]
+
+    session.expire_all()
+    assert (await repo.get_by_name("user")).password_hash == "other"  # type: ignore
@@ -0,0 +1,131 @@
+from datetime import datetime
+from itertools import product
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from domain.entity.account import Account
+
+from app.usecase.balance_change import BalanceChangeUseCase
+from app.dto.balance_change import NewBalanceChangeRequest, BalanceChangeState
+from infra.db.account import AccountRepository
+from infra.db.balance_change import BalanceChangeRepository
+from infra.db.ingestion import IngestionRepository
+
+
+def get_usecase(session: AsyncSession, single_statement: bool) -> BalanceChangeUseCase:
+    return BalanceChangeUseCase(
+        AccountRepository(session),
+        BalanceChangeRepository(session),
+        ingestion_repository=IngestionRepository(session) if single_statement else None,
+    )
+
+
+STATES = [
+    BalanceChangeState.UPDATE,
+    BalanceChangeState.LOCK,
+    BalanceChangeState.SHUTDOWN,
+]
+DELTAS = [0, 12.34, -5.5]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "is_balance_fixed,is_active", list(product([False, True], [False, True]))
+)
+async def test_single_statement_matches_orm_path(
+    clean_db: AsyncSession, is_balance_fixed: bool, is_active: bool
+):
+    session = clean_db
+
+    accounts = {}
+    for single_statement in [False, True]:
+        account = Account(
+            name=f"account_{single_statement}",
+            balance=100,
+            is_balance_fixed=is_balance_fixed,
+            is_active=is_active,
+            last_balance_update=datetime.now(),
+        )
+        session.add(account)
+        accounts[single_statement] = account
+    await session.commit()
+
+    balance = 100.0
+    for state, delta in product(STATES, DELTAS):
+        balance = round(balance + delta, 2)
+
+        outputs = {}
+        for single_statement, account in accounts.items():
+            usecase = get_usecase(session, single_statement)
+            dto = NewBalanceChangeRequest(
+                account_name=account.name, state=state, balance=balance
+            )
+            outputs[single_statement] = await usecase.new_balance_update(dto)
+            await session.refresh(account)
+
+        orm, single = outputs[False], outputs[True]
+        assert (single.state, single.state_raw) == (orm.state, orm.state_raw)
+        assert (single.balance, single.balance_diff) == (orm.balance, orm.balance_diff)
+
+        orm_account, single_account = accounts[False], accounts[True]
+        assert single_account.balance == orm_account.balance
+        assert single_account.is_balance_fixed == orm_account.is_balance_fixed
+        assert single_account.is_active == orm_account.is_active
+
+
+@pytest.mark.asyncio
+async def test_single_statement_creates_account(clean_db: AsyncSession):
+    session = clean_db
+
+    usecase = get_usecase(session, single_statement=True)
+    dto = NewBalanceChangeRequest(
+        account_name="new_account", state=BalanceChangeState.UPDATE, balance=50
+    )
+
+    output = await usecase.new_balance_update(dto)
+    assert output.balance_diff == 0
+    assert output.state == BalanceChangeState.UPDATE
+
+    account = await usecase.account_repository.get_by_name("new_account")
+    assert account.balance == 50
+    assert account.is_active
+    assert not account.is_balance_fixed
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "old,new,diff",
+    [
+        (10.0, 10.125, 0.13),
+        (0.0, 1.005, 1.01),
+        (1.005, 0.0, -1.01),
+        (99.875, 100.0, 0.13),
+        (0.0, 2.675, 2.68),
+    ],
+)
+async def test_half_cent_diff_rounds_the_same(
+    clean_db: AsyncSession, old: float, new: float, diff: float
+):
+    session = clean_db
+    diffs = []
+    for single_statement in [False, True]:
+        session.add(
+            Account(
+                name=f"account_{single_statement}",
+                balance=old,
+                last_balance_update=datetime.now(),
+            )
+        )
+        await session.commit()
+
+        output = await get_usecase(session, single_statement).new_balance_update(
+            NewBalanceChangeRequest(
+                account_name=f"account_{single_statement}",
+                state=BalanceChangeState.UPDATE,
+                balance=new,
+            )
+        )
+        diffs.append(output.balance_diff)
+
+    # половина цента - от нуля на обоих путях, round() дал бы 0.12, 1.0, 2.67
+    assert diffs == [diff, diff]
@@ -0,0 +1,62 @@
+from datetime import timedelta
+from uuid import uuid4
+
+import pytest
+from fastapi.dependencies.utils import get_dependant
+
+from app.usecase.auth import AuthUseCase
+from app.usecase.errors import UnauthorizedError
+from app.usecase.token import TokenUseCase
+from infra.utils.cache import LRUCache
+from infra.utils.config import AuthConfig
+from presentation.rest.deps import get_current_user, get_db
+
+
+def create_token(user_id, expires_delta: timedelta) -> str:
+    auth = AuthUseCase(AuthConfig(), None)  # type: ignore
+    return auth._create_access_token({"sub": str(user_id)}, expires_delta)
+
+
+def test_decoded_token_is_cached_until_exp(monkeypatch):
+    cache = LRUCache(10)
+    usecase = TokenUseCase(AuthConfig(), cache)
+    user_id = uuid4()
+    token = create_token(user_id, timedelta(minutes=5))
+
+    assert usecase.get_user_from_token(token).id == user_id
+
+    def fail(*args, **kwargs):
+        raise AssertionError("cached token must not be decoded again")
+
+    monkeypatch.setattr("app.usecase.token.jwt.decode", fail)
+    assert usecase.get_user_from_token(token).id == user_id
+    assert cache.stats()["hits"] == 1
+    assert token.encode() not in next(iter(cache._data))
+
+    expires_at, _ = next(iter(cache._data.values()))
+    monkeypatch.setattr("infra.utils.cache.time.monotonic", lambda: expires_at)
+    with pytest.raises(UnauthorizedError):
+        usecase.get_user_from_token(token)
+
+
+def test_invalid_token_is_not_cached():
+    cache = LRUCache(10)
+    usecase = TokenUseCase(AuthConfig(), cache)
+
+    for token in ["garbage", create_token(uuid4(), timedelta(minutes=-1))]:
+        with pytest.raises(UnauthorizedError):
+            usecase.get_user_from_token(token)
+
+    assert len(cache) == 0
+
+
+def test_token_auth_does_not_need_db_session():
+    calls = []
+    pending = [get_dependant(path="/", call=get_current_user)]
+    while pending:
+        dependant = pending.pop()
+        calls.append(dependant.call)
+        pending.extend(dependant.dependencies)
+
+    assert get_current_user in calls
+    assert get_db not in calls
@@ -0,0 +1,177 @@
+import pytest
+from sqlalchemy import select
+from sqlalchemy.exc import DataError, IntegrityError, OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from domain.entity.balance_change import BalanceChange
+
+from app.usecase.errors import InvalidInputError, TooManyRequestsError
+from app.usecase.write_behind import WriteBehindQueue, is_transient
+from app.dto.balance_change import NewBalanceChangeRequest, BalanceChangeState
+from infra.db.conn import Database
+
+
+def update(balance: float) -> NewBalanceChangeRequest:
+    return NewBalanceChangeRequest(
+        account_name="account", state=BalanceChangeState.UPDATE, balance=balance
+    )
+
+
+@pytest.mark.asyncio
+async def test_write_behind_group_commit_and_drain(
+    clean_db: AsyncSession, database: Database, usecase_factory
+):
+    session = clean_db
+
+    queue = WriteBehindQueue(
+        database, usecase_factory, batch_size=10, flush_interval_ms=1000
+    )
+    queue.start()
+    for balance in range(25):
+        await queue.put(update(balance))
+
+    # остановка дописывает все, что уже в очереди
+    await queue.stop()
+
+    stats = queue.stats()
+    assert stats["depth"] == 0
+    assert stats["flushed_items"] == 25
+    assert stats["flushes"] == 3
+
+    changes = (await session.execute(select(BalanceChange))).scalars().all()
+    assert len(changes) == 25
+    assert sum(change.balance_diff for change in changes) == 24
+
+    with pytest.raises(TooManyRequestsError):
+        await queue.put(update(0))
+
+
+@pytest.mark.asyncio
+async def test_write_behind_back_pressure(database: Database, usecase_factory):
+    queue = WriteBehindQueue(database, usecase_factory, queue_size=2)
+
+    await queue.put(update(1))
+    await queue.put(update(2))
+    with pytest.raises(TooManyRequestsError):
+        await queue.put(update(3))
+
+    assert queue.stats()["rejected"] == 1
+
+    with pytest.raises(InvalidInputError):
+        await queue.put(
+            NewBalanceChangeRequest(
+                account_name="account", state=BalanceChangeState.DEPOSIT, balance=1
+            )
+        )
+
+
+@pytest.mark.asyncio
+async def test_write_behind_retries_failed_batch_in_order(
+    clean_db: AsyncSession, database: Database, usecase_factory
+):
+    session = clean_db
+    failures = [ConnectionError("db restart")] * 2
+
+    def flaky_factory(session: AsyncSession):
+        usecase = usecase_factory(session)
+        if failures:
+            error = failures.pop()
+
+            async def fail(_):
+                raise error
+
+            usecase.new_balance_updates = fail
+        return usecase
+
+    queue = WriteBehindQueue(
+        database,
+        flaky_factory,
+        batch_size=3,
+        flush_interval_ms=1000,
+        retry_interval_ms=1,
+    )
+    queue.start()
+    balances = [10.0, 20.0, 5.0, 7.0, 3.0]
+    for balance in balances:
+        await queue.put(update(balance))
+    await queue.stop()
+
+    stats = queue.stats()
+    assert stats["failed_batches"] == 2
+    assert stats["failed_items"] == 0
+    assert stats["flushed_items"] == len(balances)
+
+    changes = (
+        (
+            await session.execute(
+                select(BalanceChange).order_by(
+                    BalanceChange.created_at, BalanceChange.seq
+                )
+            )
+        )
+        .scalars()
+        .all()
+    )
+    assert [change.balance for change in changes] == balances
+
+
+@pytest.mark.asyncio
+async def test_write_behind_splits_batch_and_drops_bad_update(
+    clean_db: AsyncSession, database: Database, usecase_factory
+):
+    session = clean_db
+    bad = 666.0
+
+    def factory(session: AsyncSession):
+        usecase = usecase_factory(session)
+        write = usecase.new_balance_updates
+
+        async def new_balance_updates(batch):
+            if any(request_dto.balance == bad for request_dto in batch):
+                raise DataError("INSERT", {}, ValueError("numeric field overflow"))
+            return await write(batch)
+
+        usecase.new_balance_updates = new_balance_updates
+        return usecase
+
+    queue = WriteBehindQueue(
+        database,
+        factory,
+        batch_size=8,
+        flush_interval_ms=1000,
+        retry_interval_ms=1,
+        max_attempts=2,
+    )
+    queue.start()
+    balances = [10.0, 20.0, 5.0, bad, 7.0, 3.0, 4.0, 1.0]
+    for balance in balances:
+        await queue.put(update(balance))
+    await queue.stop()
+
+    stats = queue.stats()
+    assert stats["dropped_items"] == 1
+    assert stats["flushed_items"] == len(balances) - 1
+    # 8 -> 4 -> 2 -> 1 и еще одна попытка последнего
+    assert stats["failed_batches"] == 5
+
+    changes = (
+        (
+            await session.execute(
+                select(BalanceChange).order_by(
+                    BalanceChange.created_at, BalanceChange.seq
+                )
+            )
+        )
+        .scalars()
+        .all()
+    )
+    assert [change.balance for change in changes] == [
+        balance for balance in balances if balance != bad
+    ]
+
+
+def test_transient_errors():
+    assert is_transient(ConnectionError())
+    assert is_transient(OperationalError("SELECT 1", {}, OSError()))
+    assert not is_transient(IntegrityError("INSERT", {}, ValueError()))
+    assert not is_transient(ValueError())
@@ -29,6 +29,40 @@ export interface BalanceChange {
   balance_diff: number;
 }
 
+export interface BalanceChangePnL {
+  account_id: string;
+  pnl: number; // без пополнений и выводов
+  deposits: number;
+  withdrawals: number;
+  updates: number;
+}
+
+export interface BalanceChangePage {
+  items: BalanceChange[];
+  next_cursor: string | null; // null - последняя страница
+}
+
+export type HistoryBucket = "minute" | "hour" | "day";
+
+// Агрегат истории за корзину, start - начало корзины (UTC)
+export interface BalanceChangeBucket {
+  start: string;
+  open: number;
+  close: number;
+  min: number;
+  max: number;
+  balance_diff: number;
+  pnl: number;
+  updates: number;
+}
+
+export interface AccountSummary extends Account {
+  pnl: number;
+  deposits: number;
+  withdrawals: number;
+  updates: number;
+}
+
 export const BalanceChangeStateMapping: Record<BalanceChangeState, string> = {
   lock: "Блокировка баланса до следующего изменения",
   deposit: "Пополнение баланса",
@@ -42,6 +76,19 @@ export function getAccounts(): Promise<Account[]> {
   return apiRequest<Account[]>("/accounts", { method: "GET" });
 }
 
+// Все аккаунты с PnL за период одним запросом
+export function getAccountsSummary(
+  dateFrom: string,
+  dateTo: string
+): Promise<AccountSummary[]> {
+  return apiRequest<AccountSummary[]>(
+    `/accounts/summary?date_from=${encodeURIComponent(
+      dateFrom
+    )}&date_to=${encodeURIComponent(dateTo)}`,
+    { method: "GET" }
+  );
+}
+
 export function getBalanceChanges(
   accountId: string,
   dateFrom: string,
@@ -56,3 +103,62 @@ export function getBalanceChanges(
     }
   );
 }
+
+// Страница истории по возрастанию времени, cursor - next_cursor предыдущей
+export function getBalanceChangesPage(
+  accountId: string,
+  dateFrom: string,
+  dateTo: string,
+  limit: number,
+  cursor?: string
+): Promise<BalanceChangePage> {
+  const params = new URLSearchParams({
+    date_from: dateFrom,
+    date_to: dateTo,
+    limit: String(limit),
+  });
+  if (cursor) {
+    params.set("cursor", cursor);
+  }
+  return apiRequest<BalanceChangePage>(
+    `/balance_change/${accountId}/page?${params}`,
+    { method: "GET" }
+  );
+}
+
+// История, сжатая сервером до maxPoints точек (ширина графика)
+export function getBalanceChangeBuckets(
+  accountId: string,
+  dateFrom: string,
+  dateTo: string,
+  maxPoints: number,
+  bucket?: HistoryBucket
+): Promise<BalanceChangeBucket[]> {
+  const params = new URLSearchParams({
+    date_from: dateFrom,
+    date_to: dateTo,
+    max_points: String(maxPoints),
+  });
+  if (bucket) {
+    params.set("bucket", bucket);
+  }
+  return apiRequest<BalanceChangeBucket[]>(
+    `/balance_change/${accountId}?${params}`,
+    { method: "GET" }
+  );
+}
+
+export function getBalanceChangePnL(
+  accountId: string,
+  dateFrom: string,
+  dateTo: string
+): Promise<BalanceChangePnL> {
+  return apiRequest<BalanceChangePnL>(
+    `/balance_change/${accountId}/pnl?date_from=${encodeURIComponent(
+      dateFrom
+    )}&date_to=${encodeURIComponent(dateTo)}`,
+    {
+      method: "GET",
+    }
+  );
+}
@@ -1,9 +1,5 @@
 import { useState } from "react";
-import {
-  getBalanceChanges,
-  type Account,
-  type BalanceChange,
-} from "../../api/accounts";
+import { type Account } from "../../api/accounts";
 import {
   Button,
   Flex,
@@ -44,31 +40,31 @@ export default function AccountPage({
   last_balance_update,
   onBackClick,
 }: AccountProps) {
-  const [changes, setChanges] = useState<BalanceChange[]>([]);
-  const [loading, setLoading] = useState(false);
   const [contentViewOption, setContentViewOption] = useState(
     contentViewOptions[0]
   );
   const [dateTo, setDateTo] = useState<Dayjs>(today);
   const [dateFrom, setDateFrom] = useState<Dayjs>(today);
+  // Период последней загрузки, по нему таблица и графики запрашивают свои
+  // данные; loadedAt пересоздает их на каждое "Обновить"
+  const [period, setPeriod] = useState<{
+    from: string;
+    to: string;
+    loadedAt: number;
+  } | null>(null);
 
-  async function loadChangesForAccount() {
-    setLoading(true);
+  function loadChangesForAccount() {
     const startOfDay = dateFrom.toDate();
     startOfDay.setHours(0, 0, 0, 0);
 
     const endOfDay = dateTo.toDate();
     endOfDay.setHours(23, 59, 59, 999);
 
-    const isoFrom = startOfDay.toISOString();
-    const isoTo = endOfDay.toISOString();
-
-    const results = await getBalanceChanges(id, isoFrom, isoTo).then((list) => {
-      return list;
+    setPeriod({
+      from: startOfDay.toISOString(),
+      to: endOfDay.toISOString(),
+      loadedAt: Date.now(),
     });
-
-    setChanges(results);
-    setLoading(false);
   }
 
   const onRangeChange = (
@@ -122,25 +118,34 @@ export default function AccountPage({
             onChange={onRangeChange}
             defaultValue={[today, today]}
           ></RangePicker>
-          <Button
-            onClick={loadChangesForAccount}
-            loading={loading}
-            disabled={loading}
-          >
-            Обновить
-          </Button>
+          <Button onClick={loadChangesForAccount}>Обновить</Button>
         </Space>
       </Flex>
-      {contentViewOption == contentViewOptions[0] && (
-        <ChangesTable changes={changes}></ChangesTable>
+      {contentViewOption == contentViewOptions[0] && period && (
+        <ChangesTable
+          key={period.loadedAt}
+          accountId={id}
+          dateFrom={period.from}
+          dateTo={period.to}
+        ></ChangesTable>
       )}
 
-      {contentViewOption == contentViewOptions[1] && (
-        <BalanceChart changes={changes}></BalanceChart>
+      {contentViewOption == contentViewOptions[1] && period && (
+        <BalanceChart
+          key={period.loadedAt}
+          accountId={id}
+          dateFrom={period.from}
+          dateTo={period.to}
+        ></BalanceChart>
       )}
 
-      {contentViewOption == contentViewOptions[2] && (
-        <BalanceDiffChart changes={changes}></BalanceDiffChart>
+      {contentViewOption == contentViewOptions[2] && period && (
+        <BalanceDiffChart
+          key={period.loadedAt}
+          accountId={id}
+          dateFrom={period.from}
+          dateTo={period.to}
+        ></BalanceDiffChart>
       )}
     </Flex>
   );
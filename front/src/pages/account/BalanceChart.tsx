@@ -1,21 +1,50 @@
+import { useEffect, useState } from "react";
 import { Line, LineChart, Tooltip, XAxis, YAxis } from "recharts";
-import { type BalanceChange } from "../../api/accounts";
+import {
+  getBalanceChangeBuckets,
+  type BalanceChangeBucket,
+} from "../../api/accounts";
 import dayjs from "dayjs";
 
+// Ширина графика в точках: сервер сжимает историю до стольких корзин
+const CHART_WIDTH = 600;
+
 interface BalanceChartProps {
-  changes: BalanceChange[];
+  accountId: string;
+  dateFrom: string; // ISO string
+  dateTo: string; // ISO string
 }
 
-export default function BalanceChart({ changes }: BalanceChartProps) {
+export default function BalanceChart({
+  accountId,
+  dateFrom,
+  dateTo,
+}: BalanceChartProps) {
+  const [buckets, setBuckets] = useState<BalanceChangeBucket[]>([]);
+
+  useEffect(() => {
+    // ответ на устаревший период не должен затереть новый
+    let actual = true;
+    getBalanceChangeBuckets(accountId, dateFrom, dateTo, CHART_WIDTH).then(
+      (data) => {
+        if (actual) setBuckets(data);
+      }
+    );
+
+    return () => {
+      actual = false;
+    };
+  }, [accountId, dateFrom, dateTo]);
+
   const prepareBalanceHistory = () => {
-    return [...changes].map((b) => ({
-      date: dayjs(b.created_at).toDate(),
-      balance: b.balance,
+    return buckets.map((b) => ({
+      date: dayjs(b.start).toDate(),
+      balance: b.close,
     }));
   };
 
   return (
-    <LineChart width={600} height={300} data={prepareBalanceHistory()}>
+    <LineChart width={CHART_WIDTH} height={300} data={prepareBalanceHistory()}>
       <XAxis dataKey="date" tickFormatter={(d) => d.toLocaleDateString()} />
       <YAxis />
       <Tooltip />
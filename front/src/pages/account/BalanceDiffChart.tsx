@@ -1,9 +1,16 @@
 import { Bar, BarChart, ReferenceLine, Tooltip, XAxis, YAxis } from "recharts";
-import { BalanceChangeState, type BalanceChange } from "../../api/accounts";
+import {
+  BalanceChangeState,
+  getBalanceChanges,
+  type BalanceChange,
+} from "../../api/accounts";
 import dayjs from "dayjs";
+import { useEffect, useState } from "react";
 
 interface BalanceDiffChartProps {
-  changes: BalanceChange[];
+  accountId: string;
+  dateFrom: string; // ISO string
+  dateTo: string; // ISO string
 }
 
 const CustomBarShape: React.FC<any> = (props) => {
@@ -20,7 +27,25 @@ const CustomBarShape: React.FC<any> = (props) => {
   return <rect x={x} y={y} width={width} height={height} fill={color} rx={2} />;
 };
 
-export default function BalanceDiffChart({ changes }: BalanceDiffChartProps) {
+export default function BalanceDiffChart({
+  accountId,
+  dateFrom,
+  dateTo,
+}: BalanceDiffChartProps) {
+  const [changes, setChanges] = useState<BalanceChange[]>([]);
+
+  useEffect(() => {
+    // каждый столбик - отдельное изменение, поэтому нужна сырая история
+    let actual = true;
+    getBalanceChanges(accountId, dateFrom, dateTo).then((list) => {
+      if (actual) setChanges(list);
+    });
+
+    return () => {
+      actual = false;
+    };
+  }, [accountId, dateFrom, dateTo]);
+
   const prepareBalanceDiffChart = () => {
     const excluded: BalanceChangeState[] = ["deposit", "withdraw"];
 
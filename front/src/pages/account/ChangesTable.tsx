@@ -1,15 +1,21 @@
-import { Table, Tag, Typography, Switch, Space } from "antd";
+import { Button, Table, Tag, Typography, Switch, Space } from "antd";
 import type { TableProps } from "antd";
 import {
   BalanceChangeState,
   BalanceChangeStateMapping,
+  getBalanceChangePnL,
+  getBalanceChangesPage,
   type BalanceChange,
 } from "../../api/accounts";
 import dayjs from "dayjs";
-import { useState } from "react";
+import { useEffect, useState } from "react";
+
+const PAGE_SIZE = 100;
 
 interface ChangesTableProps {
-  changes: BalanceChange[];
+  accountId: string;
+  dateFrom: string; // ISO string
+  dateTo: string; // ISO string
 }
 
 const BalanceChangeStateColors: Record<BalanceChangeState, string> = {
@@ -20,8 +26,58 @@ const BalanceChangeStateColors: Record<BalanceChangeState, string> = {
   shutdown: "gold",
 };
 
-export default function ChangesTable({ changes }: ChangesTableProps) {
+export default function ChangesTable({
+  accountId,
+  dateFrom,
+  dateTo,
+}: ChangesTableProps) {
   const [showRaw, setShowRaw] = useState(false);
+  const [changes, setChanges] = useState<BalanceChange[]>([]);
+  const [cursor, setCursor] = useState<string | null>(null);
+  const [loading, setLoading] = useState(false);
+  const [total, setTotal] = useState(0);
+
+  useEffect(() => {
+    // ответ на устаревший период не должен затереть новый
+    let actual = true;
+    setLoading(true);
+    Promise.all([
+      getBalanceChangesPage(accountId, dateFrom, dateTo, PAGE_SIZE),
+      getBalanceChangePnL(accountId, dateFrom, dateTo),
+    ])
+      .then(([page, pnl]) => {
+        if (!actual) return;
+        setChanges(page.items);
+        setCursor(page.next_cursor);
+        // сумма всех изменений периода, не только загруженных страниц
+        setTotal(pnl.pnl + pnl.deposits + pnl.withdrawals);
+      })
+      .finally(() => {
+        if (actual) setLoading(false);
+      });
+
+    return () => {
+      actual = false;
+    };
+  }, [accountId, dateFrom, dateTo]);
+
+  async function loadMore() {
+    if (!cursor) return;
+    setLoading(true);
+    try {
+      const page = await getBalanceChangesPage(
+        accountId,
+        dateFrom,
+        dateTo,
+        PAGE_SIZE,
+        cursor
+      );
+      setChanges((loaded) => [...loaded, ...page.items]);
+      setCursor(page.next_cursor);
+    } finally {
+      setLoading(false);
+    }
+  }
 
   const columns: TableProps<BalanceChange>["columns"] = [
     {
@@ -59,32 +115,31 @@ export default function ChangesTable({ changes }: ChangesTableProps) {
     },
   ];
 
-  const prepareBalanceHistory = (balanceChanges: BalanceChange[]) => {
-    return [...balanceChanges].sort((a, b) =>
-      dayjs(b.created_at).diff(dayjs(a.created_at))
-    );
-  };
-
-  const reduced = changes.reduce(
-    (prev, current) => (prev += current.balance_diff),
-    0
-  );
+  const reduced = Math.round(total * 100) / 100;
   const type = reduced === 0 ? "secondary" : reduced > 0 ? "success" : "danger";
 
   return (
     <Space orientation="vertical" style={{ padding: "10px 0" }}>
       <Typography.Text>Показать сырой тип события</Typography.Text>
       <Switch checked={showRaw} onChange={setShowRaw} />
+      {/* страницы идут по возрастанию времени, следующая дописывается в конец */}
       <Table
         columns={columns}
-        dataSource={prepareBalanceHistory(changes)}
+        dataSource={changes}
         rowKey="id"
+        loading={loading}
+        pagination={false}
         footer={() => (
           <Typography.Text>
             Итого: <Typography.Text type={type}>{reduced}$</Typography.Text>
           </Typography.Text>
         )}
       />
+      {cursor && (
+        <Button onClick={loadMore} loading={loading} disabled={loading}>
+          Загрузить еще
+        </Button>
+      )}
     </Space>
   );
 }
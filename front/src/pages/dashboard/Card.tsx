@@ -1,13 +1,11 @@
-import { useEffect, useState } from "react";
-import { getBalanceChanges, type Account } from "../../api/accounts";
+import { type AccountSummary } from "../../api/accounts";
 import dayjs from "dayjs";
 import "dayjs/locale/ru";
 import relativeTime from "dayjs/plugin/relativeTime";
-import { Skeleton } from "antd";
 
 dayjs.extend(relativeTime);
 
-interface CardProps extends Account {
+interface CardProps extends AccountSummary {
   onClick?: () => void;
 }
 
@@ -16,15 +14,9 @@ export default function Card({
   name,
   balance: current_balance,
   last_balance_update,
+  pnl: change,
   onClick,
 }: CardProps) {
-  const [change, setChange] = useState<number>(0);
-  const [loading, setLoading] = useState(true);
-
-  useEffect(() => {
-    loadChangesForAccount();
-  }, []);
-
   // const dateStr = last_balance_update.replace(/\.\d+Z$/, "Z");
   // const date = new Date(dateStr);
   const timeSince = dayjs(last_balance_update).locale("ru").fromNow(); // Используем dayjs для красивого формата
@@ -36,21 +28,6 @@ export default function Card({
       ? styles.textGreen
       : styles.textRed;
 
-  async function loadChangesForAccount() {
-    const dateTo = new Date();
-    const dateFrom = new Date(dateTo.getTime() - 24 * 60 * 60 * 1000);
-
-    const isoFrom = dateFrom.toISOString();
-    const isoTo = dateTo.toISOString();
-
-    const results = await getBalanceChanges(id, isoFrom, isoTo).then((list) => {
-      return list.reduce((sum, x) => sum + x.balance_diff, 0);
-    });
-
-    setChange(results);
-    setLoading(false);
-  }
-
   return (
     <div key={id} className="card fade-in" onClick={onClick}>
       <div style={styles.left}>{name}</div>
@@ -60,14 +37,10 @@ export default function Card({
           <div style={styles.lastUpdate}>{timeSince}</div>
         </div>
         <div style={styles.changeBox}>
-          {loading ? (
-            <Skeleton.Button active />
-          ) : (
-            <div style={colorStyle}>
-              {change >= 0 ? "+" : ""}
-              {change.toFixed(2)}$
-            </div>
-          )}
+          <div style={colorStyle}>
+            {change >= 0 ? "+" : ""}
+            {change.toFixed(2)}$
+          </div>
           <div style={styles.lastUpdate}>за 24ч</div>
         </div>
       </div>
@@ -1,20 +1,28 @@
 import { useEffect, useState } from "react";
-import { getAccounts, type Account } from "../../api/accounts";
+import { getAccountsSummary, type AccountSummary } from "../../api/accounts";
 import "./Dashboard.css"; // Для анимации fade-in
 import Card from "./Card";
 import AccountPage from "../account/Account";
 
 export default function Dashboard() {
-  const [accounts, setAccounts] = useState<Account[]>([]);
+  const [accounts, setAccounts] = useState<AccountSummary[]>([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
   const [search, setSearch] = useState("");
-  const [accountSelected, setAccountSelected] = useState<Account | null>(null);
+  const [accountSelected, setAccountSelected] = useState<AccountSummary | null>(
+    null
+  );
 
   useEffect(() => {
     async function fetchAccounts() {
       try {
-        const data = await getAccounts();
+        // PnL всех карточек за 24ч - одним запросом
+        const dateTo = new Date();
+        const dateFrom = new Date(dateTo.getTime() - 24 * 60 * 60 * 1000);
+        const data = await getAccountsSummary(
+          dateFrom.toISOString(),
+          dateTo.toISOString()
+        );
         setAccounts(data);
       } catch (err: any) {
         setError(err.message);